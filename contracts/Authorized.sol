@@ -15,9 +15,15 @@ contract Authorized is Context {
     event UpdateKeeper(address indexed keeper);
 
     constructor() {
-        _governance = _msgSender();
-        _management = _msgSender();
-        _keeper = _msgSender();
+        _initializeAuthorized(_msgSender());
+    }
+
+    /// @notice grants every role to _account. Clones don't run the constructor
+    /// and call this from their initializer instead.
+    function _initializeAuthorized(address _account) internal {
+        _governance = _account;
+        _management = _account;
+        _keeper = _account;
     }
 
     modifier onlyGovernance() {
@@ -0,0 +1,176 @@
+// SPDX-License-Identifier: BSD
+
+pragma solidity 0.8.11;
+
+/// @title Deploys clones that append immutable args to every call
+/// @notice Adapted from wighawag/clones-with-immutable-args. The clone delegates to
+/// implementation like an EIP-1167 clone, with data appended to the calldata
+/// followed by its length in 2 bytes. The implementation reads it with Clone.
+library ClonesWithImmutableArgs {
+    /// @notice deploys a clone of implementation with the immutable args data
+    /// @param implementation contract the clone delegates to
+    /// @param data packed immutable args, see Clone
+    /// @return instance the clone
+    function clone(address implementation, bytes memory data)
+        internal
+        returns (address instance)
+    {
+        // unrealistic for memory ptr or data length to exceed 256 bits
+        unchecked {
+            uint256 extraLength = data.length + 2; // +2 bytes for the data length
+            uint256 creationSize = 0x41 + extraLength;
+            uint256 runSize = creationSize - 10;
+            uint256 dataPtr;
+            uint256 ptr;
+            // solhint-disable-next-line no-inline-assembly
+            assembly {
+                ptr := mload(0x40)
+
+                // CREATION (10 bytes)
+                // 61 runtime  | PUSH2 runtime (r)     | r
+                mstore(
+                    ptr,
+                    0x6100000000000000000000000000000000000000000000000000000000000000
+                )
+                mstore(add(ptr, 0x01), shl(240, runSize))
+
+                // 3d          | RETURNDATASIZE        | 0 r
+                // 81          | DUP2                  | r 0 r
+                // 60 creation | PUSH1 creation (c)    | c r 0 r
+                // 3d          | RETURNDATASIZE        | 0 c r 0 r
+                // 39          | CODECOPY              | 0 r
+                // f3          | RETURN                |
+
+                // RUNTIME (55 bytes + extraLength)
+                // 3d3d3d3d    | RETURNDATASIZE x4     | 0 0 0 0
+                // 36          | CALLDATASIZE          | cds 0 0 0 0
+                // 3d3d        | RETURNDATASIZE x2     | 0 0 cds 0 0 0 0
+                // 37          | CALLDATACOPY          | 0 0 0 0
+                // 61 extra    | PUSH2 extra           | extra 0 0 0 0
+                mstore(
+                    add(ptr, 0x03),
+                    0x3d81600a3d39f33d3d3d3d363d3d376100000000000000000000000000000000
+                )
+                mstore(add(ptr, 0x13), shl(240, extraLength))
+
+                // 60 0x37     | PUSH1 0x37            | 0x37 extra 0 0 0 0
+                // 36          | CALLDATASIZE          | cds 0x37 extra 0 0 0 0
+                // 39          | CODECOPY              | 0 0 0 0
+                // 36          | CALLDATASIZE          | cds 0 0 0 0
+                // 61 extra    | PUSH2 extra           | extra cds 0 0 0 0
+                mstore(
+                    add(ptr, 0x15),
+                    0x6037363936610000000000000000000000000000000000000000000000000000
+                )
+                mstore(add(ptr, 0x1b), shl(240, extraLength))
+
+                // 01          | ADD                   | cds+extra 0 0 0 0
+                // 3d          | RETURNDATASIZE        | 0 cds+extra 0 0 0 0
+                // 73 addr     | PUSH20 implementation | addr 0 cds+extra 0 0 0 0
+                mstore(
+                    add(ptr, 0x1d),
+                    0x013d730000000000000000000000000000000000000000000000000000000000
+                )
+                mstore(add(ptr, 0x20), shl(0x60, implementation))
+
+                // 5a          | GAS                   | gas addr 0 cds+extra 0 0 0 0
+                // f4          | DELEGATECALL          | success 0 0
+                // 3d3d        | RETURNDATASIZE x2     | rds rds success 0 0
+                // 93          | SWAP4                 | 0 rds success 0 rds
+                // 80          | DUP1                  | 0 0 rds success 0 rds
+                // 3e          | RETURNDATACOPY        | success 0 rds
+                // 60 0x35     | PUSH1 0x35            | 0x35 success 0 rds
+                // 57          | JUMPI                 | 0 rds
+                // fd          | REVERT                |
+                // 5b          | JUMPDEST              | 0 rds
+                // f3          | RETURN                |
+                mstore(
+                    add(ptr, 0x34),
+                    0x5af43d3d93803e603557fd5bf300000000000000000000000000000000000000
+                )
+            }
+
+            // APPENDED DATA, copied after the runtime and appended to each delegatecall
+            extraLength -= 2;
+            uint256 counter = extraLength;
+            uint256 copyPtr = ptr + 0x41;
+            // solhint-disable-next-line no-inline-assembly
+            assembly {
+                dataPtr := add(data, 32)
+            }
+            for (; counter >= 32; counter -= 32) {
+                // solhint-disable-next-line no-inline-assembly
+                assembly {
+                    mstore(copyPtr, mload(dataPtr))
+                }
+                copyPtr += 32;
+                dataPtr += 32;
+            }
+            uint256 mask = ~(256**(32 - counter) - 1);
+            // solhint-disable-next-line no-inline-assembly
+            assembly {
+                mstore(copyPtr, and(mload(dataPtr), mask))
+            }
+            copyPtr += counter;
+            // solhint-disable-next-line no-inline-assembly
+            assembly {
+                mstore(copyPtr, shl(240, extraLength))
+                instance := create(0, ptr, creationSize)
+            }
+            require(instance != address(0), "clone failed");
+        }
+    }
+}
+
+/// @title Reads the immutable args of a ClonesWithImmutableArgs clone
+/// @notice Contracts deployed with their constructor keep these values in immutables,
+/// _isClone() tells the two apart. A clone must delegate to a contract deployed with
+/// its constructor, not to another clone.
+abstract contract Clone {
+    /// @dev the address the contract was deployed at, clones delegate to it
+    address private immutable _self = address(this);
+
+    /// @notice returns true when running as a clone, ie the immutable args are
+    /// appended to the calldata
+    function _isClone() internal view returns (bool) {
+        return address(this) != _self;
+    }
+
+    /// @notice reads an address from the immutable args at _argOffset
+    function _getArgAddress(uint256 _argOffset)
+        internal
+        pure
+        returns (address arg)
+    {
+        uint256 offset = _getImmutableArgsOffset();
+        // solhint-disable-next-line no-inline-assembly
+        assembly {
+            arg := shr(0x60, calldataload(add(offset, _argOffset)))
+        }
+    }
+
+    /// @notice reads a uint256 from the immutable args at _argOffset
+    function _getArgUint256(uint256 _argOffset)
+        internal
+        pure
+        returns (uint256 arg)
+    {
+        uint256 offset = _getImmutableArgsOffset();
+        // solhint-disable-next-line no-inline-assembly
+        assembly {
+            arg := calldataload(add(offset, _argOffset))
+        }
+    }
+
+    /// @notice calldata offset of the immutable args, which are followed by their
+    /// length in 2 bytes
+    function _getImmutableArgsOffset() internal pure returns (uint256 offset) {
+        // solhint-disable-next-line no-inline-assembly
+        assembly {
+            offset := sub(
+                calldatasize(),
+                add(shr(240, calldataload(sub(calldatasize(), 2))), 2)
+            )
+        }
+    }
+}
@@ -5,15 +5,37 @@ pragma solidity 0.8.11;
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
 
 contract ERC20NoTransfer is ERC20 {
+    string private _tokenName;
+    string private _tokenSymbol;
+
     constructor(string memory name_, string memory symbol_)
         ERC20(name_, symbol_)
-    {}
+    {
+        _initializeERC20(name_, symbol_);
+    }
+
+    /// @notice name and symbol are kept here rather than in ERC20 so clones,
+    /// which don't run the constructor, can set them from their initializer
+    function _initializeERC20(string memory name_, string memory symbol_)
+        internal
+    {
+        _tokenName = name_;
+        _tokenSymbol = symbol_;
+    }
+
+    function name() public view virtual override returns (string memory) {
+        return _tokenName;
+    }
+
+    function symbol() public view virtual override returns (string memory) {
+        return _tokenSymbol;
+    }
 
     function _transfer(
         address from,
         address to,
         uint256 amount
-    ) internal override {
+    ) internal virtual override {
         revert("Transfer Not Supported");
     }
 }
@@ -0,0 +1,102 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.8.11;
+pragma experimental ABIEncoderV2;
+
+import "./Authorized.sol";
+import "./interfaces/IRedirectVault.sol";
+
+/// @title Harvests a fleet of RedirectVaults in one transaction
+/// @author Robovault
+/// @notice Keepers call harvest() with the vaults they manage at each epoch
+/// boundary. Vaults that aren't due are skipped and a vault that reverts is
+/// reported without stopping the rest of the batch.
+/// @dev This contract must be the keeper of each vault, see RedirectVault.setKeeper().
+/// The keepers allowed to call it are managed with its own Authorized roles.
+contract HarvestBatcher is Authorized {
+    /// @notice outcome of harvesting a single vault
+    struct Result {
+        address vault;
+        bool due; // harvestTrigger() returned true
+        bool success; // harvest() succeeded
+        uint256 gasUsed; // gas used by harvestTrigger() and harvest()
+        bytes reason; // revert data if the trigger or harvest failed
+    }
+
+    /*///////////////////////////////////////////////////////////////
+                                EVENTS
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice Emitted for each vault that fails to harvest
+    event HarvestFailed(address indexed vault, bytes reason);
+
+    /// @notice Emitted once per batch
+    event BatchHarvested(uint256 harvested, uint256 failed);
+
+    /// @notice returns harvestTrigger() for each of _vaults. Vaults where the
+    /// trigger reverts are returned as not due.
+    /// @param _vaults RedirectVaults to check
+    function harvestTriggers(address[] calldata _vaults)
+        external
+        view
+        returns (bool[] memory due)
+    {
+        due = new bool[](_vaults.length);
+        for (uint256 i = 0; i < _vaults.length; i++) {
+            try IRedirectVault(_vaults[i]).harvestTrigger() returns (
+                bool triggered
+            ) {
+                due[i] = triggered;
+            } catch {}
+        }
+    }
+
+    /// @notice harvests each of _vaults whose harvestTrigger() is true
+    /// @param _vaults RedirectVaults to harvest
+    /// @param _gasPerVault gas limit for each harvest, zero to forward all
+    /// available gas. Caps the gas a misbehaving strategy can consume.
+    /// @return results the outcome for each vault, in the order of _vaults
+    function harvest(address[] calldata _vaults, uint256 _gasPerVault)
+        external
+        onlyKeeper
+        returns (Result[] memory results)
+    {
+        results = new Result[](_vaults.length);
+        uint256 harvested = 0;
+        uint256 failed = 0;
+        for (uint256 i = 0; i < _vaults.length; i++) {
+            results[i] = _harvest(IRedirectVault(_vaults[i]), _gasPerVault);
+            if (results[i].success) {
+                harvested++;
+            } else if (results[i].reason.length > 0 || results[i].due) {
+                failed++;
+                emit HarvestFailed(_vaults[i], results[i].reason);
+            }
+        }
+        emit BatchHarvested(harvested, failed);
+    }
+
+    /// @notice checks the trigger of a single vault and harvests it if due
+    function _harvest(IRedirectVault _vault, uint256 _gasPerVault)
+        internal
+        returns (Result memory result)
+    {
+        uint256 gasStart = gasleft();
+        result.vault = address(_vault);
+
+        try _vault.harvestTrigger() returns (bool triggered) {
+            result.due = triggered;
+        } catch (bytes memory reason) {
+            result.reason = reason;
+        }
+
+        if (result.due) {
+            uint256 gasLimit = _gasPerVault == 0 ? gasleft() : _gasPerVault;
+            try _vault.harvest{gas: gasLimit}() {
+                result.success = true;
+            } catch (bytes memory reason) {
+                result.reason = reason;
+            }
+        }
+        result.gasUsed = gasStart - gasleft();
+    }
+}
@@ -0,0 +1,109 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.8.11;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/utils/math/SafeMath.sol";
+import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+
+import {IVault} from "./interfaces/IVault.sol";
+import "./RewardDistributor.sol";
+
+/// @title Claims rewards from many RewardDistributors in one transaction
+/// @author Robovault
+/// @notice Users holding positions in several RedirectVaults can call claim()
+/// rather than harvest() on each distributor.
+/// @dev Each distributor must set this contract as its claimRouter. Rewards are
+/// collected in each distributors tokenOut and grouped by token, so distributors
+/// that share a targetVault (eg yvUSDC) cost a single IVault.withdraw and a single
+/// transfer to the user. The router holds no funds between transactions.
+contract HarvestRouter is ReentrancyGuard {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    /*///////////////////////////////////////////////////////////////
+                                EVENTS
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice Emitted once per token sent to the user
+    event RouterHarvested(
+        address indexed user,
+        address indexed token,
+        uint256 amount
+    );
+
+    /// @notice claims the callers pending rewards from each of _distributors and
+    /// sends them to the caller. Rewards from distributors using a targetVault are
+    /// withdrawn and paid in the vaults underlying targetToken.
+    /// @dev distributors with no pending rewards are skipped
+    /// @param _distributors RewardDistributors to claim from
+    /// @return rewards amount claimed from each distributor, in its tokenOut
+    function claim(address[] calldata _distributors)
+        external
+        nonReentrant
+        returns (uint256[] memory rewards)
+    {
+        address user = msg.sender;
+        rewards = new uint256[](_distributors.length);
+
+        // unique tokenOuts and the amount received in each
+        address[] memory tokens = new address[](_distributors.length);
+        uint256[] memory amounts = new uint256[](_distributors.length);
+        bool[] memory isVault = new bool[](_distributors.length);
+        uint256 numTokens = 0;
+
+        for (uint256 i = 0; i < _distributors.length; i++) {
+            RewardDistributor distributor = RewardDistributor(
+                _distributors[i]
+            );
+            IERC20 tokenOut = distributor.tokenOut();
+
+            // measure what was received rather than trusting the return value
+            uint256 balBefore = tokenOut.balanceOf(address(this));
+            rewards[i] = distributor.harvestFor(user);
+            uint256 received = tokenOut.balanceOf(address(this)).sub(
+                balBefore
+            );
+            if (received == 0) {
+                continue;
+            }
+
+            uint256 j = 0;
+            while (j < numTokens && tokens[j] != address(tokenOut)) {
+                j++;
+            }
+            if (j == numTokens) {
+                tokens[j] = address(tokenOut);
+                isVault[j] = distributor.useTargetVault();
+                numTokens++;
+            }
+            amounts[j] = amounts[j].add(received);
+        }
+
+        for (uint256 j = 0; j < numTokens; j++) {
+            if (isVault[j]) {
+                _withdrawAndSend(IVault(tokens[j]), amounts[j], user);
+            } else {
+                IERC20(tokens[j]).safeTransfer(user, amounts[j]);
+                emit RouterHarvested(user, tokens[j], amounts[j]);
+            }
+        }
+    }
+
+    /// @notice withdraws _shares from _vault and sends the underlying to _user
+    /// @param _vault target vault the shares belong to
+    /// @param _shares amount of vault shares held by the router for _user
+    /// @param _user the user claiming
+    function _withdrawAndSend(
+        IVault _vault,
+        uint256 _shares,
+        address _user
+    ) internal {
+        IERC20 underlying = IERC20(_vault.token());
+        uint256 balBefore = underlying.balanceOf(address(this));
+        _vault.withdraw(_shares);
+        uint256 amountOut = underlying.balanceOf(address(this)).sub(balBefore);
+        underlying.safeTransfer(_user, amountOut);
+        emit RouterHarvested(_user, address(underlying), amountOut);
+    }
+}
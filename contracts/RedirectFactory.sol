@@ -0,0 +1,196 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.8.11;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/proxy/Clones.sol";
+
+import "./Authorized.sol";
+import "./ClonesWithImmutableArgs.sol";
+import "./types/VaultConfig.sol";
+
+interface IRedirectVaultInit {
+    function initializeVault(
+        VaultConfig calldata _config,
+        address _governance,
+        address _strategy,
+        address _distributor
+    ) external;
+}
+
+interface IRewardDistributorInit {
+    function initializeDistributor(
+        address _feeAddress,
+        address[] calldata _rewardTokens
+    ) external;
+}
+
+interface IStrategyInit {
+    function initializeStrategy(
+        address _vault,
+        address _lpPair,
+        uint8 _poolId,
+        address _strategist
+    ) external;
+}
+
+interface IStrategy0xDAOInit {
+    function initializeStrategy(
+        address _vault,
+        address _lpPair,
+        address _strategist
+    ) external;
+}
+
+/// @title Deploys RedirectVault sets as minimal proxies
+/// @author Robovault
+/// @notice deploy() stands up a RedirectVault, RewardDistributor and strategy in one
+/// transaction from a VaultConfig, deployBatch() does the same for many pools.
+/// Each contract is a clone of an implementation, so a set costs a few hundred
+/// thousand gas rather than deploying the full bytecode of each contract. The vault
+/// and distributor are ClonesWithImmutableArgs clones, so the values their
+/// constructors keep in immutables aren't read from storage.
+/// @dev Any set deployed with the constructors can serve as the implementations,
+/// they are only delegated to. Clones can't. The caller becomes the governance of
+/// the vault and strategist of the strategy.
+contract RedirectFactory is Authorized {
+    /// @notice RedirectVault implementation
+    address public vaultImplementation;
+
+    /// @notice RewardDistributor implementation
+    address public distributorImplementation;
+
+    /// @notice strategy implementation for each StrategyType
+    mapping(StrategyType => address) public strategyImplementation;
+
+    /// @notice vaults deployed by this factory
+    address[] public vaults;
+
+    /*///////////////////////////////////////////////////////////////
+                                EVENTS
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice Emitted when the vault and distributor implementations are set
+    event ImplementationsSet(address vault, address distributor);
+
+    /// @notice Emitted when a strategy implementation is set
+    event StrategyImplementationSet(
+        StrategyType indexed strategyType,
+        address implementation
+    );
+
+    /// @notice Emitted for each vault set deployed
+    event VaultDeployed(
+        address indexed vault,
+        address indexed token,
+        address distributor,
+        address strategy
+    );
+
+    /// @notice sets the vault and distributor implementations
+    function setImplementations(address _vault, address _distributor)
+        external
+        onlyAuthorized
+    {
+        vaultImplementation = _vault;
+        distributorImplementation = _distributor;
+        emit ImplementationsSet(_vault, _distributor);
+    }
+
+    /// @notice sets the strategy implementation for _strategyType
+    function setStrategyImplementation(
+        StrategyType _strategyType,
+        address _implementation
+    ) external onlyAuthorized {
+        strategyImplementation[_strategyType] = _implementation;
+        emit StrategyImplementationSet(_strategyType, _implementation);
+    }
+
+    /// @notice number of vaults deployed by this factory
+    function vaultsLength() external view returns (uint256) {
+        return vaults.length;
+    }
+
+    /// @notice deploys and connects a vault, distributor and strategy for _config
+    /// @return vault the RedirectVault
+    /// @return distributor the RewardDistributor
+    /// @return strategy the strategy
+    function deploy(VaultConfig calldata _config)
+        public
+        onlyAuthorized
+        returns (
+            address vault,
+            address distributor,
+            address strategy
+        )
+    {
+        address strategyImpl = strategyImplementation[_config.strategyType];
+        require(
+            vaultImplementation != address(0) &&
+                distributorImplementation != address(0) &&
+                strategyImpl != address(0),
+            "!implementation"
+        );
+        // immutable args, see RedirectVault and RewardDistributor getters
+        vault = ClonesWithImmutableArgs.clone(
+            vaultImplementation,
+            abi.encodePacked(
+                _config.targetToken,
+                _config.targetVault,
+                _config.approvalDelay
+            )
+        );
+        distributor = ClonesWithImmutableArgs.clone(
+            distributorImplementation,
+            abi.encodePacked(
+                vault,
+                _config.router,
+                _config.targetToken,
+                _config.targetVault
+            )
+        );
+        strategy = Clones.clone(strategyImpl);
+
+        // the vault checks the distributor when it's connected, so it's initialized last
+        IRewardDistributorInit(distributor).initializeDistributor(
+            _config.feeAddress,
+            _config.rewardTokens
+        );
+        if (_config.strategyType == StrategyType.OxDAO) {
+            IStrategy0xDAOInit(strategy).initializeStrategy(
+                vault,
+                _config.token,
+                msg.sender
+            );
+        } else {
+            IStrategyInit(strategy).initializeStrategy(
+                vault,
+                _config.token,
+                _config.pid,
+                msg.sender
+            );
+        }
+        IRedirectVaultInit(vault).initializeVault(
+            _config,
+            msg.sender,
+            strategy,
+            distributor
+        );
+
+        vaults.push(vault);
+        emit VaultDeployed(vault, _config.token, distributor, strategy);
+    }
+
+    /// @notice deploys a vault set for each of _configs
+    /// @return deployed the vault, distributor and strategy of each set
+    function deployBatch(VaultConfig[] calldata _configs)
+        external
+        returns (address[3][] memory deployed)
+    {
+        deployed = new address[3][](_configs.length);
+        for (uint256 i = 0; i < _configs.length; i++) {
+            (deployed[i][0], deployed[i][1], deployed[i][2]) = deploy(
+                _configs[i]
+            );
+        }
+    }
+}
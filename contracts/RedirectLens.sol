@@ -0,0 +1,244 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.8.11;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/security/Pausable.sol";
+import "@openzeppelin/contracts/utils/math/SafeMath.sol";
+
+import "./interfaces/IStrategy.sol";
+import "./interfaces/IERC20Extended.sol";
+import "./interfaces/uniswap.sol";
+import {IVault} from "./interfaces/IVault.sol";
+import {RedirectVault} from "./RedirectVault.sol";
+import {RewardDistributor} from "./RewardDistributor.sol";
+
+/// @title Read-only view of RedirectVault, strategy and RewardDistributor state
+/// @author Robovault
+/// @notice Returns the state of many vaults and many users in a single eth_call.
+/// Intended for dashboards and off-chain services, see scripts/lens.py.
+/// @dev Holds no state and is never called on-chain by the protocol
+contract RedirectLens {
+    using SafeMath for uint256;
+
+    struct VaultState {
+        address vault;
+        address token;
+        address strategy;
+        address distributor;
+        address targetToken;
+        address targetVault;
+        address tokenOut;
+        uint256 totalSupply;
+        uint256 totalBalance;
+        uint256 available;
+        uint256 pricePerFullShare;
+        uint256 tvlCap;
+        uint256 strategyBalance;
+        bool strategyPaused;
+        uint256 epoch;
+        uint256 lastEpoch;
+        uint256 timePerEpoch;
+        bool isEpochFinished;
+        uint256 eligibleEpochRewards;
+        uint256 targetBalance;
+        uint256 targetPricePerShare;
+        bool useTargetVault;
+        bool emergencyExitVault;
+    }
+
+    struct UserState {
+        address vault;
+        address user;
+        uint256 shares;
+        uint256 tokenBalance;
+        uint256 tokenAllowance;
+        uint256 cumulativeDeposits;
+        uint256 cumulativeWithdrawals;
+        uint256 pendingRewards;
+        uint256 pendingRewardsTarget;
+        uint256 amount;
+        uint256 epochStart;
+        uint256 depositTime;
+        uint256 totalClaimed;
+    }
+
+    /// @notice returns the state of each of _vaults
+    /// @param _vaults RedirectVault addresses
+    function getVaults(address[] calldata _vaults)
+        external
+        view
+        returns (VaultState[] memory states)
+    {
+        states = new VaultState[](_vaults.length);
+        for (uint256 i = 0; i < _vaults.length; i++) {
+            states[i] = getVault(_vaults[i]);
+        }
+    }
+
+    /// @notice returns the state of every user in every vault. Results are ordered
+    /// by vault then user, ie the state of _users[j] in _vaults[i] is at
+    /// index i * _users.length + j
+    /// @param _vaults RedirectVault addresses
+    /// @param _users user addresses
+    function getUsers(address[] calldata _vaults, address[] calldata _users)
+        external
+        view
+        returns (UserState[] memory states)
+    {
+        states = new UserState[](_vaults.length * _users.length);
+        for (uint256 i = 0; i < _vaults.length; i++) {
+            for (uint256 j = 0; j < _users.length; j++) {
+                states[i * _users.length + j] = getUser(_vaults[i], _users[j]);
+            }
+        }
+    }
+
+    /// @notice returns the state of a single vault, its strategy and distributor
+    /// @param _vault RedirectVault address
+    function getVault(address _vault)
+        public
+        view
+        returns (VaultState memory state)
+    {
+        RedirectVault vault = RedirectVault(_vault);
+        RewardDistributor distributor = RewardDistributor(
+            address(vault.distributor())
+        );
+
+        state.vault = _vault;
+        state.token = address(vault.token());
+        state.strategy = vault.strategy();
+        state.distributor = address(distributor);
+        state.targetToken = vault.targetToken();
+        state.targetVault = vault.targetVault();
+        state.totalSupply = vault.totalSupply();
+        state.available = vault.available();
+        state.tvlCap = vault.tvlCap();
+
+        // an uninitialized vault has no strategy or distributor
+        if (state.strategy == address(0)) {
+            state.totalBalance = state.available;
+            state.pricePerFullShare = 1e18;
+            return state;
+        }
+        state.totalBalance = vault.totalBalance();
+        state.pricePerFullShare = vault.getPricePerFullShare();
+        state.strategyBalance = IStrategy(state.strategy).balanceOf();
+        state.strategyPaused = Pausable(state.strategy).paused();
+
+        state.tokenOut = address(distributor.tokenOut());
+        state.epoch = distributor.epoch();
+        state.lastEpoch = distributor.lastEpoch();
+        state.timePerEpoch = distributor.timePerEpoch();
+        state.isEpochFinished = distributor.isEpochFinished();
+        state.eligibleEpochRewards = distributor.eligibleEpochRewards();
+        state.targetBalance = distributor.targetBalance();
+        state.useTargetVault = distributor.useTargetVault();
+        state.emergencyExitVault = distributor.emergencyExitVault();
+        if (state.useTargetVault) {
+            state.targetPricePerShare = IVault(state.targetVault)
+                .pricePerShare();
+        }
+    }
+
+    /// @notice returns the state of _user in _vault
+    /// @param _vault RedirectVault address
+    /// @param _user user address
+    function getUser(address _vault, address _user)
+        public
+        view
+        returns (UserState memory state)
+    {
+        RedirectVault vault = RedirectVault(_vault);
+        IERC20 token = vault.token();
+
+        state.vault = _vault;
+        state.user = _user;
+        state.shares = vault.balanceOf(_user);
+        state.tokenBalance = token.balanceOf(_user);
+        state.tokenAllowance = token.allowance(_user, _vault);
+        state.cumulativeDeposits = vault.cumulativeDeposits(_user);
+        state.cumulativeWithdrawals = vault.cumulativeWithdrawals(_user);
+
+        address distributorAddress = address(vault.distributor());
+        if (distributorAddress == address(0)) {
+            return state;
+        }
+        RewardDistributor distributor = RewardDistributor(distributorAddress);
+        state.pendingRewards = distributor.getUserRewards(_user);
+        state.pendingRewardsTarget = distributor.getUserRewardsTarget(_user);
+        (state.amount, state.epochStart, state.depositTime) = distributor
+            .userInfo(_user);
+        state.totalClaimed = distributor.totalClaimed(_user);
+    }
+
+    /// @notice price of one whole _token in _quoteToken units, quoted through _router
+    /// @param _router univ2 router
+    /// @param _token token to price
+    /// @param _quoteToken token to quote the price in, eg USDC
+    /// @param _weth weth (wftm) used as the intermediate hop
+    function getTokenPrice(
+        address _router,
+        address _token,
+        address _quoteToken,
+        address _weth
+    ) public view returns (uint256) {
+        if (_token == _quoteToken) {
+            return 10**IERC20Extended(_quoteToken).decimals();
+        }
+        uint256 amountIn = 10**IERC20Extended(_token).decimals();
+        uint256[] memory amounts = IUniswapV2Router01(_router).getAmountsOut(
+            amountIn,
+            _getPath(_token, _quoteToken, _weth)
+        );
+        return amounts[amounts.length - 1];
+    }
+
+    /// @notice price of 1e18 of a univ2 LP token in _quoteToken units. Values both
+    /// sides of the reserves with getTokenPrice()
+    /// @param _router univ2 router
+    /// @param _pair univ2 LP token
+    /// @param _quoteToken token to quote the price in, eg USDC
+    /// @param _weth weth (wftm) used as the intermediate hop
+    function getLpPrice(
+        address _router,
+        address _pair,
+        address _quoteToken,
+        address _weth
+    ) external view returns (uint256) {
+        IUniswapV2Pair pair = IUniswapV2Pair(_pair);
+        uint256 totalSupply = pair.totalSupply();
+        if (totalSupply == 0) {
+            return 0;
+        }
+        address token0 = pair.token0();
+        address token1 = pair.token1();
+        (uint256 reserve0, uint256 reserve1, ) = pair.getReserves();
+
+        uint256 value0 = reserve0
+            .mul(getTokenPrice(_router, token0, _quoteToken, _weth))
+            .div(10**IERC20Extended(token0).decimals());
+        uint256 value1 = reserve1
+            .mul(getTokenPrice(_router, token1, _quoteToken, _weth))
+            .div(10**IERC20Extended(token1).decimals());
+        return value0.add(value1).mul(1e18).div(totalSupply);
+    }
+
+    /// @notice helper function to get the univ2 token path
+    function _getPath(
+        address _token_in,
+        address _token_out,
+        address _weth
+    ) internal pure returns (address[] memory _path) {
+        bool is_weth = _token_in == _weth || _token_out == _weth;
+        _path = new address[](is_weth ? 2 : 3);
+        _path[0] = _token_in;
+        if (is_weth) {
+            _path[1] = _token_out;
+        } else {
+            _path[1] = _weth;
+            _path[2] = _token_out;
+        }
+    }
+}
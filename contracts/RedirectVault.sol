@@ -4,12 +4,15 @@ pragma solidity 0.8.11;
 
 import "./interfaces/IStrategy.sol";
 import "./types/MultiRewards.sol";
+import "./types/VaultConfig.sol";
 import "./ERC20NoTransfer.sol";
 import "./Authorized.sol";
 import {IRewardDistributor, RewardDistributor} from "./RewardDistributor.sol";
+import {Clone} from "./ClonesWithImmutableArgs.sol";
 import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
 import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-IERC20Permit.sol";
 import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
 import "@openzeppelin/contracts/utils/Address.sol";
 import "@openzeppelin/contracts/utils/math/SafeMath.sol";
@@ -17,7 +20,7 @@ import "@openzeppelin/contracts/utils/math/SafeMath.sol";
 /// @notice Implementation of a vault to deposit funds for yield optimizing.
 /// This is the contract that receives funds and that users interface with.
 /// The yield optimizing strategy itself is implemented in a separate 'Strategy.sol' contract.
-contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
+contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard, Clone {
     using SafeERC20 for IERC20;
     using SafeMath for uint256;
 
@@ -29,6 +32,9 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
     /*///////////////////////////////////////////////////////////////
                             IMMUTABLES
     //////////////////////////////////////////////////////////////*/
+    // set by the constructor, RedirectFactory clones read them from their immutable
+    // args instead, packed as (targetToken, targetVault, approvalDelay). See the
+    // getters below.
 
     /// @notice Percentage scalar
     uint256 public constant PERCENT_DIVISOR = 10000;
@@ -36,19 +42,14 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
     /// @notice The token the vault accepts and looks to maximize.
     IERC20 public token;
 
-    /// @notice Timelock delay needed for a new strategy to be accepted (seconds)
-    uint256 public immutable approvalDelay;
+    uint256 private immutable _immutableApprovalDelay;
 
     /// @notice The reward distributor contract. All rewards are sent to this contract
     /// and users interact with it to harvest their rewards
     IRewardDistributor public distributor;
 
-    /// @notice Underlying target token, eg USDC. This is what the rewards will be converted to,
-    /// afterwhich the rewards may be deposited to a vault if one is configured
-    address public immutable targetToken;
-
-    /// @notice the target vault for pending rewards to be deposited into.
-    address public immutable targetVault;
+    address private immutable _immutableTargetToken;
+    address private immutable _immutableTargetVault;
 
     /*///////////////////////////////////////////////////////////////
                             STATE VARIABLES
@@ -57,15 +58,49 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
     /// @notice The last proposed strategy to switch to.
     StratCandidate public stratCandidate;
 
+    /// @notice The last proposed reward distributor to switch to.
+    StratCandidate public distributorCandidate;
+
     /// @notice The active strategy
     address public strategy;
 
     /// @notice TVL limit for the vault
     uint256 public tvlCap;
 
+    /// @notice Deposits are held in the vault until its idle balance exceeds this,
+    /// then the whole buffer is sent to the strategy. The buffer is also sent to the
+    /// strategy each harvest, and withdrawals are paid from it first. Zero sends
+    /// every deposit to the strategy.
+    uint256 public bufferHighWaterMark;
+
     /// @notice The stretegy's initialization status.
     bool public initialized = false;
 
+    /// @notice When enabled, the first deposit, withdraw or distributor harvest once the
+    /// epoch has been finished for lazyRolloverDelay rolls the epoch over, so the epoch
+    /// accounting doesn't wait on the keeper. The rewards are carried unsold until the
+    /// keepers next harvest. See checkpointEpoch()
+    bool public lazyRollover = false;
+
+    /// @notice Grace period for the keeper before user interactions process the epoch
+    uint256 public lazyRolloverDelay;
+
+    /// @notice When enabled vault shares can be transferred. The distributor settles
+    /// the sender and receiver rewards on each transfer, the strategy isn't touched.
+    bool public transfersEnabled = false;
+
+    /// @notice When enabled totalBalance() uses strategyBalance rather than asking the
+    /// strategy, which reads its farm. See setStrategyBalanceCached()
+    bool public strategyBalanceCached = false;
+
+    /// @notice The strategy's balance of {token} as last booked by the vault. Transfers to
+    /// and from the strategy are booked by the vault, the strategy reports changes it makes
+    /// itself (eg panic) with reportBalance(), and harvests reconcile it with the strategy.
+    uint256 public strategyBalance;
+
+    /// @notice Contracts allowed to deposit on behalf of users with depositFor(), eg RedirectZap
+    mapping(address => bool) public zaps;
+
     /// @notice simple mappings used to determine PnL denominated in LP tokens,
     /// as well as keep a generalized history of a user's protocol usage.
     mapping(address => uint256) public cumulativeDeposits;
@@ -76,8 +111,17 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
     //////////////////////////////////////////////////////////////*/
 
     event TvlCapUpdated(uint256 newTvlCap);
+    event BufferHighWaterMarkUpdated(uint256 newBufferHighWaterMark);
+    event LazyRolloverUpdated(bool enabled, uint256 delay);
+    event EpochCheckpointed(address indexed caller, bool success);
+    event TransfersEnabledUpdated(bool enabled);
+    event ZapUpdated(address zap, bool approved);
+    event StrategyBalanceCachedUpdated(bool enabled);
+    event StrategyBalanceDrift(uint256 cached, uint256 actual);
     event NewStratCandidate(address implementation);
     event UpgradeStrat(address implementation);
+    event NewDistributorCandidate(address implementation);
+    event UpgradeDistributor(address implementation);
     event DepositsIncremented(address user, uint256 amount, uint256 total);
     event WithdrawalsIncremented(address user, uint256 amount, uint256 total);
     event RewardsClaimed(address distributor, MultiRewards[] rewards);
@@ -102,11 +146,56 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         address _targetVault,
         uint256 _approvalDelay
     ) ERC20NoTransfer(string(_name), string(_symbol)) {
+        _immutableTargetToken = _targetToken;
+        _immutableTargetVault = _targetVault;
+        _immutableApprovalDelay = _approvalDelay;
+        _initializeVault(_token, _tvlCap);
+    }
+
+    /// @notice Initializes a clone deployed by RedirectFactory and connects it to its
+    /// strategy and distributor, which must already be initialized for this vault.
+    /// @param _config vault set configuration. The targets and approvalDelay are the
+    /// clones immutable args
+    /// @param _governance receives every role of the vault
+    /// @param _strategy the vault's initial strategy
+    /// @param _distributor the vault's reward distributor
+    function initializeVault(
+        VaultConfig calldata _config,
+        address _governance,
+        address _strategy,
+        address _distributor
+    ) external {
+        require(
+            address(token) == address(0),
+            "Contract is already initialized."
+        );
+        _initializeERC20(_config.name, _config.symbol);
+        _initializeAuthorized(_governance);
+        _initializeVault(_config.token, _config.tvlCap);
+        _connect(_strategy, _distributor);
+    }
+
+    /// @notice sets the values the constructor would
+    function _initializeVault(address _token, uint256 _tvlCap) internal {
         token = IERC20(_token);
         tvlCap = _tvlCap;
-        approvalDelay = _approvalDelay;
-        targetToken = _targetToken;
-        targetVault = _targetVault;
+        lazyRolloverDelay = 60 * 60; // 1 hour
+    }
+
+    /// @notice Underlying target token, eg USDC. This is what the rewards will be converted to,
+    /// afterwhich the rewards may be deposited to a vault if one is configured
+    function targetToken() public view returns (address) {
+        return _isClone() ? _getArgAddress(0) : _immutableTargetToken;
+    }
+
+    /// @notice the target vault for pending rewards to be deposited into.
+    function targetVault() public view returns (address) {
+        return _isClone() ? _getArgAddress(20) : _immutableTargetVault;
+    }
+
+    /// @notice Timelock delay needed for a new strategy to be accepted (seconds)
+    function approvalDelay() public view returns (uint256) {
+        return _isClone() ? _getArgUint256(40) : _immutableApprovalDelay;
     }
 
     /// @notice Connects the vault to its initial strategy. One use only.
@@ -116,20 +205,32 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         onlyGovernance
         returns (bool)
     {
+        _connect(_strategy, _distributor);
+        return true;
+    }
+
+    function _connect(address _strategy, address _distributor) internal {
         require(!initialized, "Contract is already initialized.");
         distributor = IRewardDistributor(_distributor);
         require(distributor.redirectVault() == address(this), "!vault");
         strategy = _strategy;
         initialized = true;
-        return true;
     }
 
     /// @notice It calculates the total underlying value of {token} held by the system.
     /// It takes into account the vault contract balance, the strategy contract balance
     ///  and the balance deployed in other contracts as part of the strategy.
     function totalBalance() public view returns (uint256) {
-        return
-            token.balanceOf(address(this)).add(IStrategy(strategy).balanceOf());
+        return token.balanceOf(address(this)).add(balanceOfStrategy());
+    }
+
+    /// @notice The balance of {token} managed by the strategy, strategyBalance if
+    /// strategyBalanceCached
+    function balanceOfStrategy() public view returns (uint256) {
+        if (strategyBalanceCached) {
+            return strategyBalance;
+        }
+        return IStrategy(strategy).balanceOf();
     }
 
     /// @notice Returns the version string
@@ -173,10 +274,56 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
     /// @notice the _before and _after variables are used to account properly for
     /// 'burn-on-transaction' tokens.
     function deposit(uint256 _amount) public nonReentrant {
+        _deposit(msg.sender, _amount);
+    }
+
+    /// @notice deposit() using an EIP-2612 permit signed by the sender in place of approve()
+    /// @dev the permit is public once submitted, so anyone can use it first. A failing
+    /// permit is ignored if the allowance already covers _amount.
+    /// @param _amount amount of {token} to deposit, this must be the permitted value
+    /// @param _deadline permit deadline
+    function depositWithPermit(
+        uint256 _amount,
+        uint256 _deadline,
+        uint8 _v,
+        bytes32 _r,
+        bytes32 _s
+    ) external {
+        try
+            IERC20Permit(address(token)).permit(
+                msg.sender,
+                address(this),
+                _amount,
+                _deadline,
+                _v,
+                _r,
+                _s
+            )
+        {} catch {
+            require(
+                token.allowance(msg.sender, address(this)) >= _amount,
+                "permit failed"
+            );
+        }
+        deposit(_amount);
+    }
+
+    /// @notice Deposits {token} from the caller and mints the shares to _user. Only
+    /// approved zaps can call this as a deposit resets the users claim in the current epoch.
+    /// @param _user the user receiving the shares
+    /// @param _amount amount of {token} to deposit
+    function depositFor(address _user, uint256 _amount) external nonReentrant {
+        require(zaps[msg.sender], "!zap");
+        _deposit(_user, _amount);
+    }
+
+    /// @notice pulls _amount from msg.sender and mints shares to _user
+    function _deposit(address _user, uint256 _amount) internal {
         require(_amount != 0, "please provide amount");
+        _checkpointEpoch();
         uint256 _pool = totalBalance();
         require(_pool.add(_amount) <= tvlCap, "vault is full!");
-        uint256 _sharesBefore = balanceOf(msg.sender);
+        uint256 _sharesBefore = balanceOf(_user);
 
         uint256 _before = token.balanceOf(address(this));
         token.safeTransferFrom(msg.sender, address(this), _amount);
@@ -188,9 +335,11 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         } else {
             shares = (_amount.mul(totalSupply())).div(_pool);
         }
-        _mint(msg.sender, shares);
-        distributor.onDeposit(msg.sender, _sharesBefore);
-        earn();
+        _mint(_user, shares);
+        distributor.onDeposit(_user, _sharesBefore);
+        if (available() > bufferHighWaterMark) {
+            earn();
+        }
         incrementDeposits(_amount);
     }
 
@@ -201,6 +350,9 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         uint256 _bal = available();
         token.safeTransfer(strategy, _bal);
         IStrategy(strategy).deposit();
+        if (strategyBalanceCached) {
+            strategyBalance = strategyBalance.add(_bal);
+        }
     }
 
     /// @notice A helper function to call withdraw() with all the sender's funds.
@@ -213,6 +365,7 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
     /// tokens are burned in the process.
     function withdraw(uint256 _shares) public nonReentrant {
         require(_shares > 0, "please provide amount");
+        _checkpointEpoch();
         uint256 r = (totalBalance().mul(_shares)).div(totalSupply());
         _burn(msg.sender, _shares);
 
@@ -222,6 +375,7 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
             IStrategy(strategy).withdraw(_withdraw);
             uint256 _after = token.balanceOf(address(this));
             uint256 _diff = _after.sub(b);
+            _bookStrategyWithdrawal(_diff, _withdraw);
             if (_diff < _withdraw) {
                 r = b.add(_diff);
             }
@@ -246,6 +400,7 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
             IStrategy(strategy).withdraw(_withdraw);
             uint256 _after = token.balanceOf(address(this));
             uint256 _diff = _after.sub(b);
+            _bookStrategyWithdrawal(_diff, _withdraw);
             if (_diff < _withdraw) {
                 r = b.add(_diff);
             }
@@ -255,6 +410,77 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         incrementWithdrawals(r);
     }
 
+    /// @notice Share transfers revert unless transfersEnabled. The distributor pays out
+    /// both users pending rewards and updates their accounting, the underlying
+    /// stays in the strategy.
+    function _transfer(
+        address from,
+        address to,
+        uint256 amount
+    ) internal override nonReentrant {
+        require(transfersEnabled, "Transfer Not Supported");
+        uint256 toBefore = balanceOf(to);
+        ERC20._transfer(from, to, amount);
+        if (from != to) {
+            distributor.onTransfer(from, to, amount, toBefore);
+        }
+    }
+
+    /// @notice books _amount returned by the strategy for a withdrawal of _requested against
+    /// strategyBalance. A strategy that returns less than requested, or more than the cache
+    /// holds, means the cache is off, so it is reset from the strategy instead.
+    function _bookStrategyWithdrawal(uint256 _amount, uint256 _requested)
+        internal
+    {
+        if (!strategyBalanceCached) {
+            return;
+        }
+        if (_amount < _requested || _amount > strategyBalance) {
+            _setStrategyBalance(IStrategy(strategy).balanceOf());
+        } else {
+            strategyBalance = strategyBalance - _amount;
+        }
+    }
+
+    /// @notice sets strategyBalance to _balance and emits StrategyBalanceDrift if the
+    /// cached balance was off
+    function _setStrategyBalance(uint256 _balance) internal {
+        if (strategyBalance != _balance) {
+            emit StrategyBalanceDrift(strategyBalance, _balance);
+            strategyBalance = _balance;
+        }
+    }
+
+    /// @notice Resets strategyBalance to the strategy's balanceOf(). Anyone can call
+    /// this, harvests also do it each epoch.
+    /// @return drift true if the cached balance was off
+    function reconcileStrategyBalance() external returns (bool drift) {
+        require(strategyBalanceCached, "!cached");
+        uint256 actual = IStrategy(strategy).balanceOf();
+        drift = actual != strategyBalance;
+        _setStrategyBalance(actual);
+    }
+
+    /// @notice Called by the strategy when its balance changes without the vault moving
+    /// funds, eg panic(). Reports from anyone but the active strategy are ignored rather
+    /// than reverted, so a retired strategy can still panic.
+    /// @param _balance the strategy's balanceOf()
+    function reportBalance(uint256 _balance) external {
+        if (msg.sender == strategy && strategyBalanceCached) {
+            _setStrategyBalance(_balance);
+        }
+    }
+
+    /// @notice set strategyBalanceCached. Enabling it seeds strategyBalance from the strategy
+    /// @param _enabled The new strategyBalanceCached setting
+    function setStrategyBalanceCached(bool _enabled) external onlyAuthorized {
+        if (_enabled && !strategyBalanceCached) {
+            strategyBalance = IStrategy(strategy).balanceOf();
+        }
+        strategyBalanceCached = _enabled;
+        emit StrategyBalanceCachedUpdated(_enabled);
+    }
+
     /// @notice pass in max value of uint to effectively remove TVL cap
     function updateTvlCap(uint256 _newTvlCap) public onlyAuthorized {
         tvlCap = _newTvlCap;
@@ -266,19 +492,116 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         updateTvlCap(type(uint256).max);
     }
 
+    /// @notice set bufferHighWaterMark
+    /// @param _bufferHighWaterMark The new bufferHighWaterMark setting, in {token}
+    function setBufferHighWaterMark(uint256 _bufferHighWaterMark)
+        external
+        onlyAuthorized
+    {
+        bufferHighWaterMark = _bufferHighWaterMark;
+        emit BufferHighWaterMarkUpdated(_bufferHighWaterMark);
+    }
+
     /// @notice Returns true if an epoch is complete harvest can be called
     function harvestTrigger() public view returns (bool) {
         return distributor.isEpochFinished();
     }
 
+    /// @notice set lazyRollover and lazyRolloverDelay
+    /// @param _enabled The new lazyRollover setting
+    /// @param _delay The new lazyRolloverDelay setting in seconds
+    function setLazyRollover(bool _enabled, uint256 _delay)
+        external
+        onlyAuthorized
+    {
+        lazyRollover = _enabled;
+        lazyRolloverDelay = _delay;
+        emit LazyRolloverUpdated(_enabled, _delay);
+    }
+
+    /// @notice set transfersEnabled
+    /// @param _enabled The new transfersEnabled setting
+    function setTransfersEnabled(bool _enabled) external onlyGovernance {
+        transfersEnabled = _enabled;
+        emit TransfersEnabledUpdated(_enabled);
+    }
+
+    /// @notice approve or revoke a zap, see depositFor()
+    /// @param _zap zap contract
+    /// @param _approved true to allow _zap to call depositFor()
+    function setZap(address _zap, bool _approved) external onlyGovernance {
+        zaps[_zap] = _approved;
+        emit ZapUpdated(_zap, _approved);
+    }
+
+    /// @notice Returns true if the epoch is overdue and will be rolled over by the
+    /// next user interaction
+    function checkpointTrigger() public view returns (bool) {
+        return
+            lazyRollover &&
+            initialized &&
+            block.timestamp >=
+            uint256(distributor.lastEpoch())
+                .add(distributor.timePerEpoch())
+                .add(lazyRolloverDelay) &&
+            distributor.carryEpochs() < distributor.maxCarryEpochs();
+    }
+
+    /// @notice Rolls the epoch over if it is overdue, see lazyRollover. Anyone can call this.
+    /// @return true if the epoch was rolled over
+    function checkpointEpoch() external nonReentrant returns (bool) {
+        return _checkpointEpoch();
+    }
+
+    /// @notice rolls the epoch over if it is overdue. Nothing is swapped, so the
+    /// caller can't be sandwiched and only pays for the strategy claim.
+    function _checkpointEpoch() internal returns (bool success) {
+        if (!checkpointTrigger()) {
+            return false;
+        }
+        // a failing strategy must not block deposits and withdrawals
+        try this.rollOverdueEpoch() {
+            success = true;
+        } catch {}
+        emit EpochCheckpointed(msg.sender, success);
+    }
+
+    /// @notice Epoch roll over for _checkpointEpoch(), only callable by the vault itself.
+    /// The rewards are carried by the distributor until the keepers next harvest()
+    function rollOverdueEpoch() external {
+        require(msg.sender == address(this), "!vault");
+        require(distributor.isEpochFinished(), "Epoch not finished");
+        distributor.rollEpoch(_claim());
+    }
+
     /// @notice Harvests rewards and send them to the reward distributor
     function harvest() public onlyKeeper {
+        _harvest();
+    }
+
+    /// @notice Harvests rewards and send them to the reward distributor
+    function _harvest() internal {
         /// @dev Must wait for the epoch to complete before harvesting
         require(distributor.isEpochFinished(), "Epoch not finished");
 
-        MultiRewards[] memory rewards = IStrategy(strategy).claim(
-            address(distributor)
-        );
+        // send profit to reward distributor
+        distributor.processEpoch(_claim());
+
+        // picks up farm fees and other changes the strategy hasn't reported
+        if (strategyBalanceCached) {
+            _setStrategyBalance(IStrategy(strategy).balanceOf());
+        }
+
+        // put the deposit buffer to work
+        if (available() > 0) {
+            earn();
+        }
+    }
+
+    /// @notice claims the strategy rewards to the reward distributor
+    /// @return rewards the rewards claimed
+    function _claim() internal returns (MultiRewards[] memory rewards) {
+        rewards = IStrategy(strategy).claim(address(distributor));
 
         // Test the strategy is being honest
         for (uint256 i = 0; i < rewards.length; i++) {
@@ -288,9 +611,6 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
             require(rewardBalance >= rewards[i].amount, "Dishonest Strategy");
         }
         emit RewardsClaimed(address(distributor), rewards);
-
-        // send profit to reward distributor
-        distributor.processEpoch(rewards);
     }
 
     /// @notice function to increase user's cumulative deposits
@@ -341,7 +661,7 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
             "There is no candidate"
         );
         require(
-            stratCandidate.proposedTime.add(approvalDelay) < block.timestamp,
+            stratCandidate.proposedTime.add(approvalDelay()) < block.timestamp,
             "Delay has not passed"
         );
 
@@ -354,7 +674,54 @@ contract RedirectVault is ERC20NoTransfer, Authorized, ReentrancyGuard {
         strategy = stratCandidate.implementation;
         stratCandidate.implementation = address(0);
         stratCandidate.proposedTime = 5000000000;
+        if (strategyBalanceCached) {
+            strategyBalance = IStrategy(strategy).balanceOf();
+        }
 
         earn();
     }
+
+    /// @notice Sets the candidate for a new reward distributor, eg to migrate to a new
+    /// storage layout. The candidate must be configured for this vault.
+    /// @param _implementation The address of the candidate distributor.
+    function proposeDistributor(address _implementation)
+        external
+        onlyGovernance
+    {
+        require(
+            IRewardDistributor(_implementation).redirectVault() ==
+                address(this),
+            "!vault"
+        );
+        distributorCandidate = StratCandidate({
+            implementation: _implementation,
+            proposedTime: block.timestamp
+        });
+        emit NewDistributorCandidate(_implementation);
+    }
+
+    /// @notice Switches to the distributor candidate once the timelock has passed. The
+    /// candidate copies the accounting state of the current distributor in onMigrate().
+    /// @dev Sweep the current distributors tokenOut balance to the candidate before
+    /// calling this, see RewardDistributor.onMigrate()
+    function upgradeDistributor() external onlyGovernance {
+        require(
+            distributorCandidate.implementation != address(0),
+            "There is no candidate"
+        );
+        require(
+            distributorCandidate.proposedTime.add(approvalDelay()) <
+                block.timestamp,
+            "Delay has not passed"
+        );
+
+        emit UpgradeDistributor(distributorCandidate.implementation);
+
+        address legacy = address(distributor);
+        distributor = IRewardDistributor(distributorCandidate.implementation);
+        distributor.onMigrate(legacy);
+
+        distributorCandidate.implementation = address(0);
+        distributorCandidate.proposedTime = 5000000000;
+    }
 }
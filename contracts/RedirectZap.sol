@@ -0,0 +1,253 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.8.11;
+pragma experimental ABIEncoderV2;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/utils/math/SafeMath.sol";
+import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
+
+import "./Authorized.sol";
+import "./interfaces/IRedirectVault.sol";
+import "./interfaces/ISolidlyRouter01.sol";
+import "./interfaces/uniswap.sol";
+
+/// @title Zaps the tokens of a RedirectVault's LP into the vault in one transaction
+/// @author Robovault
+/// @notice Users call zap() with both tokens of the vaults LP, or zapSingle() with
+/// either one of them, in which case half is swapped for the other. Liquidity is
+/// added through the router configured for the vault and the LP is deposited for
+/// the user, so the distributor records the deposit against the user.
+/// @dev Each vault must approve this contract with RedirectVault.setZap(). Only
+/// univ2 and solidly pairs are supported. The zap holds no funds between transactions.
+contract RedirectZap is Authorized, ReentrancyGuard {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    /// @notice router used to add liquidity for a vaults LP
+    struct ZapRoute {
+        address router;
+        bool solidly; // router is an ISolidlyRouter01, otherwise IUniswapV2Router01
+        bool stable; // solidly pair type
+    }
+
+    /// @notice Router configuration for each vault. Vaults without one can't be zapped
+    mapping(address => ZapRoute) public zapRoute;
+
+    /*///////////////////////////////////////////////////////////////
+                                EVENTS
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice Emitted when a vaults router is set
+    event ZapRouteSet(
+        address indexed vault,
+        address router,
+        bool solidly,
+        bool stable
+    );
+
+    /// @notice Emitted for each zap
+    event Zapped(
+        address indexed vault,
+        address indexed user,
+        uint256 liquidity
+    );
+
+    /// @notice sets the router used to zap into _vault and approves the vault. Routers
+    /// are approved when they're first used, see _approve()
+    /// @param _vault RedirectVault
+    /// @param _router router for the vaults LP, the zero address disables zaps into _vault
+    /// @param _solidly true if _router is a solidly router
+    /// @param _stable solidly pair type, ignored for univ2 routers
+    function setZapRoute(
+        address _vault,
+        address _router,
+        bool _solidly,
+        bool _stable
+    ) external onlyAuthorized {
+        address pair = IRedirectVault(_vault).token();
+        if (zapRoute[_vault].router != address(0)) {
+            IERC20(pair).safeApprove(_vault, 0);
+        }
+        zapRoute[_vault] = ZapRoute(_router, _solidly, _stable);
+        if (_router != address(0)) {
+            IERC20(pair).safeApprove(_vault, type(uint256).max);
+        }
+        emit ZapRouteSet(_vault, _router, _solidly, _stable);
+    }
+
+    /// @notice adds liquidity with both tokens of the vaults LP and deposits it for the caller.
+    /// Tokens that aren't used to add liquidity are returned.
+    /// @param _vault RedirectVault to deposit to
+    /// @param _amount0 amount of the LP token0
+    /// @param _amount1 amount of the LP token1
+    /// @param _minLiquidity reverts if less LP is deposited
+    /// @return liquidity amount of LP deposited
+    function zap(
+        address _vault,
+        uint256 _amount0,
+        uint256 _amount1,
+        uint256 _minLiquidity
+    ) external nonReentrant returns (uint256 liquidity) {
+        (, address token0, address token1) = _pairOf(_vault);
+        IERC20(token0).safeTransferFrom(msg.sender, address(this), _amount0);
+        IERC20(token1).safeTransferFrom(msg.sender, address(this), _amount1);
+        liquidity = _addLiquidityAndDeposit(
+            _vault,
+            token0,
+            token1,
+            _minLiquidity
+        );
+    }
+
+    /// @notice swaps half of _amountIn for the other token of the vaults LP, adds
+    /// liquidity and deposits it for the caller. Tokens that aren't used are returned.
+    /// @param _vault RedirectVault to deposit to
+    /// @param _tokenIn token0 or token1 of the vaults LP
+    /// @param _amountIn amount of _tokenIn
+    /// @param _minLiquidity reverts if less LP is deposited. This also bounds the swap slippage
+    /// @return liquidity amount of LP deposited
+    function zapSingle(
+        address _vault,
+        address _tokenIn,
+        uint256 _amountIn,
+        uint256 _minLiquidity
+    ) external nonReentrant returns (uint256 liquidity) {
+        (, address token0, address token1) = _pairOf(_vault);
+        require(_tokenIn == token0 || _tokenIn == token1, "!tokenIn");
+        IERC20(_tokenIn).safeTransferFrom(msg.sender, address(this), _amountIn);
+        _swap(
+            zapRoute[_vault],
+            _tokenIn,
+            _tokenIn == token0 ? token1 : token0,
+            _amountIn.div(2)
+        );
+        liquidity = _addLiquidityAndDeposit(
+            _vault,
+            token0,
+            token1,
+            _minLiquidity
+        );
+    }
+
+    /// @notice adds liquidity with the zaps balance of token0 and token1, deposits the
+    /// LP for msg.sender and returns what is left over
+    function _addLiquidityAndDeposit(
+        address _vault,
+        address _token0,
+        address _token1,
+        uint256 _minLiquidity
+    ) internal returns (uint256 liquidity) {
+        ZapRoute memory route = zapRoute[_vault];
+        require(route.router != address(0), "!route");
+        uint256 amount0 = IERC20(_token0).balanceOf(address(this));
+        uint256 amount1 = IERC20(_token1).balanceOf(address(this));
+        _approve(_token0, route.router, amount0);
+        _approve(_token1, route.router, amount1);
+
+        if (route.solidly) {
+            (, , liquidity) = ISolidlyRouter01(route.router).addLiquidity(
+                _token0,
+                _token1,
+                route.stable,
+                amount0,
+                amount1,
+                0,
+                0,
+                address(this),
+                block.timestamp
+            );
+        } else {
+            (, , liquidity) = IUniswapV2Router01(route.router).addLiquidity(
+                _token0,
+                _token1,
+                amount0,
+                amount1,
+                0,
+                0,
+                address(this),
+                block.timestamp
+            );
+        }
+        require(liquidity >= _minLiquidity, "!minLiquidity");
+
+        IRedirectVault(_vault).depositFor(msg.sender, liquidity);
+        emit Zapped(_vault, msg.sender, liquidity);
+
+        _refund(_token0);
+        _refund(_token1);
+    }
+
+    /// @notice swaps _amount of _from for _to through the vaults router
+    function _swap(
+        ZapRoute memory _route,
+        address _from,
+        address _to,
+        uint256 _amount
+    ) internal {
+        require(_route.router != address(0), "!route");
+        _approve(_from, _route.router, _amount);
+        if (_route.solidly) {
+            ISolidlyRouter01(_route.router).swapExactTokensForTokensSimple(
+                _amount,
+                0,
+                _from,
+                _to,
+                _route.stable,
+                address(this),
+                block.timestamp
+            );
+        } else {
+            address[] memory path = new address[](2);
+            path[0] = _from;
+            path[1] = _to;
+            IUniswapV2Router01(_route.router).swapExactTokensForTokens(
+                _amount,
+                0,
+                path,
+                address(this),
+                block.timestamp
+            );
+        }
+    }
+
+    /// @notice approves _router for _token if its allowance doesn't cover _amount.
+    /// Allowances are kept per token and router, so vaults whose LPs share a token
+    /// and router share the approval. The zap holds no funds between transactions,
+    /// so approvals are left in place when a route is changed.
+    function _approve(
+        address _token,
+        address _router,
+        uint256 _amount
+    ) internal {
+        uint256 allowance = IERC20(_token).allowance(address(this), _router);
+        if (allowance < _amount) {
+            if (allowance > 0) {
+                IERC20(_token).safeApprove(_router, 0);
+            }
+            IERC20(_token).safeApprove(_router, type(uint256).max);
+        }
+    }
+
+    /// @notice returns the zaps balance of _token to msg.sender
+    function _refund(address _token) internal {
+        uint256 balance = IERC20(_token).balanceOf(address(this));
+        if (balance > 0) {
+            IERC20(_token).safeTransfer(msg.sender, balance);
+        }
+    }
+
+    /// @notice returns the vaults LP and its tokens
+    function _pairOf(address _vault)
+        internal
+        view
+        returns (
+            address pair,
+            address token0,
+            address token1
+        )
+    {
+        pair = IRedirectVault(_vault).token();
+        token0 = IUniswapV2Pair(pair).token0();
+        token1 = IUniswapV2Pair(pair).token1();
+    }
+}
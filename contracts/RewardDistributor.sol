@@ -8,6 +8,7 @@ import "@openzeppelin/contracts/utils/math/Math.sol";
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/utils/Address.sol";
 import "@openzeppelin/contracts/utils/math/SafeMath.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
 import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
 
 import "./interfaces/ISolidlyRouter01.sol";
@@ -15,22 +16,56 @@ import "./interfaces/uniswap.sol";
 import "./interfaces/IRedirectVault.sol";
 import {IVault} from "./interfaces/IVault.sol";
 import {MultiRewards} from "./types/MultiRewards.sol";
+import {Clone} from "./ClonesWithImmutableArgs.sol";
 
+/// @dev packed into a single storage slot
 struct UserInfo {
-    uint256 amount; // How many tokens the user has provided.
-    uint256 epochStart; // at what Epoch will rewards start
-    uint256 depositTime; // when did the user deposit
+    uint128 amount; // How many tokens the user has provided.
+    uint64 epochStart; // at what Epoch will rewards start
+    uint64 depositTime; // when did the user deposit
+}
+
+/// @dev shares a user received by transfer while eligible. They only earn from the
+/// epoch after they were received, the rest of the users balance keeps earning.
+struct IneligibleBalance {
+    uint128 amount; // shares received during epoch
+    uint64 epoch; // the epoch they were received in, matches UserInfo.epochStart
+}
+
+/// @dev rewards and balance are read together for every epoch a user is owed, so
+/// they share a slot. rewardPerShare is the cumulative index at the start of the epoch
+struct EpochInfo {
+    uint128 rewards; // rewards of tokenOut for the epoch
+    uint128 balance; // total balance eligible for rewards in the epoch
+    uint256 rewardPerShare; // cumulative rewards per share, see cumulativeRewardPerShare()
 }
 
 interface IRewardDistributor {
     function isEpochFinished() external view returns (bool);
 
+    function lastEpoch() external view returns (uint64);
+
+    function timePerEpoch() external view returns (uint256);
+
     function processEpoch(MultiRewards[] calldata _rewards) external;
 
+    function rollEpoch(MultiRewards[] calldata _rewards) external;
+
+    function carryEpochs() external view returns (uint256);
+
+    function maxCarryEpochs() external view returns (uint256);
+
     function onDeposit(address _user, uint256 _beforeBalance) external;
 
     function onWithdraw(address _user, uint256 _amount) external;
 
+    function onTransfer(
+        address _from,
+        address _to,
+        uint256 _amount,
+        uint256 _toBeforeBalance
+    ) external;
+
     function onEmergencyWithdraw(address _user, uint256 _amount) external;
 
     function permitRewardToken(address _token) external;
@@ -38,6 +73,59 @@ interface IRewardDistributor {
     function unpermitRewardToken(address _token) external;
 
     function redirectVault() external view returns (address);
+
+    function harvestFor(address _user) external returns (uint256);
+
+    function onMigrate(address _legacy) external;
+}
+
+/// @notice Getters of a previous RewardDistributor that are read when migrating
+interface ILegacyDistributor {
+    function redirectVault() external view returns (address);
+
+    function epoch() external view returns (uint256);
+
+    function lastEpoch() external view returns (uint256);
+
+    function eligibleEpochRewards() external view returns (uint256);
+
+    function epochRewards(uint256 _epoch) external view returns (uint256);
+
+    function epochBalance(uint256 _epoch) external view returns (uint256);
+
+    function userInfo(address _user)
+        external
+        view
+        returns (
+            uint256,
+            uint256,
+            uint256
+        );
+
+    function totalClaimed(address _user) external view returns (uint256);
+
+    function emergencyExitVault() external view returns (bool);
+
+    function emergencyExitEpoch() external view returns (uint256);
+
+    function emergencyTargetOut() external view returns (uint256);
+
+    function emergencyVaultBalance() external view returns (uint256);
+
+    function emergencyExitRound() external view returns (uint256);
+
+    function carryEpochs() external view returns (uint256);
+
+    function carryRound() external view returns (uint256);
+
+    function carryRoundRate(uint256 _round) external view returns (uint256);
+
+    function userCarry(address _user) external view returns (uint256, uint256);
+
+    function ineligibleBalance(address _user)
+        external
+        view
+        returns (uint256, uint256);
 }
 
 /// @title Manages reward distribution for a RedirectVault
@@ -47,32 +135,29 @@ interface IRewardDistributor {
 /// @dev Design to isolate the reward distribution from the vault and
 /// strategy so as to minimise impact if there are issues with the
 /// RewardDistributor
-contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
+contract RewardDistributor is ReentrancyGuard, IRewardDistributor, Clone {
     using SafeERC20 for IERC20;
     using Address for address;
     using SafeMath for uint256;
+    using SafeCast for uint256;
 
     /*///////////////////////////////////////////////////////////////
                                 IMMUTABLES
     //////////////////////////////////////////////////////////////*/
-    /// @notice Underlying target token, eg USDC. This is what the rewards will be converted to,
-    /// afterwhich the rewards may be deposited to a vault if one is configured
-    IERC20 public immutable targetToken;
+    // set by the constructor, RedirectFactory clones read them from their immutable
+    // args instead, packed as (redirectVault, router, targetToken, targetVault).
+    // See the getters below.
 
-    /// @notice the target vault for pending rewards to be deposited into.
-    IVault public immutable targetVault;
+    IERC20 private immutable _immutableTargetToken;
+    IVault private immutable _immutableTargetVault;
+    address private immutable _immutableRedirectVault;
+    address private immutable _immutableRouter;
 
     /// @notice if a vault is configured this is set to targetVault, otherwise this will be targetToken. This
     /// is the token users will withdraw when harvesting. If there is an issue with the vault, authorized roles
     /// can call emergencyDisableVault() which will change tokenOut to targetToken.
     IERC20 public tokenOut;
 
-    /// @notice contract address for the parent redurect vault.
-    address public immutable redirectVault;
-
-    /// @notice univ2 router used for swaps
-    address public immutable router;
-
     /// @notice solidly router used for swapping only OXD when it is a reward token
     ISolidlyRouter01 public constant solidlyRouter =
         ISolidlyRouter01(0xa38cd27185a464914D3046f0AB9d43356B34829D);
@@ -92,26 +177,56 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     uint256 public eligibleEpochRewards;
 
     /// @notice Tracks the epoch number. This is incremented each time processEpoch is called
-    uint256 public epoch = 0;
+    uint64 public epoch = 0;
 
     /// @notice timestamp of the previous epoch
-    uint256 public lastEpoch;
+    uint64 public lastEpoch;
+
+    /// @notice number of epochs folded into cumulativeRewardPerShare. The index can
+    /// only be enabled once this has caught up with epoch. It then lags epoch by
+    /// the epochs of an open carry window.
+    uint64 public accumulatorEpoch;
+
+    /// @notice when enabled getUserRewards() reads the cumulative index rather than
+    /// iterating over every epoch since the users last claim.
+    bool public useAccumulator = false;
 
     /// @notice BIPS Scalar
     uint256 constant BPS_ADJ = 10000;
 
-    /// @notice mapping user info to user addresses
-    mapping(address => UserInfo) public userInfo;
+    /// @notice mapping user info to user addresses, see userInfo()
+    mapping(address => UserInfo) internal _userInfo;
 
-    /// @notice tracks rewards of traget token for given Epoch
-    mapping(uint256 => uint256) public epochRewards;
+    /// @notice shares received by transfer that aren't eligible for rewards yet,
+    /// see ineligibleBalance()
+    mapping(address => IneligibleBalance) internal _ineligibleBalance;
 
-    /// @notice tracks the total balance eligible for rewards for given epoch
-    mapping(uint256 => uint256) public epochBalance;
+    /// @notice tracks the rewards, eligible balance and cumulative index for
+    /// given epoch, see epochRewards(), epochBalance() and cumulativeRewardPerShare()
+    mapping(uint256 => EpochInfo) internal _epochInfo;
 
     /// @notice tracks total tokens claimed by user
     mapping(address => uint256) public totalClaimed;
 
+    /*///////////////////////////////////////////////////////////////
+                        REWARD ACCUMULATOR
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice Scalar for cumulativeRewardPerShare
+    uint256 constant ACC_PRECISION = 1e36;
+
+    /// @notice cumulative rewards per eligible share at the start of a given epoch,
+    /// scaled by ACC_PRECISION. The rewards owed for epochs [a, b) are
+    /// amount * (cumulativeRewardPerShare(b) - cumulativeRewardPerShare(a))
+    /// @param _epoch epoch number
+    function cumulativeRewardPerShare(uint256 _epoch)
+        public
+        view
+        returns (uint256)
+    {
+        return _epochInfo[_epoch].rewardPerShare;
+    }
+
     /*///////////////////////////////////////////////////////////////
                                 EVENTS
     //////////////////////////////////////////////////////////////*/
@@ -130,6 +245,29 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         uint256 indexed eligibleEpochRewards
     );
 
+    /// @notice Emitted when a user receives shares that earn from the next epoch
+    event IneligibleBalanceUpdated(
+        address indexed user,
+        uint256 amount,
+        uint256 epoch
+    );
+
+    /// @notice User accounting checkpoint, emitted whenever userInfo is updated.
+    /// With EpochProcessed this allows the reward accounting to be rebuilt from logs
+    event UserCheckpoint(
+        address indexed user,
+        uint256 amount,
+        uint256 epochStart,
+        uint256 eligibleEpochRewards
+    );
+
+    /// @notice Emitted when the target vault is disabled by emergencyDisableVault()
+    event VaultEmergencyDisabled(
+        uint256 indexed epoch,
+        uint256 vaultBalance,
+        uint256 targetOut
+    );
+
     /*///////////////////////////////////////////////////////////////
                                 CONSTRUCTOR
     //////////////////////////////////////////////////////////////*/
@@ -144,38 +282,103 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         address _router,
         address _feeAddress
     ) {
-        router = _router;
-        redirectVault = _redirectVault;
+        address _targetToken = IRedirectVault(_redirectVault).targetToken();
+        address _targetVault = IRedirectVault(_redirectVault).targetVault();
+        _immutableRedirectVault = _redirectVault;
+        _immutableRouter = _router;
+        _immutableTargetToken = IERC20(_targetToken);
+        _immutableTargetVault = IVault(_targetVault);
+        _initializeDistributor(
+            _router,
+            _feeAddress,
+            _targetToken,
+            _targetVault
+        );
+    }
+
+    /// @notice Initializes a clone deployed by RedirectFactory. The vault, router and
+    /// targets are the clones immutable args.
+    /// @param _feeAddress address for which fees are sent
+    /// @param _rewardTokens reward tokens to permit, see permitRewardToken()
+    function initializeDistributor(
+        address _feeAddress,
+        address[] calldata _rewardTokens
+    ) external {
+        require(
+            address(tokenOut) == address(0),
+            "Contract is already initialized."
+        );
+        _initializeDistributor(
+            router(),
+            _feeAddress,
+            address(targetToken()),
+            address(targetVault())
+        );
+        for (uint256 i = 0; i < _rewardTokens.length; i++) {
+            IERC20(_rewardTokens[i]).safeApprove(router(), type(uint256).max);
+        }
+    }
 
-        targetToken = IERC20(IRedirectVault(redirectVault).targetToken());
-        targetVault = IVault(IRedirectVault(redirectVault).targetVault());
+    /// @notice sets the values the constructor would and validates them
+    /// @dev immutables can't be read while constructing, so they're passed in
+    function _initializeDistributor(
+        address _router,
+        address _feeAddress,
+        address _targetToken,
+        address _targetVault
+    ) internal {
         feeAddress = _feeAddress;
+        timePerEpoch = 60 * 60 * 3; // 3 Hours
+        profitConversionPercent = 10000; // 100% default
+        profitFee = 500; // 5% default
+        maxCarryEpochs = 56; // 7 days of 3 hour epochs
         require(
-            address(targetToken) == IVault(targetVault).token(),
+            _targetToken == IVault(_targetVault).token(),
             "Vault.token() miss-match"
         );
 
         IERC20(oxd).approve(address(solidlyRouter), type(uint256).max);
-        IERC20(weth).approve(address(router), type(uint256).max);
+        IERC20(weth).approve(_router, type(uint256).max);
 
-        if (address(targetVault) == address(0)) {
+        if (_targetVault == address(0)) {
             useTargetVault = false;
-            tokenOut = targetToken;
+            tokenOut = IERC20(_targetToken);
         } else {
             useTargetVault = true;
             // Approve allowance for the vault
-            tokenOut = IERC20(address(targetVault));
-            targetToken.safeApprove(address(targetVault), type(uint256).max);
+            tokenOut = IERC20(_targetVault);
+            IERC20(_targetToken).safeApprove(_targetVault, type(uint256).max);
         }
     }
 
+    /// @notice Underlying target token, eg USDC. This is what the rewards will be converted to,
+    /// afterwhich the rewards may be deposited to a vault if one is configured
+    function targetToken() public view returns (IERC20) {
+        return _isClone() ? IERC20(_getArgAddress(40)) : _immutableTargetToken;
+    }
+
+    /// @notice the target vault for pending rewards to be deposited into.
+    function targetVault() public view returns (IVault) {
+        return _isClone() ? IVault(_getArgAddress(60)) : _immutableTargetVault;
+    }
+
+    /// @notice contract address for the parent redurect vault.
+    function redirectVault() public view returns (address) {
+        return _isClone() ? _getArgAddress(0) : _immutableRedirectVault;
+    }
+
+    /// @notice univ2 router used for swaps
+    function router() public view returns (address) {
+        return _isClone() ? _getArgAddress(20) : _immutableRouter;
+    }
+
     /*///////////////////////////////////////////////////////////////
                         USE TARGET VAULT CONFIGURATION
     //////////////////////////////////////////////////////////////*/
 
     /// @notice flags if a vault is configured and that it's not in
     /// emergency exit.
-    bool public useTargetVault = true;
+    bool public useTargetVault;
 
     /// @notice flags a vault is in emergency exit and will no longer be used.
     bool public emergencyExitVault = false;
@@ -193,6 +396,11 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     function emergencyDisableVault() external onlyAuthorized {
         require(useTargetVault);
 
+        // Carried rewards are sold into the vault first so they're accounted
+        // for in the exit like every other epoch before it
+        _flushCarry();
+        emergencyExitRound = carryRound;
+
         // Disable use of the vault
         useTargetVault = false;
         emergencyExitVault = true;
@@ -200,19 +408,25 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         // Flag the epoch and current vault balance so rewards for epochs
         // prior to the emergency exit are calculated properly
         emergencyExitEpoch = epoch;
-        emergencyVaultBalance = targetVault.balanceOf(address(this));
+        emergencyVaultBalance = targetVault().balanceOf(address(this));
 
         // Update token out to the underlying.
-        tokenOut = targetToken;
+        tokenOut = targetToken();
 
         // Withdraw from the vault and capture the withdraw amount
-        uint256 targetBalanceBefore = targetToken.balanceOf(address(this));
-        targetVault.withdraw();
-        uint256 targetBalanceAfter = targetToken.balanceOf(address(this));
+        uint256 targetBalanceBefore = targetToken().balanceOf(address(this));
+        targetVault().withdraw();
+        uint256 targetBalanceAfter = targetToken().balanceOf(address(this));
         emergencyTargetOut = targetBalanceAfter.sub(targetBalanceBefore);
 
         // Revoke vault approvals
-        targetToken.safeApprove(address(targetVault), 0);
+        targetToken().safeApprove(address(targetVault()), 0);
+
+        emit VaultEmergencyDisabled(
+            emergencyExitEpoch,
+            emergencyVaultBalance,
+            emergencyTargetOut
+        );
     }
 
     /*///////////////////////////////////////////////////////////////
@@ -228,6 +442,491 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         feeAddress = _feeAddress;
     }
 
+    /*///////////////////////////////////////////////////////////////
+                        CLAIM ROUTER CONFIGURATION
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice router permitted to claim rewards on behalf of users with harvestFor().
+    /// Lets users claim from many distributors in one transaction.
+    address public claimRouter;
+
+    /// @notice set claimRouter
+    /// @param _claimRouter The new claimRouter setting. Set to zero to disable
+    function setClaimRouter(address _claimRouter) external onlyAuthorized {
+        claimRouter = _claimRouter;
+    }
+
+    /*///////////////////////////////////////////////////////////////
+                        SWAP ROUTE CONFIGURATION
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice how a reward token is sold into targetToken
+    struct SwapRoute {
+        address router; // univ2 router, or solidlyRouter
+        address hop; // token sold into before targetToken, zero to sell directly
+        bool stable; // solidly pool type, ignored by univ2 routers
+    }
+
+    /// @notice per token swap routes set with setTokenRoute(), see getSwapRoute()
+    mapping(address => SwapRoute) public tokenRoute;
+
+    /// @notice Token Route Set Event
+    event TokenRouteSet(
+        address indexed token,
+        address indexed router,
+        address hop,
+        bool stable
+    );
+
+    /// @notice sets the router and hop _token is sold through. Rewards that share a
+    /// hop are swapped into it first and then sold to targetToken in a single swap
+    /// on the hops own route, so the hop must have a pool with targetToken.
+    /// @param _token the reward token
+    /// @param _router router used to sell _token, zero to restore the default route
+    /// @param _hop token to sell into before targetToken, zero to sell directly
+    /// @param _stable solidly pool type, only used when _router is solidlyRouter
+    function setTokenRoute(
+        address _token,
+        address _router,
+        address _hop,
+        bool _stable
+    ) external onlyAuthorized {
+        require(_token != address(targetToken()), "!token");
+        require(_hop != _token, "!hop");
+        tokenRoute[_token] = SwapRoute(_router, _hop, _stable);
+        if (_router != address(0)) {
+            IERC20(_token).safeApprove(_router, 0);
+            IERC20(_token).safeApprove(_router, type(uint256).max);
+        }
+        emit TokenRouteSet(_token, _router, _hop, _stable);
+    }
+
+    /// @notice returns the route _token is sold through. Without a configured
+    /// route tokens are sold on router through weth, and oxd on solidlyRouter
+    /// @param _token the reward token
+    function getSwapRoute(address _token)
+        public
+        view
+        returns (SwapRoute memory _route)
+    {
+        _route = tokenRoute[_token];
+        if (_route.router == address(0)) {
+            if (_token == oxd) {
+                _route = SwapRoute(address(solidlyRouter), weth, true);
+            } else if (_token == weth || address(targetToken()) == weth) {
+                _route = SwapRoute(router(), address(0), false);
+            } else {
+                _route = SwapRoute(router(), weth, false);
+            }
+        }
+        if (_route.hop == address(targetToken())) {
+            _route.hop = address(0);
+        }
+    }
+
+    /*///////////////////////////////////////////////////////////////
+                            REWARD CARRY
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice a users quote weighted share of carried rewards for epochs they
+    /// are no longer tracked from, see _updateUserCarry()
+    struct UserCarry {
+        uint128 quote; // share of the carry windows quote
+        uint128 round; // carryRound the quote is paid from
+    }
+
+    /// @notice Scalar for the carry quote index and carryRoundRate
+    uint256 constant CARRY_PRECISION = 1e36;
+    uint256 constant maxCarryEpochsLimit = 240;
+
+    /// @notice maximum number of epochs rewards are carried for before they are
+    /// sold regardless of their value. Bounds the gas of the settling epoch.
+    uint256 public maxCarryEpochs;
+
+    /// @notice number of processed epochs whose rewards are held unsold. The carry
+    /// window is [epoch - carryEpochs, epoch)
+    uint256 public carryEpochs;
+
+    /// @notice sum of the quoted value of the carried rewards, in targetToken
+    uint256 public carryQuote;
+
+    /// @notice number of carry windows that have been settled
+    uint256 public carryRound;
+
+    /// @notice carryRound when the target vault was disabled. Carries settled
+    /// before it are scaled like the epochs before emergencyExitEpoch
+    uint256 public emergencyExitRound;
+
+    /// @notice tokenOut paid per unit of quote for each settled carry window,
+    /// scaled by CARRY_PRECISION. Rounds before legacyCarryRounds are kept by the
+    /// legacy distributor.
+    mapping(uint256 => uint256) public carryRoundRate;
+
+    /// @notice quoted value of the rewards of each carried epoch, in targetToken
+    mapping(uint256 => uint256) public epochQuote;
+
+    /// @notice reward tokens held for the carry window
+    address[] public carryTokens;
+
+    /// @notice cumulative quote per eligible share, scaled by CARRY_PRECISION.
+    /// Only differences between epochs of the same carry window are meaningful
+    mapping(uint256 => uint256) internal _quotePerShare;
+
+    /// @notice carried rewards owed to users, see getUserRewards() and userCarry()
+    mapping(address => UserCarry) internal _userCarry;
+
+    /// @notice Epoch Rewards Carried Event
+    event RewardsCarried(
+        uint256 indexed epoch,
+        uint256 quote,
+        uint256 carryQuote
+    );
+
+    /// @notice Emitted for each epoch of a carry window when it settles
+    event EpochRewardsSettled(uint256 indexed epoch, uint256 rewards);
+
+    /// @notice Carry Window Settled Event
+    event CarrySettled(uint256 indexed round, uint256 amountOut, uint256 rate);
+
+    /// @notice Emitted when a users share of the carry window is recorded
+    event UserCarryUpdated(address indexed user, uint256 quote, uint256 round);
+
+    /// @notice set maxCarryEpochs
+    /// @param _maxCarryEpochs The new maxCarryEpochs setting
+    function setMaxCarryEpochs(uint256 _maxCarryEpochs)
+        external
+        onlyAuthorized
+    {
+        require(
+            _maxCarryEpochs > 0 && _maxCarryEpochs <= maxCarryEpochsLimit
+        );
+        maxCarryEpochs = _maxCarryEpochs;
+    }
+
+    /// @notice sells the carried rewards and settles the carry window now. Should
+    /// be called before changing swap routes or migrating the distributor.
+    function settleRewards() external onlyAuthorized {
+        _flushCarry();
+    }
+
+    /// @notice returns a users share of the carry window and the carryRound it is
+    /// paid from
+    /// @param _user user address
+    function userCarry(address _user)
+        public
+        view
+        returns (uint256 quote, uint256 round)
+    {
+        UserCarry memory carry = _loadUserCarry(_user);
+        return (carry.quote, carry.round);
+    }
+
+    /// @notice returns the users carried rewards that have been settled, in tokenOut
+    /// @param _user user address
+    function _getCarryRewards(address _user) internal view returns (uint256) {
+        UserCarry memory carry = _loadUserCarry(_user);
+        if (carry.quote == 0 || carry.round >= carryRound) {
+            return 0;
+        }
+        uint256 rewards = uint256(carry.quote)
+            .mul(_carryRoundRate(carry.round))
+            .div(CARRY_PRECISION);
+        if (emergencyExitVault && carry.round < emergencyExitRound) {
+            rewards = rewards.mul(emergencyTargetOut).div(
+                emergencyVaultBalance
+            );
+        }
+        return rewards;
+    }
+
+    /// @notice Adds the epoch being processed to the carry window.
+    /// @dev epochs without an eligible balance get no weight, their rewards are
+    /// shared by the rest of the window
+    /// @param _rewards the rewards claimed this epoch
+    /// @return true if the rewards are carried, false if the window must settle now
+    function _carryRewards(MultiRewards[] calldata _rewards)
+        internal
+        returns (bool)
+    {
+        (bool quoted, uint256 quote) = _quoteRewards(_rewards);
+        if (!quoted) {
+            // weight by the window average, the window settles this epoch
+            quote = carryEpochs > 0 ? carryQuote.div(carryEpochs) : 0;
+        }
+        uint256 eligible = eligibleEpochRewards;
+        uint256 quotePerShare = 0;
+        if (eligible == 0) {
+            quote = 0;
+        } else {
+            // a minimum weight so a window always has some quote to split by
+            quote = Math.max(quote, 1);
+            quotePerShare = quote.mul(CARRY_PRECISION).div(eligible);
+        }
+
+        epochQuote[epoch] = quote;
+        _quotePerShare[epoch + 1] = _quotePerShare[epoch].add(quotePerShare);
+        carryQuote = carryQuote.add(quote);
+        carryEpochs = carryEpochs.add(1);
+
+        for (uint256 i = 0; i < _rewards.length; i++) {
+            address token = _rewards[i].token;
+            if (
+                _rewards[i].amount > 0 &&
+                _indexOf(carryTokens, token, carryTokens.length) ==
+                carryTokens.length
+            ) {
+                carryTokens.push(token);
+            }
+        }
+
+        emit RewardsCarried(epoch, quote, carryQuote);
+        return
+            quoted &&
+            carryQuote < minProfitThreshold &&
+            carryEpochs < maxCarryEpochs;
+    }
+
+    /// @notice values _rewards in targetToken using router quotes
+    /// @return quoted false if any of the rewards couldn't be quoted
+    /// @return value total value of the rewards
+    function _quoteRewards(MultiRewards[] calldata _rewards)
+        internal
+        view
+        returns (bool quoted, uint256 value)
+    {
+        for (uint256 i = 0; i < _rewards.length; i++) {
+            address token = _rewards[i].token;
+            uint256 amount = _rewards[i].amount;
+            if (amount == 0) {
+                continue;
+            }
+            if (token == address(targetToken())) {
+                value = value.add(amount);
+                continue;
+            }
+            SwapRoute memory route = getSwapRoute(token);
+            // solidly legs are quoted on the univ2 router
+            address quoteRouter = route.router == address(solidlyRouter)
+                ? router()
+                : route.router;
+            address[] memory path = route.hop == address(0)
+                ? _pair(token, address(targetToken()))
+                : _getTokenOutPath(token, address(targetToken()), route.hop);
+            try
+                IUniswapV2Router01(quoteRouter).getAmountsOut(amount, path)
+            returns (uint256[] memory amounts) {
+                value = value.add(amounts[amounts.length - 1]);
+            } catch {
+                return (false, 0);
+            }
+        }
+        return (true, value);
+    }
+
+    /// @notice sells the carried rewards and settles the carry window, if any
+    function _flushCarry() internal {
+        if (carryEpochs == 0) {
+            return;
+        }
+        uint256 preSwapBalance = targetBalance();
+        _sellRewards(carryTokens);
+        _deposit();
+        _settleCarry(targetBalance().sub(preSwapBalance));
+    }
+
+    /// @notice splits _amountOut between the epochs of the carry window by their
+    /// quote, and sets the rate users that left during the window are paid at
+    /// @param _amountOut tokenOut received for the carried rewards
+    function _settleCarry(uint256 _amountOut) internal {
+        uint256 rate = _amountOut.mul(CARRY_PRECISION).div(carryQuote);
+        for (uint256 i = uint256(epoch).sub(carryEpochs); i < epoch; i++) {
+            uint256 rewards = _amountOut.mul(epochQuote[i]).div(carryQuote);
+            _epochInfo[i].rewards = rewards.toUint128();
+            if (accumulatorEpoch == i) {
+                _accumulate(i);
+            }
+            emit EpochRewardsSettled(i, rewards);
+        }
+
+        carryRoundRate[carryRound] = rate;
+        emit CarrySettled(carryRound, _amountOut, rate);
+        carryRound = carryRound.add(1);
+        carryEpochs = 0;
+        carryQuote = 0;
+        delete carryTokens;
+    }
+
+    /// @notice records the users share of the carry window before their accounting
+    /// record moves past it. Settled carries are cleared, they've been disbursed
+    /// by the caller.
+    /// @param _user user address
+    function _updateUserCarry(address _user) internal {
+        UserCarry memory carry = _loadUserCarry(_user);
+        if (carry.quote == 0 && carryEpochs == 0) {
+            return;
+        }
+
+        uint256 quote = carry.round < carryRound ? 0 : carry.quote;
+        if (carryEpochs > 0) {
+            UserInfo memory user = _loadUserInfo(_user);
+            uint256 from = Math.max(
+                user.epochStart,
+                uint256(epoch).sub(carryEpochs)
+            );
+            if (user.epochStart > 0 && from < epoch) {
+                uint256 ineligible = from == user.epochStart
+                    ? _getIneligibleAmount(_user, user)
+                    : 0;
+                quote = quote.add(
+                    uint256(user.amount)
+                        .sub(ineligible)
+                        .mul(_quotePerShare[epoch].sub(_quotePerShare[from]))
+                        .div(CARRY_PRECISION)
+                );
+                if (ineligible > 0) {
+                    quote = quote.add(
+                        ineligible
+                            .mul(
+                                _quotePerShare[epoch].sub(
+                                    _quotePerShare[from + 1]
+                                )
+                            )
+                            .div(CARRY_PRECISION)
+                    );
+                }
+            }
+        }
+
+        if (quote != carry.quote || (quote > 0 && carry.round != carryRound)) {
+            _userCarry[_user] = UserCarry(
+                quote.toUint128(),
+                carryRound.toUint128()
+            );
+            emit UserCarryUpdated(_user, quote, carryRound);
+        }
+    }
+
+    /*///////////////////////////////////////////////////////////////
+                            MIGRATION
+    //////////////////////////////////////////////////////////////*/
+
+    /// @notice the distributor this contract replaced. Users that haven't interacted
+    /// since the migration are read from it, see _loadUserInfo()
+    address public legacyDistributor;
+
+    /// @notice number of legacy epochs copied into this distributor
+    uint256 public migratedEpochs;
+
+    /// @notice number of carry windows settled by the legacy distributor. Their rates
+    /// are read from it, see _carryRoundRate()
+    uint256 public legacyCarryRounds;
+
+    /// @notice set once the vault has switched to this distributor
+    bool public migrated = false;
+
+    /// @notice Distributor Migrated Event
+    event Migrated(address indexed legacy, uint256 indexed epoch);
+
+    /// @notice Copies up to _maxEpochs of completed epoch history from the vaults
+    /// current distributor. Completed epochs never change, so this can be spread
+    /// over many transactions ahead of RedirectVault.upgradeDistributor()
+    /// @param _legacy the vaults current distributor
+    /// @param _maxEpochs maximum number of epochs to copy in this call
+    function migrateEpochs(address _legacy, uint256 _maxEpochs)
+        external
+        onlyGovernance
+    {
+        require(!migrated, "already migrated");
+        _setLegacyDistributor(_legacy);
+        _copyEpochs(_maxEpochs);
+    }
+
+    /// @notice Called by the vault when it switches to this distributor. Copies any
+    /// remaining epoch history and the live accounting state from _legacy.
+    /// @dev The legacy distributors tokenOut balance must be swept to this contract
+    /// with emergencySweep() before the vault switches, so rewards can't be claimed
+    /// from both. Its carried rewards must be settled with settleRewards() first, as
+    /// the reward tokens stay with it. User records, including their settled carry,
+    /// are migrated lazily on their first interaction.
+    /// @param _legacy the distributor being replaced
+    function onMigrate(address _legacy) external onlyVault {
+        require(!migrated, "already migrated");
+        _setLegacyDistributor(_legacy);
+        require(_legacyCarryEpochs() == 0, "carry not settled");
+        _copyEpochs(type(uint256).max);
+
+        ILegacyDistributor legacy = ILegacyDistributor(_legacy);
+        require(migratedEpochs == legacy.epoch(), "epochs not migrated");
+        epoch = legacy.epoch().toUint64();
+        lastEpoch = legacy.lastEpoch().toUint64();
+        eligibleEpochRewards = legacy.eligibleEpochRewards();
+
+        // carry rounds continue from the legacy's, so the carries it settled stay payable
+        try legacy.carryRound() returns (uint256 _carryRound) {
+            legacyCarryRounds = _carryRound;
+            carryRound = _carryRound;
+            if (legacy.emergencyExitVault()) {
+                emergencyExitRound = legacy.emergencyExitRound();
+            }
+        } catch {}
+
+        if (legacy.emergencyExitVault() && useTargetVault) {
+            useTargetVault = false;
+            emergencyExitVault = true;
+            emergencyExitEpoch = legacy.emergencyExitEpoch();
+            emergencyVaultBalance = legacy.emergencyVaultBalance();
+            emergencyTargetOut = legacy.emergencyTargetOut();
+            tokenOut = targetToken();
+            targetToken().safeApprove(address(targetVault()), 0);
+        }
+
+        migrated = true;
+        emit Migrated(_legacy, epoch);
+    }
+
+    /// @notice sets the legacy distributor on first use and checks it thereafter
+    /// @param _legacy the vaults previous distributor
+    function _setLegacyDistributor(address _legacy) internal {
+        if (legacyDistributor == address(0)) {
+            require(
+                ILegacyDistributor(_legacy).redirectVault() == redirectVault(),
+                "!vault"
+            );
+            legacyDistributor = _legacy;
+        }
+        require(_legacy == legacyDistributor, "!legacy");
+    }
+
+    /// @notice returns the legacy distributors carry window, zero for distributors
+    /// from before reward carry
+    function _legacyCarryEpochs() internal view returns (uint256) {
+        try ILegacyDistributor(legacyDistributor).carryEpochs() returns (
+            uint256 _carryEpochs
+        ) {
+            return _carryEpochs;
+        } catch {
+            return 0;
+        }
+    }
+
+    /// @notice copies up to _maxEpochs of completed epochs from legacyDistributor.
+    /// The rewards of epochs in the legacy's carry window aren't known until it
+    /// settles, so they aren't copied.
+    /// @param _maxEpochs maximum number of epochs to copy
+    function _copyEpochs(uint256 _maxEpochs) internal {
+        ILegacyDistributor legacy = ILegacyDistributor(legacyDistributor);
+        uint256 end = Math.min(
+            legacy.epoch().sub(_legacyCarryEpochs()),
+            migratedEpochs.add(Math.min(_maxEpochs, type(uint128).max))
+        );
+        for (uint256 i = migratedEpochs; i < end; i++) {
+            EpochInfo storage info = _epochInfo[i];
+            info.rewards = legacy.epochRewards(i).toUint128();
+            info.balance = legacy.epochBalance(i).toUint128();
+        }
+        migratedEpochs = end;
+    }
+
     /*///////////////////////////////////////////////////////////////
                         SET EPOCH TIME CONFIGURATION
     //////////////////////////////////////////////////////////////*/
@@ -235,7 +934,7 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// @notice timePerEpoch sets the minimum time that must elapsed betweem
     /// harvests. During harvests the rewards tokens are swapped into the
     /// targetToken and user reward balances are updated.
-    uint256 public timePerEpoch = 60 * 60 * 3; // 3 Hours
+    uint256 public timePerEpoch;
     uint256 constant timePerEpochLimit = 259200;
 
     /// @notice set timePerEpoch
@@ -246,9 +945,9 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     }
 
     // amount of profit converted each Epoch (don't convert everything to smooth returns)
-    uint256 public profitConversionPercent = 10000; // 100% default
+    uint256 public profitConversionPercent;
     uint256 public minProfitThreshold; // minimum amount of profit in order to conver to target token
-    uint256 public profitFee = 500; // 5% default
+    uint256 public profitFee;
     uint256 constant profitFeeMax = 2000; // 20% max
 
     function setParamaters(
@@ -264,15 +963,41 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         profitFee = _profitFee;
     }
 
+    /// @notice enables or disables the reward accumulator
+    /// @dev the accumulator must be in sync with the epoch history to be enabled,
+    /// see syncAccumulator()
+    /// @param _useAccumulator The new useAccumulator setting
+    function setAccumulatorMode(bool _useAccumulator) external onlyAuthorized {
+        if (_useAccumulator) {
+            require(accumulatorEpoch == epoch, "accumulator not synced");
+        }
+        useAccumulator = _useAccumulator;
+    }
+
+    /// @notice Migration path for the accumulator. Folds up to _maxEpochs of the
+    /// existing epochRewards/epochBalance history into cumulativeRewardPerShare.
+    /// @dev can be called repeatedly to spread the migration over multiple transactions
+    /// @param _maxEpochs maximum number of epochs to process in this call
+    function syncAccumulator(uint256 _maxEpochs) external onlyAuthorized {
+        // epochs in the carry window are folded in when it settles
+        uint256 end = Math.min(
+            uint256(epoch).sub(carryEpochs),
+            uint256(accumulatorEpoch).add(_maxEpochs)
+        );
+        for (uint256 i = accumulatorEpoch; i < end; i++) {
+            _accumulate(i);
+        }
+    }
+
     /// @notice Returns true if the epoch is complete and un processsed.
     /// @dev epoch is processed by processEpoch()
     function isEpochFinished() public view returns (bool) {
-        return ((block.timestamp >= lastEpoch.add(timePerEpoch)));
+        return ((block.timestamp >= uint256(lastEpoch).add(timePerEpoch)));
     }
 
     /// @notice Throws if called by any account other than the vault.
     modifier onlyVault() {
-        require(redirectVault == msg.sender, "!redirectVault");
+        require(redirectVault() == msg.sender, "!redirectVault");
         _;
     }
 
@@ -280,7 +1005,7 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// of the redirect vault
     modifier onlyAuthorized() {
         require(
-            IRedirectVault(redirectVault).isAuthorized(msg.sender),
+            IRedirectVault(redirectVault()).isAuthorized(msg.sender),
             "!authorized"
         );
         _;
@@ -290,7 +1015,7 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// of the redirect vault
     modifier onlyGovernance() {
         require(
-            IRedirectVault(redirectVault).governance() == msg.sender,
+            IRedirectVault(redirectVault()).governance() == msg.sender,
             "!governance"
         );
         _;
@@ -303,12 +1028,41 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// that need to be converted to tokenOut
     function processEpoch(MultiRewards[] calldata _rewards) external onlyVault {
         uint256 preSwapBalance = targetBalance();
-
-        // only convert profits if there is sufficient profit & users are eligible to start receiving rewards this epoch
-        if (eligibleEpochRewards > 0) {
+        bool settle = false;
+
+        if (
+            carryEpochs > 0 ||
+            (minProfitThreshold > 0 && eligibleEpochRewards > 0)
+        ) {
+            // rewards are held until their quoted value reaches minProfitThreshold,
+            // then sold and split between the epochs that earned them
+            settle = !_carryRewards(_rewards);
+            if (settle) {
+                _sellRewards(carryTokens);
+                _deposit();
+            }
+        } else if (eligibleEpochRewards > 0) {
+            // only convert profits if there is sufficient profit & users are eligible to start receiving rewards this epoch
             _redirectProfits(_rewards);
             _deposit();
         }
+        uint256 amountOut = _updateRewardData(preSwapBalance);
+        _incrementEpoch();
+        if (settle) {
+            _settleCarry(amountOut);
+        }
+    }
+
+    /// @notice Only called by the vault when a user interaction processes an overdue
+    /// epoch, see RedirectVault.checkpointEpoch(). Nothing is sold, the rewards are
+    /// added to the carry window and the keepers next processEpoch() sells them.
+    /// @param _rewards and array of the rewards that have been sent to this contract
+    function rollEpoch(MultiRewards[] calldata _rewards) external onlyVault {
+        require(carryEpochs < maxCarryEpochs, "carry window full");
+        uint256 preSwapBalance = targetBalance();
+        if (carryEpochs > 0 || eligibleEpochRewards > 0) {
+            _carryRewards(_rewards);
+        }
         _updateRewardData(preSwapBalance);
         _incrementEpoch();
     }
@@ -322,49 +1076,118 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// @notice swaps the rewards tokens to the targetToken
     /// @param _rewards and array of the rewards
     function _redirectProfits(MultiRewards[] calldata _rewards) internal {
+        address[] memory tokens = new address[](_rewards.length);
         for (uint256 i = 0; i < _rewards.length; i++) {
-            _sellRewards(_rewards[i].token);
+            tokens[i] = _rewards[i].token;
         }
+        _sellRewards(tokens);
     }
 
     /// @notice Manual call to sell rewards incase there are some that aren't captured
     /// @param _token token to sell
     function manualRedirect(address _token) external onlyAuthorized {
-        require(_token != address(targetToken));
-        _sellRewards(_token);
+        require(_token != address(targetToken()));
+        address[] memory tokens = new address[](1);
+        tokens[0] = _token;
+        _sellRewards(tokens);
     }
 
-    /// @notice swaps rewards depending on whether the token is oxd or not.
-    /// @param _token token to swaps
-    function _sellRewards(address _token) internal {
-        if (_token == oxd) {
-            _convert0xd();
-        } else {
-            _swapTokenToTargetUniV2(_token);
+    /// @notice sells _tokens into targetToken with one swap per hop. Each token is
+    /// swapped into the hop of its route, then the proceeds of every token sharing
+    /// that hop are sold together. A token that is the only one through its hop,
+    /// on the same univ2 router as the hop, is sold with a single multi-hop swap.
+    /// @param _tokens tokens to sell, duplicates and targetToken are ignored
+    function _sellRewards(address[] memory _tokens) internal {
+        SwapRoute[] memory routes = new SwapRoute[](_tokens.length);
+        uint256[] memory amounts = new uint256[](_tokens.length);
+        uint256[] memory groupOf = new uint256[](_tokens.length);
+        address[] memory groups = new address[](_tokens.length);
+        uint256[] memory groupSize = new uint256[](_tokens.length);
+        uint256[] memory groupAmount = new uint256[](_tokens.length);
+        uint256 numGroups = 0;
+
+        // fees are taken from every token before swapping so proceeds swapped into
+        // a hop aren't charged again when the hop is itself a reward token
+        for (uint256 i = 0; i < _tokens.length; i++) {
+            address token = _tokens[i];
+            if (
+                token == address(targetToken()) ||
+                _indexOf(_tokens, token, i) < i
+            ) {
+                continue;
+            }
+            amounts[i] = _takeFee(token);
+            if (amounts[i] == 0) {
+                continue;
+            }
+            routes[i] = getSwapRoute(token);
+            address key = routes[i].hop == address(0) ? token : routes[i].hop;
+            uint256 g = _indexOf(groups, key, numGroups);
+            if (g == numGroups) {
+                groups[numGroups++] = key;
+            }
+            groupOf[i] = g;
+            groupSize[g]++;
         }
-    }
 
-    /// @notice swaps any oxd in this contract into the targetToken
-    function _convert0xd() internal {
-        uint256 swapAmount = IERC20(oxd).balanceOf(address(this));
-        solidlyRouter.swapExactTokensForTokensSimple(
-            swapAmount,
-            uint256(0),
-            oxd,
-            weth,
-            true,
-            address(this),
-            block.timestamp
-        );
+        for (uint256 i = 0; i < _tokens.length; i++) {
+            if (amounts[i] > 0) {
+                uint256 g = groupOf[i];
+                groupAmount[g] = groupAmount[g].add(
+                    _sellToHop(
+                        _tokens[i],
+                        routes[i],
+                        amounts[i],
+                        groupSize[g] == 1
+                    )
+                );
+            }
+        }
 
-        if (address(targetToken) != weth) {
-            _swapTokenToTargetUniV2(weth);
+        for (uint256 g = 0; g < numGroups; g++) {
+            if (groupAmount[g] > 0) {
+                _swap(
+                    getSwapRoute(groups[g]),
+                    _pair(groups[g], address(targetToken())),
+                    groupAmount[g]
+                );
+            }
         }
     }
 
-    /// @notice swaps any _token in this contract into the targetToken
-    /// @param _token ERC20 token to be swapped into targetToken
-    function _swapTokenToTargetUniV2(address _token) internal {
+    /// @notice swaps _amount of _token into the hop of its route
+    /// @param _alone true if _token is the only reward sold through its hop
+    /// @return amount of the hop to be sold to targetToken. Tokens without a hop
+    /// return _amount, they're sold directly with the rest of their group.
+    function _sellToHop(
+        address _token,
+        SwapRoute memory _route,
+        uint256 _amount,
+        bool _alone
+    ) internal returns (uint256) {
+        if (_route.hop == address(0)) {
+            return _amount;
+        }
+        if (
+            _alone &&
+            _route.router != address(solidlyRouter) &&
+            _route.router == getSwapRoute(_route.hop).router
+        ) {
+            _swap(
+                _route,
+                _getTokenOutPath(_token, address(targetToken()), _route.hop),
+                _amount
+            );
+            return 0;
+        }
+        return _swap(_route, _pair(_token, _route.hop), _amount);
+    }
+
+    /// @notice sends the profitFee on the profitConversionPercent of _token held
+    /// by this contract to the feeAddress
+    /// @param _token reward token
+    /// @return amount of _token to swap after the fee
+    function _takeFee(address _token) internal returns (uint256) {
         IERC20 rewardToken = IERC20(_token);
         uint256 swapAmt = rewardToken
             .balanceOf(address(this))
@@ -372,15 +1195,64 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
             .div(BPS_ADJ);
         uint256 fee = swapAmt.mul(profitFee).div(BPS_ADJ);
         rewardToken.transfer(feeAddress, fee);
-        if (swapAmt > 0) {
-            IUniswapV2Router01(router).swapExactTokensForTokens(
-                swapAmt.sub(fee),
+        return swapAmt.sub(fee);
+    }
+
+    /// @notice swaps _amount along _path on the routes router
+    /// @return amount of the last token in _path received
+    function _swap(
+        SwapRoute memory _route,
+        address[] memory _path,
+        uint256 _amount
+    ) internal returns (uint256) {
+        IERC20 out = IERC20(_path[_path.length - 1]);
+        uint256 balanceBefore = out.balanceOf(address(this));
+        if (_route.router == address(solidlyRouter)) {
+            solidlyRouter.swapExactTokensForTokensSimple(
+                _amount,
+                uint256(0),
+                _path[0],
+                _path[1],
+                _route.stable,
+                address(this),
+                block.timestamp
+            );
+        } else {
+            IUniswapV2Router01(_route.router).swapExactTokensForTokens(
+                _amount,
                 0,
-                _getTokenOutPath(_token, address(targetToken), weth),
+                _path,
                 address(this),
                 block.timestamp
             );
         }
+        return out.balanceOf(address(this)).sub(balanceBefore);
+    }
+
+    /// @notice returns the index of _token in the first _length items of _list,
+    /// or _length if it isn't found
+    function _indexOf(
+        address[] memory _list,
+        address _token,
+        uint256 _length
+    ) internal pure returns (uint256) {
+        for (uint256 i = 0; i < _length; i++) {
+            if (_list[i] == _token) {
+                return i;
+            }
+        }
+        return _length;
+    }
+
+    /// @notice helper to build a single pair swap path
+    function _pair(address _token_in, address _token_out)
+        internal
+        pure
+        returns (address[] memory _path)
+    {
+        _path = new address[](2);
+        _path[0] = _token_in;
+        _path[1] = _token_out;
     }
 
     /// @notice This must be called by the Redirect Vault anytime a user deposits
@@ -391,21 +1263,10 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         external
         onlyVault
     {
-        uint256 rewards = getUserRewards(_user);
-
-        if (rewards > 0) {
-            // claims all rewards
-            _disburseRewards(_user, rewards);
-        }
-
         /// @dev a caviat of the account approach is that anytime a user deposits the are withdrawing
         /// their claim in the current epoch. This is necessary to ensure the rewards accounting is sound.
-        if (userInfo[_user].epochStart < epoch) {
-            _updateEligibleEpochRewards(_beforeBalance);
-        }
-
         // To prevent users leaching i.e. deposit just before epoch rewards distributed user will start to be eligible for rewards following epoch
-        _updateUserInfo(_user, epoch + 1);
+        _settleUser(_user, _beforeBalance, epoch + 1);
     }
 
     /// @notice This must be called by the Redirect Vault anytime a user withdraws
@@ -413,18 +1274,65 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// @param _user address of the user depositing
     /// @param _amount the amount the user withdrew
     function onWithdraw(address _user, uint256 _amount) external onlyVault {
-        uint256 rewards = getUserRewards(_user);
+        _settleUser(_user, _amount, epoch);
+    }
+
+    /// @notice This must be called by the Redirect Vault anytime shares are transferred
+    /// @dev Settles _from as a withdraw of _amount, in constant time. The underlying
+    /// stays in the strategy. _amount earns for _to from the following epoch. A _to
+    /// that is eligible this epoch keeps earning on the balance it already had, so a
+    /// transfer can't make it forfeit its claim. Otherwise _to is settled as a deposit.
+    /// @param _from address of the sender
+    /// @param _to address of the receiver
+    /// @param _amount the amount transferred
+    /// @param _toBeforeBalance the balance of _to before the transfer
+    function onTransfer(
+        address _from,
+        address _to,
+        uint256 _amount,
+        uint256 _toBeforeBalance
+    ) external onlyVault {
+        require(_from != _to, "!transfer");
+        _settleUser(_from, _amount, epoch);
+
+        UserInfo memory to = _loadUserInfo(_to);
+        if (to.epochStart == 0 || to.epochStart > epoch) {
+            _settleUser(_to, _toBeforeBalance, epoch + 1);
+            return;
+        }
+        // shares already received this epoch stay ineligible
+        uint256 ineligible = to.epochStart == epoch
+            ? _getIneligibleAmount(_to, to)
+            : 0;
+        _settleUser(_to, 0, epoch);
+        _setIneligibleBalance(_to, ineligible.add(_amount));
+    }
+
+    /// @notice disperses a users pending rewards and updates their accounting record
+    /// @param _user address of the user
+    /// @param _ineligible amount removed from eligibleEpochRewards if the user was eligible this epoch
+    /// @param _epochStart the epoch the user will be eligible for rewards from
+    function _settleUser(
+        address _user,
+        uint256 _ineligible,
+        uint256 _epochStart
+    ) internal {
+        UserInfo memory user = _loadUserInfo(_user);
+        uint256 rewards = _getUserRewards(
+            user,
+            _getIneligibleAmount(_user, user)
+        ).add(_getCarryRewards(_user));
 
         if (rewards > 0) {
             // claims all rewards
             _disburseRewards(_user, rewards);
         }
 
-        if (userInfo[_user].epochStart < epoch) {
-            _updateEligibleEpochRewards(_amount);
+        if (user.epochStart < epoch) {
+            _updateEligibleEpochRewards(_ineligible);
         }
 
-        _updateUserInfo(_user, epoch);
+        _updateUserInfo(_user, _epochStart);
     }
 
     function onEmergencyWithdraw(address _user, uint256 _amount)
@@ -437,6 +1345,8 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
 
     /// @notice users call this to claim their pending rewards. They will be redeemed in targetToken or targetVault
     function harvest() public nonReentrant {
+        // process the epoch first if the keeper is late, see RedirectVault.lazyRollover
+        IRedirectVault(redirectVault()).checkpointEpoch();
         address user = msg.sender;
         uint256 rewards = getUserRewards(user);
         require(rewards > 0, "user must have balance to claim");
@@ -446,16 +1356,42 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         emit UserHarvested(user, rewards, address(tokenOut));
     }
 
+    /// @notice Called by the claimRouter to claim _user's pending rewards. The rewards
+    /// are sent to the router in tokenOut, without withdrawing from the targetVault, so
+    /// the router can merge withdrawals across distributors sharing a targetVault.
+    /// @dev the router is trusted to forward the rewards to _user
+    /// @param _user the user claiming through the router
+    /// @return amount of tokenOut sent to the router. Returns 0 rather than reverting
+    /// when the user has no pending rewards so batch claims don't fail.
+    function harvestFor(address _user)
+        external
+        nonReentrant
+        returns (uint256)
+    {
+        require(msg.sender == claimRouter, "!claimRouter");
+        // as harvest(), roll the epoch over first if the keeper is late
+        IRedirectVault(redirectVault()).checkpointEpoch();
+        uint256 rewards = getUserRewards(_user);
+        if (rewards == 0) {
+            return 0;
+        }
+        tokenOut.transfer(msg.sender, rewards);
+        _updateAmountClaimed(_user, rewards);
+        _updateUserInfo(_user, epoch);
+        emit UserHarvested(_user, rewards, address(tokenOut));
+        return rewards;
+    }
+
     /// @notice transfers the _rewards to the _user and updates their reward balance
     /// @param _rewards amount of the tokenOut needs to be sent to the user
     /// @param _user the user calling harvest()
     function _disburseRewards(address _user, uint256 _rewards) internal {
         if (useTargetVault) {
-            uint256 balBefore = targetToken.balanceOf(address(this));
-            IVault(address(targetVault)).withdraw(_rewards);
-            uint256 balAfer = targetToken.balanceOf(address(this));
+            uint256 balBefore = targetToken().balanceOf(address(this));
+            IVault(address(targetVault())).withdraw(_rewards);
+            uint256 balAfer = targetToken().balanceOf(address(this));
             uint256 amountOut = balAfer.sub(balBefore);
-            targetToken.transfer(_user, amountOut);
+            targetToken().transfer(_user, amountOut);
         } else {
             tokenOut.transfer(_user, _rewards);
         }
@@ -466,24 +1402,117 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// @notice returns the sum of a users pending rewards in the tokenOut units
     /// @param _user the user calling harvest()
     function getUserRewards(address _user) public view returns (uint256) {
-        UserInfo memory user = userInfo[_user];
-        uint256 rewardStart = user.epochStart;
+        UserInfo memory user = _loadUserInfo(_user);
+        return
+            _getUserRewards(user, _getIneligibleAmount(_user, user)).add(
+                _getCarryRewards(_user)
+            );
+    }
+
+    /// @notice returns a users accounting record
+    /// @dev kept with uint256 return values for compatibility with the unpacked layout
+    /// @param _user user address
+    function userInfo(address _user)
+        public
+        view
+        returns (
+            uint256 amount,
+            uint256 epochStart,
+            uint256 depositTime
+        )
+    {
+        UserInfo memory user = _loadUserInfo(_user);
+        return (user.amount, user.epochStart, user.depositTime);
+    }
+
+    /// @notice returns shares a user received by transfer and the epoch they were
+    /// received in. They earn from the following epoch.
+    /// @param _user user address
+    function ineligibleBalance(address _user)
+        public
+        view
+        returns (uint256 amount, uint256 epochReceived)
+    {
+        IneligibleBalance memory ineligible = _loadIneligibleBalance(_user);
+        return (ineligible.amount, ineligible.epoch);
+    }
+
+    /// @notice returns the rewards of tokenOut for given epoch
+    /// @param _epoch epoch number
+    function epochRewards(uint256 _epoch) public view returns (uint256) {
+        return _epochInfo[_epoch].rewards;
+    }
+
+    /// @notice returns the total balance eligible for rewards for given epoch
+    /// @param _epoch epoch number
+    function epochBalance(uint256 _epoch) public view returns (uint256) {
+        return _epochInfo[_epoch].balance;
+    }
+
+    /// @notice returns the sum of a users pending rewards in the tokenOut units
+    /// @param _info the users accounting record
+    /// @param _ineligible part of _info.amount that earns from the epoch after
+    /// _info.epochStart, see _getIneligibleAmount()
+    function _getUserRewards(UserInfo memory _info, uint256 _ineligible)
+        internal
+        view
+        returns (uint256)
+    {
+        uint256 rewardStart = _info.epochStart;
         if (rewardStart == 0) {
             return 0;
         }
 
+        uint256 rewards = _calcUserRewards(
+            rewardStart,
+            uint256(_info.amount).sub(_ineligible)
+        );
+        if (_ineligible > 0) {
+            rewards = rewards.add(
+                _calcUserRewards(rewardStart + 1, _ineligible)
+            );
+        }
+        return rewards;
+    }
+
+    /// @notice calculates the rewards of _amt from _epochStart to the current epoch
+    /// @dev with useAccumulator the index covers the epochs up to accumulatorEpoch.
+    /// Only the epochs of an open carry window, which are folded into the index
+    /// when it settles, are iterated, so at most maxCarryEpochs.
+    /// @param _epochStart epoch the rewards start from
+    /// @param _amt vault.token() balance earning the rewards
+    function _calcUserRewards(uint256 _epochStart, uint256 _amt)
+        internal
+        view
+        returns (uint256)
+    {
+        if (_amt == 0) {
+            return 0;
+        }
+
         uint256 rewards = 0;
+        uint256 from = _epochStart;
+        if (useAccumulator) {
+            uint256 synced = Math.min(epoch, accumulatorEpoch);
+            if (synced > _epochStart) {
+                rewards = _calcUserAccumulatedRewards(
+                    _epochStart,
+                    synced,
+                    _amt
+                );
+                from = synced;
+            }
+        }
+
         uint256 userEpochRewards;
-        if (epoch > rewardStart) {
-            for (uint256 i = rewardStart; i < epoch; i++) {
-                userEpochRewards = _calcUserEpochRewards(i, user.amount);
-                if (emergencyExitVault && i < emergencyExitEpoch) {
-                    userEpochRewards = userEpochRewards
-                        .mul(emergencyTargetOut)
-                        .div(emergencyVaultBalance);
-                }
-                rewards = rewards.add(userEpochRewards);
+        for (uint256 i = from; i < epoch; i++) {
+            userEpochRewards = _calcUserEpochRewards(i, _amt);
+            if (emergencyExitVault && i < emergencyExitEpoch) {
+                userEpochRewards = userEpochRewards
+                    .mul(emergencyTargetOut)
+                    .div(emergencyVaultBalance);
             }
+            rewards = rewards.add(userEpochRewards);
         }
         return (rewards);
     }
@@ -493,9 +1522,10 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     function getUserRewardsTarget(address _user) public view returns (uint256) {
         uint256 pending = getUserRewards(_user);
         if (useTargetVault) {
-            uint256 _sharePrice = IVault(address(targetVault)).pricePerShare();
+            uint256 _sharePrice = IVault(address(targetVault()))
+                .pricePerShare();
             uint256 _sharePriceAdj = 10 **
-                (IVault(address(targetVault)).decimals());
+                (IVault(address(targetVault())).decimals());
             return (pending.mul(_sharePrice).div(_sharePriceAdj));
         }
         return (pending);
@@ -509,12 +1539,150 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
         view
         returns (uint256)
     {
-        uint256 rewards = epochRewards[_epoch].mul(_amt).div(
-            epochBalance[_epoch]
-        );
+        EpochInfo storage info = _epochInfo[_epoch];
+        uint256 rewards = uint256(info.rewards).mul(_amt).div(info.balance);
         return (rewards);
     }
 
+    /// @notice calculates a users rewards from _epochStart to _epochEnd using the
+    /// cumulative index. _epochEnd must not be past accumulatorEpoch.
+    /// @dev Epochs prior to emergencyExitEpoch are scaled by the amount received
+    /// when exiting the vault, matching the behaviour of getUserRewards()
+    /// @param _epochStart epoch the users rewards start from
+    /// @param _epochEnd epoch the users rewards end at, exclusive
+    /// @param _amt the users vault.token() balance
+    function _calcUserAccumulatedRewards(
+        uint256 _epochStart,
+        uint256 _epochEnd,
+        uint256 _amt
+    ) internal view returns (uint256) {
+        if (_epochEnd <= _epochStart) {
+            return 0;
+        }
+
+        uint256 startIndex = _epochInfo[_epochStart].rewardPerShare;
+        uint256 endIndex = _epochInfo[_epochEnd].rewardPerShare;
+        if (emergencyExitVault && _epochStart < emergencyExitEpoch) {
+            uint256 exitIndex = _epochInfo[
+                Math.min(emergencyExitEpoch, _epochEnd)
+            ].rewardPerShare;
+            uint256 preExitRewards = _amt
+                .mul(exitIndex.sub(startIndex))
+                .div(ACC_PRECISION)
+                .mul(emergencyTargetOut)
+                .div(emergencyVaultBalance);
+            return
+                preExitRewards.add(
+                    _amt.mul(endIndex.sub(exitIndex)).div(ACC_PRECISION)
+                );
+        }
+        return _amt.mul(endIndex.sub(startIndex)).div(ACC_PRECISION);
+    }
+
+    /// @notice returns a users accounting record. Users that haven't interacted since
+    /// the distributor was migrated are read from the legacy distributor.
+    /// @dev every record written by this contract has a non-zero depositTime
+    /// @param _user user address
+    function _loadUserInfo(address _user)
+        internal
+        view
+        returns (UserInfo memory user)
+    {
+        user = _userInfo[_user];
+        if (user.depositTime == 0 && legacyDistributor != address(0)) {
+            (
+                uint256 amount,
+                uint256 epochStart,
+                uint256 depositTime
+            ) = ILegacyDistributor(legacyDistributor).userInfo(_user);
+            user = UserInfo(
+                amount.toUint128(),
+                epochStart.toUint64(),
+                depositTime.toUint64()
+            );
+        }
+    }
+
+    /// @notice returns a users carry record. As with _loadUserInfo(), users that
+    /// haven't interacted since the migration are read from the legacy distributor.
+    /// @param _user user address
+    function _loadUserCarry(address _user)
+        internal
+        view
+        returns (UserCarry memory carry)
+    {
+        carry = _userCarry[_user];
+        if (legacyCarryRounds > 0 && _userInfo[_user].depositTime == 0) {
+            (uint256 quote, uint256 round) = ILegacyDistributor(
+                legacyDistributor
+            ).userCarry(_user);
+            carry = UserCarry(quote.toUint128(), round.toUint128());
+        }
+    }
+
+    /// @notice returns a users ineligible balance. As with _loadUserInfo(), users
+    /// that haven't interacted since the migration are read from the legacy
+    /// distributor, if it tracks them.
+    /// @param _user user address
+    function _loadIneligibleBalance(address _user)
+        internal
+        view
+        returns (IneligibleBalance memory ineligible)
+    {
+        ineligible = _ineligibleBalance[_user];
+        if (
+            _userInfo[_user].depositTime == 0 &&
+            legacyDistributor != address(0)
+        ) {
+            try
+                ILegacyDistributor(legacyDistributor).ineligibleBalance(_user)
+            returns (uint256 amount, uint256 epochReceived) {
+                ineligible = IneligibleBalance(
+                    amount.toUint128(),
+                    epochReceived.toUint64()
+                );
+            } catch {}
+        }
+    }
+
+    /// @notice returns the part of a users balance that isn't eligible in
+    /// _info.epochStart. Shares received in an earlier epoch earn like the rest.
+    /// @param _user user address
+    /// @param _info the users accounting record
+    function _getIneligibleAmount(address _user, UserInfo memory _info)
+        internal
+        view
+        returns (uint256)
+    {
+        IneligibleBalance memory ineligible = _loadIneligibleBalance(_user);
+        if (ineligible.amount == 0 || ineligible.epoch != _info.epochStart) {
+            return 0;
+        }
+        // spent shares come out of the ineligible balance last
+        return Math.min(ineligible.amount, _info.amount);
+    }
+
+    /// @notice records shares received during the current epoch, see onTransfer()
+    /// @param _user user address
+    /// @param _amount total shares received this epoch
+    function _setIneligibleBalance(address _user, uint256 _amount) internal {
+        _ineligibleBalance[_user] = IneligibleBalance(
+            _amount.toUint128(),
+            uint256(epoch).toUint64()
+        );
+        emit IneligibleBalanceUpdated(_user, _amount, epoch);
+    }
+
+    /// @notice returns the rate a settled carry round is paid at. Rounds settled
+    /// before the migration are read from the legacy distributor.
+    /// @param _round carry round
+    function _carryRoundRate(uint256 _round) internal view returns (uint256) {
+        if (_round < legacyCarryRounds) {
+            return ILegacyDistributor(legacyDistributor).carryRoundRate(_round);
+        }
+        return carryRoundRate[_round];
+    }
+
     /// @notice Updates the total amount claimed by a user
     /// @param _user user address
     /// @param _rewardsPaid amount the totalClaimed amount needs to be incremented by for _user
@@ -535,39 +1703,81 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// @param _user user address
     /// @param _epoch epoch the user joined the accounting records
     function _updateUserInfo(address _user, uint256 _epoch) internal {
-        userInfo[_user] = UserInfo(
-            IRedirectVault(redirectVault).balanceOf(_user),
-            _epoch,
-            block.timestamp
+        _updateUserCarry(_user);
+        uint256 amount = IRedirectVault(redirectVault()).balanceOf(_user);
+        if (
+            _userInfo[_user].depositTime == 0 &&
+            legacyDistributor != address(0)
+        ) {
+            // first update since migrating, carry over the claimed total
+            totalClaimed[_user] = totalClaimed[_user].add(
+                ILegacyDistributor(legacyDistributor).totalClaimed(_user)
+            );
+            _ineligibleBalance[_user] = _loadIneligibleBalance(_user);
+        }
+        _userInfo[_user] = UserInfo(
+            amount.toUint128(),
+            _epoch.toUint64(),
+            block.timestamp.toUint64()
         );
+        emit UserCheckpoint(_user, amount, _epoch, eligibleEpochRewards);
     }
 
     /// @notice Increments the epoch by 1
     function _incrementEpoch() internal {
-        epoch = epoch.add(1);
-        lastEpoch = block.timestamp;
+        epoch = epoch + 1;
+        lastEpoch = block.timestamp.toUint64();
     }
 
     /// @notice Updates the rewards and eligible balance for the epoch just passed.
     /// @dev Only called when an epoch is being processed
     /// @param _preSwapBalance targetToken balance prior to the swap
-    function _updateRewardData(uint256 _preSwapBalance) internal {
-        uint256 amountOut = targetBalance().sub(_preSwapBalance);
-
-        epochRewards[epoch] = amountOut;
-        /// we use this instead of total Supply as users that just deposited in current epoch are not eligible for rewards
-        epochBalance[epoch] = eligibleEpochRewards;
+    /// @return amountOut tokenOut received this epoch
+    function _updateRewardData(uint256 _preSwapBalance)
+        internal
+        returns (uint256 amountOut)
+    {
+        amountOut = targetBalance().sub(_preSwapBalance);
+
+        /// we use eligibleEpochRewards instead of total Supply as users that just deposited in current epoch are not eligible for rewards
+        EpochInfo storage info = _epochInfo[epoch];
+        info.balance = eligibleEpochRewards.toUint128();
+        /// rewards of epochs in the carry window are set when it settles
+        if (carryEpochs == 0) {
+            info.rewards = amountOut.toUint128();
+
+            /// only extend the index if it has been synced with the epoch history
+            if (accumulatorEpoch == epoch) {
+                _accumulate(epoch);
+            }
+        }
         /// set to equal total Supply as all current users with deposits are eligible for next epoch rewards
-        eligibleEpochRewards = IRedirectVault(redirectVault).totalSupply();
+        eligibleEpochRewards = IRedirectVault(redirectVault()).totalSupply();
 
         emit EpochProcessed(epoch, amountOut, eligibleEpochRewards);
     }
 
+    /// @notice folds the rewards of _epoch into cumulativeRewardPerShare
+    /// @param _epoch epoch to be added to the index. Must equal accumulatorEpoch
+    function _accumulate(uint256 _epoch) internal {
+        EpochInfo storage info = _epochInfo[_epoch];
+        uint256 rewardPerShare = 0;
+        if (info.balance > 0) {
+            rewardPerShare = uint256(info.rewards).mul(ACC_PRECISION).div(
+                info.balance
+            );
+        }
+        _epochInfo[_epoch + 1].rewardPerShare = info.rewardPerShare.add(
+            rewardPerShare
+        );
+        accumulatorEpoch = (_epoch + 1).toUint64();
+    }
+
     /// @notice deposits targetToken into the targetVault if a vault is configured and enabled
     function _deposit() internal {
         if (useTargetVault) {
-            uint256 bal = targetToken.balanceOf(address(this));
-            IVault(address(targetVault)).deposit(bal);
+            uint256 bal = targetToken().balanceOf(address(this));
+            IVault(address(targetVault())).deposit(bal);
         }
     }
 
@@ -594,13 +1804,13 @@ contract RewardDistributor is ReentrancyGuard, IRewardDistributor {
     /// @notice approves the router to transfer _token
     /// @param _token token to be approved
     function permitRewardToken(address _token) external onlyAuthorized {
-        IERC20(_token).safeApprove(router, type(uint256).max);
+        IERC20(_token).safeApprove(router(), type(uint256).max);
     }
 
     /// @notice revokes the routers approval to transfer _token
     /// @param _token token to be revoked
     function unpermitRewardToken(address _token) external onlyAuthorized {
-        IERC20(_token).safeApprove(router, 0);
+        IERC20(_token).safeApprove(router(), 0);
     }
 
     /// @notice emergancy function to recover funds from the contract. Worst-case scenario.
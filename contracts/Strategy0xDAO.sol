@@ -38,19 +38,22 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
      * {lpPair} - LP Token that the strategy maximizes.
      * {lpToken0, lpToken1} - Tokens that the strategy maximizes. IUniswapV2Pair tokens.
      */
-    address public wftm = address(0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83);
-    address public rewardToken0 =
+    address public constant wftm =
+        address(0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83);
+    address public constant rewardToken0 =
         address(0xc5A9848b9d145965d821AaeC8fA32aaEE026492d); // 0XDAO
-    address public rewardToken1 =
-        address(0x888EF71766ca594DED1F0FA3AE64eD2941740A20); // solid
-    uint8 public rewardTokens = 2;
+    address public rewardToken1;
+    uint8 public rewardTokens;
     address public lpPair;
     address public lpToken0;
     address public lpToken1;
     IBaseV1Pair pair;
 
+    /// @dev reward tokens are indexed from 0 to rewardTokens - 1, claim() returns
+    /// the balances of those that are emitting
+    mapping(uint8 => address) public rewardTokenAt;
     mapping(uint8 => bool) public isEmitting;
-    mapping(address => address) tokenRouter;
+    mapping(address => address) public tokenRouter;
 
     /**
      * @dev Third Party Contracts:
@@ -63,7 +66,7 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
     address public constant spiritRouter =
         address(0x16327E3FbDaCA3bcF7E38F5Af2599D2DDc33aE52);
 
-    address[] private pools = new address[](1);
+    address[] private pools;
     IOxLens public constant oxLens =
         IOxLens(0xDA00137c79B30bfE06d04733349d98Cf06320e69);
     address public oxPoolAddress;
@@ -106,8 +109,8 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
      * {rewardTokenToLp0Route} - Route we take to get from {rewardToken} into {lpToken0}.
      * {rewardTokenToLp1Route} - Route we take to get from {rewardToken} into {lpToken1}.
      */
-    address[] public rewardToken0ToWftmRoute = [rewardToken0, wftm];
-    address[] public rewardToken1ToWftmRoute = [rewardToken1, wftm];
+    address[] public rewardToken0ToWftmRoute;
+    address[] public rewardToken1ToWftmRoute;
     address[] public wftmToLp0Route;
     address[] public wftmToLp1Route;
 
@@ -124,6 +127,32 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
      * @notice see documentation for each variable above its respective declaration.
      */
     constructor(address _vault, address _lpPair) {
+        _initializeStrategy(_vault, _lpPair);
+    }
+
+    /**
+     * @dev Initializes a clone deployed by RedirectFactory, which doesn't run the constructor.
+     * @param _strategist strategist of the clone
+     */
+    function initializeStrategy(
+        address _vault,
+        address _lpPair,
+        address _strategist
+    ) external {
+        require(
+            vault == address(0),
+            "Contract is already initialized."
+        );
+        _initializeStrategist(_strategist);
+        _initializeStrategy(_vault, _lpPair);
+    }
+
+    function _initializeStrategy(address _vault, address _lpPair) internal {
+        rewardToken1 = address(0x888EF71766ca594DED1F0FA3AE64eD2941740A20); // solid
+        rewardTokens = 2;
+        rewardToken0ToWftmRoute = [rewardToken0, wftm];
+        rewardToken1ToWftmRoute = [rewardToken1, wftm];
+
         lpPair = _lpPair;
         vault = _vault;
         pair = IBaseV1Pair(_lpPair);
@@ -143,10 +172,12 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
         tokenRouter[rewardToken0] = spiritRouter;
         */
 
+        rewardTokenAt[0] = rewardToken0;
+        rewardTokenAt[1] = rewardToken1;
         isEmitting[0] = true;
         isEmitting[1] = true;
 
-        pools[0] = lpPair;
+        pools = [lpPair];
 
         oxPoolAddress = oxLens.oxPoolBySolidPool(lpPair);
         stakingAddress = IOxPool(oxPoolAddress).stakingAddress();
@@ -216,18 +247,26 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
         // require(!Address.isContract(msg.sender), "!contract");
         IMultiRewards(stakingAddress).getReward();
 
-        uint256 balanceReward0 = IERC20(rewardToken0).balanceOf(address(this));
-        if (balanceReward0 > 0) {
-            IERC20(rewardToken0).transfer(to, balanceReward0);
+        uint256 emitting = 0;
+        for (uint8 i = 0; i < rewardTokens; i++) {
+            if (isEmitting[i]) {
+                emitting++;
+            }
         }
 
-        uint256 balanceReward1 = IERC20(rewardToken1).balanceOf(address(this));
-        if (balanceReward1 > 0) {
-            IERC20(rewardToken1).transfer(to, balanceReward1);
+        _rewards = new MultiRewards[](emitting);
+        uint256 j = 0;
+        for (uint8 i = 0; i < rewardTokens; i++) {
+            if (!isEmitting[i]) {
+                continue;
+            }
+            address token = rewardTokenAt[i];
+            uint256 balance = IERC20(token).balanceOf(address(this));
+            if (balance > 0) {
+                IERC20(token).transfer(to, balance);
+            }
+            _rewards[j++] = MultiRewards(token, balance);
         }
-        _rewards = new MultiRewards[](2);
-        _rewards[0] = MultiRewards(rewardToken0, balanceReward0);
-        _rewards[1] = MultiRewards(rewardToken1, balanceReward1);
     }
 
     /**
@@ -274,6 +313,8 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
         uint256 deposited = balanceOfPool();
         IMultiRewards(stakingAddress).withdraw(deposited);
         IOxPool(oxPoolAddress).withdrawLp(deposited);
+        // a vault that rejects the report must not block the exit, harvests reconcile it
+        try IRedirectVault(vault).reportBalance(balanceOf()) {} catch {}
     }
 
     /**
@@ -330,20 +371,24 @@ contract Strategy0xDAO is IStrategy, StrategyAuthorized, Pausable {
         return true;
     }
 
+    /// @notice adds _token as the next reward token returned by claim()
+    /// @param _token the reward token
+    /// @param _router router the token is sold with
     function addRewardToken(address _token, address _router)
         external
         onlyAuthorized
         returns (bool)
     {
-        rewardToken1 = _token;
-        tokenRouter[rewardToken1] = _router;
-        IERC20(rewardToken1).safeApprove(
-            tokenRouter[rewardToken1],
-            type(uint256).max
-        );
-        rewardToken1ToWftmRoute = [rewardToken1, wftm];
-        isEmitting[1] = true;
-        rewardTokens = 2;
+        uint8 id = rewardTokens;
+        rewardTokenAt[id] = _token;
+        if (id == 1) {
+            rewardToken1 = _token;
+            rewardToken1ToWftmRoute = [rewardToken1, wftm];
+        }
+        tokenRouter[_token] = _router;
+        IERC20(_token).safeApprove(_router, type(uint256).max);
+        isEmitting[id] = true;
+        rewardTokens = id + 1;
         return true;
     }
 }
@@ -11,7 +11,12 @@ abstract contract StrategyAuthorized is Context {
     event UpdateManagement(address indexed management);
 
     constructor() {
-        _strategist = _msgSender();
+        _initializeStrategist(_msgSender());
+    }
+
+    /// @notice sets the strategist of a clone, which doesn't run the constructor
+    function _initializeStrategist(address _account) internal {
+        _strategist = _account;
     }
 
     modifier onlyGovernance() {
@@ -86,17 +86,21 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
      * {lpPair} - LP Token that the strategy maximizes.
      * {lpToken0, lpToken1} - Tokens that the strategy maximizes. IUniswapV2Pair tokens.
      */
-    address public wftm = address(0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83);
-    address public rewardToken0 =
+    address public constant wftm =
+        address(0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83);
+    address public constant rewardToken0 =
         address(0x10b620b2dbAC4Faa7D7FFD71Da486f5D44cd86f9); //LQDR
     address public rewardToken1;
-    uint8 public rewardTokens = 1;
+    uint8 public rewardTokens;
     address public lpPair;
     address public lpToken0;
     address public lpToken1;
 
+    /// @dev reward tokens are indexed from 0 to rewardTokens - 1, claim() returns
+    /// the balances of those that are emitting
+    mapping(uint8 => address) public rewardTokenAt;
     mapping(uint8 => bool) public isEmitting;
-    mapping(address => address) tokenRouter;
+    mapping(address => address) public tokenRouter;
 
     /**
      * @dev Third Party Contracts:
@@ -108,7 +112,8 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
         address(0xF491e7B69E4244ad4002BC14e878a34207E38c29);
     address public constant spiritRouter =
         address(0x16327E3FbDaCA3bcF7E38F5Af2599D2DDc33aE52);
-    address public masterChef = 0x6e2ad6527901c9664f016466b8DA1357a004db0f;
+    address public constant masterChef =
+        0x6e2ad6527901c9664f016466b8DA1357a004db0f;
     uint8 public poolId;
 
     /**
@@ -146,8 +151,8 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
      * {rewardTokenToLp0Route} - Route we take to get from {rewardToken} into {lpToken0}.
      * {rewardTokenToLp1Route} - Route we take to get from {rewardToken} into {lpToken1}.
      */
-    address[] public rewardToken0ToWftmRoute = [rewardToken0, wftm];
-    address[] public rewardToken1ToWftmRoute = [rewardToken1, wftm];
+    address[] public rewardToken0ToWftmRoute;
+    address[] public rewardToken1ToWftmRoute;
     address[] public wftmToLp0Route;
     address[] public wftmToLp1Route;
 
@@ -168,6 +173,36 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
         address _lpPair,
         uint8 _poolId
     ) {
+        _initializeStrategy(_vault, _lpPair, _poolId);
+    }
+
+    /**
+     * @dev Initializes a clone deployed by RedirectFactory, which doesn't run the constructor.
+     * @param _strategist strategist of the clone
+     */
+    function initializeStrategy(
+        address _vault,
+        address _lpPair,
+        uint8 _poolId,
+        address _strategist
+    ) external {
+        require(
+            vault == address(0),
+            "Contract is already initialized."
+        );
+        _initializeStrategist(_strategist);
+        _initializeStrategy(_vault, _lpPair, _poolId);
+    }
+
+    function _initializeStrategy(
+        address _vault,
+        address _lpPair,
+        uint8 _poolId
+    ) internal {
+        rewardTokens = 1;
+        rewardToken0ToWftmRoute = [rewardToken0, wftm];
+        rewardToken1ToWftmRoute = [rewardToken1, wftm];
+
         // Check the _poolId matches the _lpPair
         require(
             IMasterChefv2(masterChef).lpToken(_poolId) == _lpPair,
@@ -193,6 +228,7 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
         tokenRouter[lpToken1] = spookyRouter;
         tokenRouter[rewardToken0] = spiritRouter;
 
+        rewardTokenAt[0] = rewardToken0;
         isEmitting[0] = true;
         isEmitting[1] = false;
 
@@ -261,14 +297,26 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
         // require(!Address.isContract(msg.sender), "!contract");
         IMasterChefv2(masterChef).harvest(poolId, address(this));
 
-        uint256 balanceReward0 = IERC20(rewardToken0).balanceOf(address(this));
-        if (balanceReward0 > 0) {
-            IERC20(rewardToken0).transfer(to, balanceReward0);
+        uint256 emitting = 0;
+        for (uint8 i = 0; i < rewardTokens; i++) {
+            if (isEmitting[i]) {
+                emitting++;
+            }
         }
-        _rewards = new MultiRewards[](1);
-        _rewards[0] = MultiRewards(rewardToken0, balanceReward0);
 
-        // TODO - Support multiple reward tokens
+        _rewards = new MultiRewards[](emitting);
+        uint256 j = 0;
+        for (uint8 i = 0; i < rewardTokens; i++) {
+            if (!isEmitting[i]) {
+                continue;
+            }
+            address token = rewardTokenAt[i];
+            uint256 balance = IERC20(token).balanceOf(address(this));
+            if (balance > 0) {
+                IERC20(token).transfer(to, balance);
+            }
+            _rewards[j++] = MultiRewards(token, balance);
+        }
     }
 
     /**
@@ -324,12 +372,16 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
 
     function emergencyWithdraw() external onlyAuthorized {
         IMasterChefv2(masterChef).emergencyWithdraw(poolId, address(this));
+        // a vault that rejects the report must not block the exit, harvests reconcile it
+        try IRedirectVault(vault).reportBalance(balanceOf()) {} catch {}
     } 
 
 
     function panic() public onlyAuthorized {
         pause();
         IMasterChefv2(masterChef).withdraw(poolId, balanceOfPool(), address(this));
+        // a vault that rejects the report must not block the exit, harvests reconcile it
+        try IRedirectVault(vault).reportBalance(balanceOf()) {} catch {}
     }
 
     /**
@@ -380,20 +432,24 @@ contract StrategyLiquidDriver is IStrategy, StrategyAuthorized, Pausable {
         return true;
     }
 
+    /// @notice adds _token as the next reward token returned by claim()
+    /// @param _token the reward token
+    /// @param _router router the token is sold with
     function addRewardToken(address _token, address _router)
         external
         onlyAuthorized
         returns (bool)
     {
-        rewardToken1 = _token;
-        tokenRouter[rewardToken1] = _router;
-        IERC20(rewardToken1).safeApprove(
-            tokenRouter[rewardToken1],
-            type(uint256).max
-        );
-        rewardToken1ToWftmRoute = [rewardToken1, wftm];
-        isEmitting[1] = true;
-        rewardTokens = 2;
+        uint8 id = rewardTokens;
+        rewardTokenAt[id] = _token;
+        if (id == 1) {
+            rewardToken1 = _token;
+            rewardToken1ToWftmRoute = [rewardToken1, wftm];
+        }
+        tokenRouter[_token] = _router;
+        IERC20(_token).safeApprove(_router, type(uint256).max);
+        isEmitting[id] = true;
+        rewardTokens = id + 1;
         return true;
     }
 }
@@ -10,7 +10,19 @@ interface IRedirectVault {
 
     function balanceOf(address _account) external view returns (uint256);
 
+    function token() external view returns (address);
+
     function targetToken() external view returns (address);
 
     function targetVault() external view returns (address);
+
+    function harvestTrigger() external view returns (bool);
+
+    function harvest() external;
+
+    function checkpointEpoch() external returns (bool);
+
+    function depositFor(address _user, uint256 _amount) external;
+
+    function reportBalance(uint256 _balance) external;
 }
@@ -0,0 +1,47 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-ERC20Permit.sol";
+
+/// @notice Mintable ERC20 with EIP-2612 permit for local tests. Metadata is kept in storage and set
+/// with initialize() so the runtime code can be copied to a hard-coded address. The permit
+/// domain is built with an empty name, read it from DOMAIN_SEPARATOR().
+contract MockERC20 is ERC20Permit {
+    string private _mockName;
+    string private _mockSymbol;
+    uint8 private _mockDecimals;
+
+    constructor() ERC20("", "") ERC20Permit("") {}
+
+    function initialize(
+        string memory _name,
+        string memory _symbol,
+        uint8 _decimals
+    ) public {
+        _mockName = _name;
+        _mockSymbol = _symbol;
+        _mockDecimals = _decimals;
+    }
+
+    function name() public view virtual override returns (string memory) {
+        return _mockName;
+    }
+
+    function symbol() public view virtual override returns (string memory) {
+        return _mockSymbol;
+    }
+
+    function decimals() public view virtual override returns (uint8) {
+        return _mockDecimals;
+    }
+
+    function mint(address _to, uint256 _amount) external {
+        _mint(_to, _amount);
+    }
+
+    function burn(address _from, uint256 _amount) external {
+        _burn(_from, _amount);
+    }
+}
@@ -0,0 +1,9 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+/// @notice A vault deployed before reportBalance() existed, for tests of strategies
+/// whose report reverts.
+contract MockLegacyVault {
+    address public governance = msg.sender;
+}
@@ -0,0 +1,187 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "./MockERC20.sol";
+
+/// @notice MasterChefV2 for local tests implementing both the LiquidDriver
+/// (IMasterChefv2) and Beethoven (withdrawAndHarvest, lpTokens) flavours.
+/// Each pool emits a fixed amount of rewardToken per second, shared pro-rata.
+contract MockMasterChef {
+    using SafeERC20 for IERC20;
+
+    uint256 constant ACC_PRECISION = 1e12;
+
+    struct PoolInfo {
+        address lpToken;
+        uint256 rewardPerSecond;
+        uint256 accRewardPerShare;
+        uint256 lastRewardTime;
+        uint256 totalDeposited;
+    }
+
+    struct UserInfo {
+        uint256 amount;
+        uint256 rewardDebt;
+        uint256 unpaid;
+    }
+
+    address public rewardToken;
+    mapping(uint256 => PoolInfo) public poolInfo;
+    mapping(uint256 => mapping(address => UserInfo)) internal users;
+    /// @notice fee in basis points kept from withdrawals, to test strategies returning
+    /// less than asked
+    mapping(uint256 => uint256) public withdrawFee;
+
+    function initialize(address _rewardToken) external {
+        rewardToken = _rewardToken;
+    }
+
+    function add(
+        uint256 _pid,
+        address _lpToken,
+        uint256 _rewardPerSecond
+    ) external {
+        poolInfo[_pid] = PoolInfo(
+            _lpToken,
+            _rewardPerSecond,
+            0,
+            block.timestamp,
+            0
+        );
+    }
+
+    function setWithdrawFee(uint256 _pid, uint256 _fee) external {
+        withdrawFee[_pid] = _fee;
+    }
+
+    function lpToken(uint256 _pid) external view returns (address) {
+        return poolInfo[_pid].lpToken;
+    }
+
+    function lpTokens(uint256 _pid) external view returns (address) {
+        return poolInfo[_pid].lpToken;
+    }
+
+    function lqdrPerBlock() external view returns (uint256) {
+        return poolInfo[0].rewardPerSecond;
+    }
+
+    function userInfo(uint256 _pid, address _user)
+        external
+        view
+        returns (uint256, uint256)
+    {
+        UserInfo memory user = users[_pid][_user];
+        return (user.amount, user.rewardDebt);
+    }
+
+    function pendingReward(uint256 _pid, address _user)
+        external
+        view
+        returns (uint256)
+    {
+        PoolInfo memory pool = poolInfo[_pid];
+        UserInfo memory user = users[_pid][_user];
+        uint256 acc = pool.accRewardPerShare;
+        if (pool.totalDeposited > 0) {
+            acc +=
+                ((block.timestamp - pool.lastRewardTime) *
+                    pool.rewardPerSecond *
+                    ACC_PRECISION) /
+                pool.totalDeposited;
+        }
+        return
+            user.unpaid +
+            (user.amount * acc) /
+            ACC_PRECISION -
+            user.rewardDebt;
+    }
+
+    function deposit(
+        uint256 _pid,
+        uint256 _amount,
+        address _to
+    ) external {
+        UserInfo storage user = _settle(_pid, _to);
+        IERC20(poolInfo[_pid].lpToken).safeTransferFrom(
+            msg.sender,
+            address(this),
+            _amount
+        );
+        user.amount += _amount;
+        poolInfo[_pid].totalDeposited += _amount;
+        _resetDebt(_pid, user);
+    }
+
+    function withdraw(
+        uint256 _pid,
+        uint256 _amount,
+        address _to
+    ) public {
+        UserInfo storage user = _settle(_pid, msg.sender);
+        user.amount -= _amount;
+        poolInfo[_pid].totalDeposited -= _amount;
+        _resetDebt(_pid, user);
+        uint256 fee = (_amount * withdrawFee[_pid]) / 10000;
+        IERC20(poolInfo[_pid].lpToken).safeTransfer(_to, _amount - fee);
+    }
+
+    function harvest(uint256 _pid, address _to) public {
+        UserInfo storage user = _settle(_pid, msg.sender);
+        uint256 rewards = user.unpaid;
+        user.unpaid = 0;
+        MockERC20(rewardToken).mint(_to, rewards);
+    }
+
+    function withdrawAndHarvest(
+        uint256 _pid,
+        uint256 _amount,
+        address _to
+    ) external {
+        withdraw(_pid, _amount, _to);
+        harvest(_pid, _to);
+    }
+
+    function emergencyWithdraw(uint256 _pid, address _to) external {
+        UserInfo storage user = users[_pid][msg.sender];
+        uint256 amount = user.amount;
+        _updatePool(_pid);
+        poolInfo[_pid].totalDeposited -= amount;
+        user.amount = 0;
+        user.rewardDebt = 0;
+        user.unpaid = 0;
+        IERC20(poolInfo[_pid].lpToken).safeTransfer(_to, amount);
+    }
+
+    function _updatePool(uint256 _pid) internal {
+        PoolInfo storage pool = poolInfo[_pid];
+        if (pool.totalDeposited > 0) {
+            pool.accRewardPerShare +=
+                ((block.timestamp - pool.lastRewardTime) *
+                    pool.rewardPerSecond *
+                    ACC_PRECISION) /
+                pool.totalDeposited;
+        }
+        pool.lastRewardTime = block.timestamp;
+    }
+
+    function _settle(uint256 _pid, address _user)
+        internal
+        returns (UserInfo storage user)
+    {
+        _updatePool(_pid);
+        user = users[_pid][_user];
+        user.unpaid +=
+            (user.amount * poolInfo[_pid].accRewardPerShare) /
+            ACC_PRECISION -
+            user.rewardDebt;
+    }
+
+    function _resetDebt(uint256 _pid, UserInfo storage _user) internal {
+        _user.rewardDebt =
+            (_user.amount * poolInfo[_pid].accRewardPerShare) /
+            ACC_PRECISION;
+    }
+}
@@ -0,0 +1,119 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "./MockERC20.sol";
+
+/// @notice 0xDAO IMultiRewards staking contract for local tests. Every reward token
+/// is emitted at a fixed rate per second and shared pro-rata between stakers.
+contract MockMultiRewards {
+    using SafeERC20 for IERC20;
+
+    address public stakingToken;
+    address[] public rewardTokens;
+    mapping(address => uint256) public rewardRate;
+    mapping(address => uint256) public rewardPerTokenStored;
+    mapping(address => uint256) public lastUpdateTime;
+    mapping(address => mapping(address => uint256))
+        public userRewardPerTokenPaid;
+    mapping(address => mapping(address => uint256)) public rewards;
+
+    uint256 public totalSupply;
+    mapping(address => uint256) public balanceOf;
+
+    function initializeStaking(address _stakingToken) external {
+        stakingToken = _stakingToken;
+    }
+
+    function setRewardRate(address _token, uint256 _rate) external {
+        if (lastUpdateTime[_token] == 0) {
+            rewardTokens.push(_token);
+        } else {
+            _updateToken(_token, address(0));
+        }
+        lastUpdateTime[_token] = block.timestamp;
+        rewardRate[_token] = _rate;
+    }
+
+    function rewardTokensLength() external view returns (uint256) {
+        return rewardTokens.length;
+    }
+
+    function rewardPerToken(address _token) public view returns (uint256) {
+        if (totalSupply == 0) {
+            return rewardPerTokenStored[_token];
+        }
+        return
+            rewardPerTokenStored[_token] +
+            ((block.timestamp - lastUpdateTime[_token]) *
+                rewardRate[_token] *
+                1e18) /
+            totalSupply;
+    }
+
+    function earned(address _account, address _token)
+        public
+        view
+        returns (uint256)
+    {
+        return
+            (balanceOf[_account] *
+                (rewardPerToken(_token) -
+                    userRewardPerTokenPaid[_account][_token])) /
+            1e18 +
+            rewards[_account][_token];
+    }
+
+    function stake(uint256 _amount) external {
+        _update(msg.sender);
+        IERC20(stakingToken).safeTransferFrom(
+            msg.sender,
+            address(this),
+            _amount
+        );
+        totalSupply += _amount;
+        balanceOf[msg.sender] += _amount;
+    }
+
+    function withdraw(uint256 _amount) public {
+        _update(msg.sender);
+        totalSupply -= _amount;
+        balanceOf[msg.sender] -= _amount;
+        IERC20(stakingToken).safeTransfer(msg.sender, _amount);
+    }
+
+    function getReward() public {
+        _update(msg.sender);
+        for (uint256 i = 0; i < rewardTokens.length; i++) {
+            address token = rewardTokens[i];
+            uint256 reward = rewards[msg.sender][token];
+            if (reward > 0) {
+                rewards[msg.sender][token] = 0;
+                MockERC20(token).mint(msg.sender, reward);
+            }
+        }
+    }
+
+    function exit() external {
+        withdraw(balanceOf[msg.sender]);
+        getReward();
+    }
+
+    function _update(address _account) internal {
+        for (uint256 i = 0; i < rewardTokens.length; i++) {
+            _updateToken(rewardTokens[i], _account);
+        }
+    }
+
+    function _updateToken(address _token, address _account) internal {
+        rewardPerTokenStored[_token] = rewardPerToken(_token);
+        lastUpdateTime[_token] = block.timestamp;
+        if (_account != address(0)) {
+            rewards[_account][_token] = earned(_account, _token);
+            userRewardPerTokenPaid[_account][_token] = rewardPerTokenStored[
+                _token
+            ];
+        }
+    }
+}
@@ -0,0 +1,12 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+/// @notice 0xDAO IOxLens for local tests
+contract MockOxLens {
+    mapping(address => address) public oxPoolBySolidPool;
+
+    function setOxPool(address _solidPool, address _oxPool) external {
+        oxPoolBySolidPool[_solidPool] = _oxPool;
+    }
+}
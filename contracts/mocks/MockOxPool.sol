@@ -0,0 +1,34 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "./MockERC20.sol";
+
+/// @notice 0xDAO IOxPool for local tests. Wraps solid LP 1:1 into oxPool tokens.
+contract MockOxPool is MockERC20 {
+    using SafeERC20 for IERC20;
+
+    address public solidPoolAddress;
+    address public stakingAddress;
+
+    function initializeOxPool(address _solidPool, address _staking) external {
+        initialize("Mock oxPool", "oxMLP", 18);
+        solidPoolAddress = _solidPool;
+        stakingAddress = _staking;
+    }
+
+    function depositLp(uint256 _amount) public {
+        IERC20(solidPoolAddress).safeTransferFrom(
+            msg.sender,
+            address(this),
+            _amount
+        );
+        _mint(msg.sender, _amount);
+    }
+
+    function withdrawLp(uint256 _amount) external {
+        _burn(msg.sender, _amount);
+        IERC20(solidPoolAddress).safeTransfer(msg.sender, _amount);
+    }
+}
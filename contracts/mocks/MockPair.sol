@@ -0,0 +1,92 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/utils/math/Math.sol";
+import "./MockERC20.sol";
+
+/// @notice Minimal LP token implementing the IUniswapV2Pair and IBaseV1Pair views
+/// used by the strategies and tests.
+contract MockPair is MockERC20 {
+    address public token0;
+    address public token1;
+    uint256 private reserve0;
+    uint256 private reserve1;
+
+    function initializePair(address _token0, address _token1) external {
+        initialize("Mock LP", "MLP", 18);
+        token0 = _token0;
+        token1 = _token1;
+    }
+
+    function getReserves()
+        external
+        view
+        returns (
+            uint112,
+            uint112,
+            uint32
+        )
+    {
+        return (uint112(reserve0), uint112(reserve1), uint32(block.timestamp));
+    }
+
+    function metadata()
+        external
+        view
+        returns (
+            uint256 dec0,
+            uint256 dec1,
+            uint256 r0,
+            uint256 r1,
+            bool st,
+            address t0,
+            address t1
+        )
+    {
+        return (
+            10**MockERC20(token0).decimals(),
+            10**MockERC20(token1).decimals(),
+            reserve0,
+            reserve1,
+            false,
+            token0,
+            token1
+        );
+    }
+
+    /// @notice mints liquidity for the tokens transferred in since the last update
+    function mint(address _to) external returns (uint256 liquidity) {
+        uint256 balance0 = MockERC20(token0).balanceOf(address(this));
+        uint256 balance1 = MockERC20(token1).balanceOf(address(this));
+        uint256 amount0 = balance0 - reserve0;
+        uint256 amount1 = balance1 - reserve1;
+
+        if (totalSupply() == 0) {
+            liquidity = _sqrt(amount0 * amount1);
+        } else {
+            liquidity = Math.min(
+                (amount0 * totalSupply()) / reserve0,
+                (amount1 * totalSupply()) / reserve1
+            );
+        }
+        require(liquidity > 0, "MockPair: INSUFFICIENT_LIQUIDITY_MINTED");
+        _mint(_to, liquidity);
+
+        reserve0 = balance0;
+        reserve1 = balance1;
+    }
+
+    function _sqrt(uint256 y) internal pure returns (uint256 z) {
+        if (y > 3) {
+            z = y;
+            uint256 x = y / 2 + 1;
+            while (x < z) {
+                z = x;
+                x = (y / x + x) / 2;
+            }
+        } else if (y != 0) {
+            z = 1;
+        }
+    }
+}
@@ -0,0 +1,124 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "./MockERC20.sol";
+import "./MockPair.sol";
+
+/// @notice Deterministic IUniswapV2Router01 for local tests. Swaps are priced from a
+/// fixed USD price per token, the input is kept by the router and the output is minted.
+contract MockRouter {
+    using SafeERC20 for IERC20;
+
+    /// @notice USD price of one whole token, scaled by 1e18
+    mapping(address => uint256) public price;
+
+    mapping(address => mapping(address => address)) public getPair;
+
+    function setPrice(address _token, uint256 _price) external {
+        price[_token] = _price;
+    }
+
+    function setPair(address _pair) external {
+        address token0 = MockPair(_pair).token0();
+        address token1 = MockPair(_pair).token1();
+        getPair[token0][token1] = _pair;
+        getPair[token1][token0] = _pair;
+    }
+
+    function quote(
+        uint256 _amountIn,
+        address _from,
+        address _to
+    ) public view returns (uint256) {
+        require(price[_from] > 0 && price[_to] > 0, "MockRouter: no price");
+        return
+            (_amountIn * price[_from] * 10**MockERC20(_to).decimals()) /
+            (price[_to] * 10**MockERC20(_from).decimals());
+    }
+
+    function getAmountsOut(uint256 amountIn, address[] memory path)
+        public
+        view
+        returns (uint256[] memory amounts)
+    {
+        amounts = new uint256[](path.length);
+        amounts[0] = amountIn;
+        for (uint256 i = 1; i < path.length; i++) {
+            amounts[i] = quote(amounts[i - 1], path[i - 1], path[i]);
+        }
+    }
+
+    function getAmountsIn(uint256 amountOut, address[] memory path)
+        public
+        view
+        returns (uint256[] memory amounts)
+    {
+        amounts = new uint256[](path.length);
+        amounts[path.length - 1] = amountOut;
+        for (uint256 i = path.length - 1; i > 0; i--) {
+            amounts[i - 1] = quote(amounts[i], path[i], path[i - 1]) + 1;
+        }
+    }
+
+    function swapExactTokensForTokens(
+        uint256 amountIn,
+        uint256 amountOutMin,
+        address[] memory path,
+        address to,
+        uint256 deadline
+    ) public returns (uint256[] memory amounts) {
+        require(deadline >= block.timestamp, "MockRouter: EXPIRED");
+        amounts = getAmountsOut(amountIn, path);
+        require(
+            amounts[amounts.length - 1] >= amountOutMin,
+            "MockRouter: INSUFFICIENT_OUTPUT_AMOUNT"
+        );
+        IERC20(path[0]).safeTransferFrom(msg.sender, address(this), amountIn);
+        MockERC20(path[path.length - 1]).mint(to, amounts[amounts.length - 1]);
+    }
+
+    function addLiquidity(
+        address tokenA,
+        address tokenB,
+        uint256 amountADesired,
+        uint256 amountBDesired,
+        uint256 amountAMin,
+        uint256 amountBMin,
+        address to,
+        uint256 deadline
+    )
+        public
+        returns (
+            uint256 amountA,
+            uint256 amountB,
+            uint256 liquidity
+        )
+    {
+        require(deadline >= block.timestamp, "MockRouter: EXPIRED");
+        address pair = getPair[tokenA][tokenB];
+        require(pair != address(0), "MockRouter: no pair");
+
+        (uint256 reserve0, uint256 reserve1, ) = MockPair(pair).getReserves();
+        (uint256 reserveA, uint256 reserveB) = tokenA == MockPair(pair).token0()
+            ? (reserve0, reserve1)
+            : (reserve1, reserve0);
+
+        uint256 amountBOptimal = (amountADesired * reserveB) / reserveA;
+        if (amountBOptimal <= amountBDesired) {
+            (amountA, amountB) = (amountADesired, amountBOptimal);
+        } else {
+            (amountA, amountB) = (
+                (amountBDesired * reserveA) / reserveB,
+                amountBDesired
+            );
+        }
+        require(amountA >= amountAMin, "MockRouter: INSUFFICIENT_A_AMOUNT");
+        require(amountB >= amountBMin, "MockRouter: INSUFFICIENT_B_AMOUNT");
+
+        IERC20(tokenA).safeTransferFrom(msg.sender, pair, amountA);
+        IERC20(tokenB).safeTransferFrom(msg.sender, pair, amountB);
+        liquidity = MockPair(pair).mint(to);
+    }
+}
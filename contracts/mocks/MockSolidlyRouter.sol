@@ -0,0 +1,29 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "./MockRouter.sol";
+
+/// @notice ISolidlyRouter01 swap entry point on top of MockRouter pricing
+contract MockSolidlyRouter is MockRouter {
+    function swapExactTokensForTokensSimple(
+        uint256 amountIn,
+        uint256 amountOutMin,
+        address tokenFrom,
+        address tokenTo,
+        bool,
+        address to,
+        uint256 deadline
+    ) external returns (uint256[] memory amounts) {
+        address[] memory path = new address[](2);
+        path[0] = tokenFrom;
+        path[1] = tokenTo;
+        amounts = swapExactTokensForTokens(
+            amountIn,
+            amountOutMin,
+            path,
+            to,
+            deadline
+        );
+    }
+}
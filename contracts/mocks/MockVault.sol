@@ -0,0 +1,56 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "./MockERC20.sol";
+
+/// @notice Yearn style IVault for local tests. Shares are priced from the vaults
+/// token balance, accrue() simulates yield.
+contract MockVault is MockERC20 {
+    using SafeERC20 for IERC20;
+
+    address public token;
+
+    function initializeVault(address _token) external {
+        initialize("Mock yVault", "yvMOCK", MockERC20(_token).decimals());
+        token = _token;
+    }
+
+    function totalAssets() public view returns (uint256) {
+        return IERC20(token).balanceOf(address(this));
+    }
+
+    function pricePerShare() external view returns (uint256) {
+        if (totalSupply() == 0) {
+            return 10**decimals();
+        }
+        return (10**decimals() * totalAssets()) / totalSupply();
+    }
+
+    function deposit(uint256 _amount) external {
+        uint256 shares = totalSupply() == 0
+            ? _amount
+            : (_amount * totalSupply()) / totalAssets();
+        IERC20(token).safeTransferFrom(msg.sender, address(this), _amount);
+        _mint(msg.sender, shares);
+    }
+
+    function withdraw() external {
+        withdraw(balanceOf(msg.sender));
+    }
+
+    function withdraw(uint256 _maxShares) public {
+        uint256 shares = _maxShares > balanceOf(msg.sender)
+            ? balanceOf(msg.sender)
+            : _maxShares;
+        uint256 amount = (shares * totalAssets()) / totalSupply();
+        _burn(msg.sender, shares);
+        IERC20(token).safeTransfer(msg.sender, amount);
+    }
+
+    /// @notice simulates yield by minting token into the vault
+    function accrue(uint256 _amount) external {
+        MockERC20(token).mint(address(this), _amount);
+    }
+}
@@ -0,0 +1,27 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity 0.8.11;
+
+/// @notice strategy deployed for a vault set, matches the farmAddress of a CONFIG entry
+enum StrategyType {
+    LiquidDriver,
+    Beethoven,
+    OxDAO
+}
+
+/// @notice configuration of a vault set deployed by RedirectFactory. The first
+/// fields match the CONFIG entries in tests/conftest.py
+struct VaultConfig {
+    address token; // LP token the vault accepts
+    address targetToken; // eg USDC
+    address targetVault; // eg yvUSDC, the zero address if no vault is used
+    address router; // univ2 router used by the distributor
+    StrategyType strategyType;
+    uint8 pid; // farm pool id, unused by Strategy0xDAO
+    address[] rewardTokens; // reward tokens permitted on the distributor
+    string name;
+    string symbol;
+    uint256 tvlCap;
+    uint256 approvalDelay;
+    address feeAddress; // distributor fee recipient
+}
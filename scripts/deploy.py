@@ -0,0 +1,307 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from brownie import accounts, interface, web3
+from brownie.network.transaction import TransactionReceipt
+from scripts.keeper import NonceManager
+
+DEFAULT_MANIFEST = "./scripts/manifests/ftm-main.json"
+DEFAULT_CONCURRENCY = 8
+# seconds a run waits on a transaction of an earlier run that is still pending
+PENDING_TIMEOUT = 300
+MAX_UINT256 = 2 ** 256 - 1
+
+# Manifest format (JSON):
+#   {
+#     "addresses": {"usdc": "0x..", ...},       names usable as "$usdc" anywhere below
+#     "defaults": {...},                        merged into every vault
+#     "vaults": {
+#       "LQDRFTM": {
+#         "token": "$LQDRFTM",                  LP token of the pool
+#         "strategy": "StrategyLiquidDriver",   StrategyLiquidDriver, StrategyBeethoven or Strategy0xDAO
+#         "pid": 0,                             farm pool id, not used by Strategy0xDAO
+#         "router": "$spookyRouter",            univ2 router used by the distributor
+#         "targetToken": "$usdc",
+#         "targetVault": "$yvUSDC",             zero address if rewards aren't deposited
+#         "permit": ["$lqdr"],                  reward tokens permitted on the distributor
+#         "name": "...", "symbol": "...",
+#         "tvlCap": 0, "approvalDelay": 0,
+#         "feeAddress": "$dev",                 distributor fee recipient, the deployer if unset
+#         "keeper": "$gelatoJobs"               optional, set with setKeeper()
+#       }
+#     }
+#   }
+STRATEGIES = ("StrategyLiquidDriver", "StrategyBeethoven", "Strategy0xDAO")
+
+
+class DeployError(Exception):
+    pass
+
+
+def load_manifest(path):
+    """Reads a manifest and returns {name: vault config} with defaults merged and
+    "$name" references resolved"""
+    with open(path) as f:
+        manifest = json.load(f)
+    return resolve_manifest(manifest)
+
+
+def resolve_manifest(manifest):
+    addresses = manifest.get("addresses", {})
+
+    def resolve(value):
+        if isinstance(value, str) and value.startswith("$"):
+            if value[1:] not in addresses:
+                raise DeployError("unknown address {}".format(value))
+            return addresses[value[1:]]
+        if isinstance(value, list):
+            return [resolve(v) for v in value]
+        return value
+
+    vaults = {}
+    for name, config in manifest["vaults"].items():
+        config = dict(manifest.get("defaults", {}), **config)
+        config = {k: resolve(v) for k, v in config.items()}
+        if config.get("strategy") not in STRATEGIES:
+            raise DeployError("{}: unknown strategy {}".format(name, config.get("strategy")))
+        vaults[name] = config
+    return vaults
+
+
+def _get_receipt(txid):
+    try:
+        return web3.eth.get_transaction_receipt(txid)
+    except Exception:
+        return None
+
+
+class Step:
+    """One transaction of the plan. send() takes the transaction parameters and
+    broadcasts it. Deploy steps record the new contract address."""
+
+    def __init__(self, key, deps, send):
+        self.key = key
+        self.deps = deps
+        self.send = send
+
+
+class Deployer:
+    """Deploys and wires RedirectVault sets described by a manifest.
+
+    The plan is a dependency graph of transactions: each vault needs its
+    distributor and strategy, which both need the vault, and the permits and
+    initialize() come last. Every transaction whose dependencies are met is
+    sent at once, with nonces handed out by one NonceManager, so independent
+    vaults deploy concurrently. Progress is written to the state file after
+    each submission and confirmation, and a later run with the same state
+    file skips what has already been done."""
+
+    def __init__(self, account, vaults, state_path, concurrency=DEFAULT_CONCURRENCY, required_confs=1,
+                 pending_timeout=PENDING_TIMEOUT):
+        self.account = account
+        self.vaults = vaults
+        self.state_path = state_path
+        self.required_confs = required_confs
+        self.pending_timeout = pending_timeout
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.nonces = NonceManager(account)
+        self.state = self._load_state()
+
+    @classmethod
+    def from_manifest(cls, account, path, state_path=None, **kwargs):
+        state_path = state_path or os.path.splitext(path)[0] + ".state.json"
+        return cls(account, load_manifest(path), state_path, **kwargs)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    async def _run(self, fn):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn)
+
+    def address(self, key):
+        """Address deployed by step key"""
+        return self.state[key]["address"]
+
+    def plan(self):
+        """Returns the steps for every vault in dependency order"""
+        import brownie
+
+        steps = []
+        for name, config in self.vaults.items():
+            fee_address = config.get("feeAddress") or self.account.address
+            vault, distributor, strategy = name + ".vault", name + ".distributor", name + ".strategy"
+
+            steps.append(Step(vault, [], lambda tx, config=config: brownie.RedirectVault.deploy(
+                config["token"], config["name"], config["symbol"], config.get("tvlCap", MAX_UINT256),
+                config["targetToken"], config["targetVault"], config.get("approvalDelay", 0), tx)))
+
+            steps.append(Step(distributor, [vault], lambda tx, config=config, vault=vault, fee=fee_address:
+                              brownie.RewardDistributor.deploy(self.address(vault), config["router"], fee, tx)))
+
+            container = getattr(brownie, config["strategy"])
+            if config["strategy"] == "Strategy0xDAO":
+                deploy = lambda tx, c=container, config=config, vault=vault: c.deploy(
+                    self.address(vault), config["token"], tx)
+            else:
+                deploy = lambda tx, c=container, config=config, vault=vault: c.deploy(
+                    self.address(vault), config["token"], config["pid"], tx)
+            steps.append(Step(strategy, [vault], deploy))
+
+            for token in config.get("permit", []):
+                steps.append(Step("{}.permit.{}".format(name, token), [distributor],
+                                  lambda tx, distributor=distributor, token=token: brownie.RewardDistributor.at(
+                                      self.address(distributor)).permitRewardToken(token, tx)))
+
+            if config.get("keeper"):
+                steps.append(Step(name + ".keeper", [vault], lambda tx, vault=vault, keeper=config["keeper"]:
+                                  brownie.RedirectVault.at(self.address(vault)).setKeeper(keeper, tx)))
+
+            steps.append(Step(name + ".initialize", [strategy, distributor],
+                              lambda tx, vault=vault, strategy=strategy, distributor=distributor:
+                              brownie.RedirectVault.at(self.address(vault)).initialize(
+                                  self.address(strategy), self.address(distributor), tx)))
+        return steps
+
+    def _recover(self, step):
+        """Marks a step submitted by an earlier run as done if its transaction succeeded.
+        A transaction that is still pending is waited on rather than sent twice."""
+        entry = self.state.get(step.key)
+        if entry is None or entry["status"] == "done":
+            return
+        # the nonce is read first, so a transaction mined since is seen by the receipt lookup
+        latest = web3.eth.get_transaction_count(self.account.address, "latest")
+        receipt = _get_receipt(entry["tx"])
+        if receipt is None and self._is_pending(entry, latest):
+            try:
+                receipt = web3.eth.wait_for_transaction_receipt(entry["tx"], timeout=self.pending_timeout)
+            except Exception:
+                raise DeployError("{} is still pending: {}".format(step.key, entry["tx"]))
+        if receipt is not None and receipt["status"] == 1:
+            entry.update(status="done", address=receipt["contractAddress"])
+        else:
+            # dropped, replaced or reverted, it is sent again
+            del self.state[step.key]
+        self._save_state()
+
+    def _is_pending(self, entry, latest):
+        """True if an unmined transaction can still be mined: its nonce hasn't been
+        used by another transaction and the node still has it"""
+        if entry.get("nonce") is not None and latest > entry["nonce"]:
+            return False
+        try:
+            web3.eth.get_transaction(entry["tx"])
+        except Exception:
+            return False
+        return True
+
+    async def _execute(self, step):
+        tx = await self.nonces.send(self._run, lambda nonce: step.send({
+            "from": self.account,
+            "nonce": nonce,
+            "required_confs": 0,
+        }))
+        if not isinstance(tx, TransactionReceipt):
+            tx = tx.tx
+        self.state[step.key] = {"status": "pending", "tx": tx.txid, "nonce": tx.nonce}
+        self._save_state()
+
+        await self._run(lambda: tx.wait(self.required_confs))
+        if tx.status != 1:
+            del self.state[step.key]
+            self._save_state()
+            raise DeployError("{} reverted: {}".format(step.key, tx.revert_msg))
+        self.state[step.key] = {"status": "done", "tx": tx.txid, "address": tx.contract_address}
+        self._save_state()
+        return step.key
+
+    async def run(self):
+        """Sends every step that isn't done yet. Raises DeployError listing the
+        failed steps once nothing more can be sent."""
+        steps = self.plan()
+        for step in steps:
+            self._recover(step)
+
+        done = {key for key, entry in self.state.items() if entry["status"] == "done"}
+        pending = [s for s in steps if s.key not in done]
+        running, failed = {}, {}
+
+        while pending or running:
+            blocked = set(failed)
+            for step in list(pending):
+                if any(d in blocked for d in step.deps):
+                    failed[step.key] = DeployError("dependency failed")
+                    pending.remove(step)
+                elif all(d in done for d in step.deps):
+                    running[asyncio.ensure_future(self._execute(step))] = step
+                    pending.remove(step)
+            if not running:
+                break
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                if future.exception() is None:
+                    done.add(step.key)
+                else:
+                    failed[step.key] = future.exception()
+
+        if failed:
+            raise DeployError("; ".join("{}: {}".format(k, e) for k, e in failed.items()))
+        return {name: self.contracts(name) for name in self.vaults}
+
+    def contracts(self, name):
+        """(vault, distributor, strategy) addresses of a deployed vault"""
+        return tuple(self.address("{}.{}".format(name, c)) for c in ("vault", "distributor", "strategy"))
+
+    def verify(self):
+        """Checks the on-chain wiring of every vault. Returns a list of problems"""
+        import brownie
+
+        problems = []
+
+        def check(name, what, actual, expected):
+            if str(actual).lower() != str(expected).lower():
+                problems.append("{}: {} is {}, expected {}".format(name, what, actual, expected))
+
+        for name, config in self.vaults.items():
+            vault_address, distributor_address, strategy_address = self.contracts(name)
+            vault = brownie.RedirectVault.at(vault_address)
+            distributor = brownie.RewardDistributor.at(distributor_address)
+            strategy = getattr(brownie, config["strategy"]).at(strategy_address)
+
+            check(name, "vault.initialized()", vault.initialized(), True)
+            check(name, "vault.token()", vault.token(), config["token"])
+            check(name, "vault.strategy()", vault.strategy(), strategy_address)
+            check(name, "vault.distributor()", vault.distributor(), distributor_address)
+            check(name, "vault.targetToken()", vault.targetToken(), config["targetToken"])
+            check(name, "vault.targetVault()", vault.targetVault(), config["targetVault"])
+            check(name, "distributor.redirectVault()", distributor.redirectVault(), vault_address)
+            check(name, "distributor.router()", distributor.router(), config["router"])
+            check(name, "strategy.vault()", strategy.vault(), vault_address)
+            if config.get("keeper"):
+                check(name, "vault.keeper()", vault.keeper(), config["keeper"])
+            for token in config.get("permit", []):
+                allowance = interface.IERC20(token).allowance(distributor_address, config["router"])
+                check(name, "allowance({}, router)".format(token), allowance, MAX_UINT256)
+        return problems
+
+
+def main(manifest=DEFAULT_MANIFEST, account="dev", state=None):
+    deployer = Deployer.from_manifest(accounts.load(account), manifest, state)
+    deployed = asyncio.run(deployer.run())
+    for name, (vault, distributor, strategy) in deployed.items():
+        print("{}: vault {} distributor {} strategy {}".format(name, vault, distributor, strategy))
+    problems = deployer.verify()
+    for problem in problems:
+        print(problem)
+    if problems:
+        raise DeployError("{} wiring problems".format(len(problems)))
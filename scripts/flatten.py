@@ -1,15 +1,147 @@
-import pytest
-from brownie import RedirectVault, RewardDistributor, Strategy0xDAO, StrategyLiquidDriver
-
-def flatten(c):
-    print(c)
-    f = open("./flattened/flat{}.sol".format(c._name), "w")
-    c.get_verification_info()
-    f.write(c._flattener.flattened_source)
-    f.close()
-
-def main():
-    flatten(RedirectVault)
-    flatten(RewardDistributor)
-    flatten(Strategy0xDAO)
-    flatten(StrategyLiquidDriver)
\ No newline at end of file
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from brownie import project
+from brownie._config import _get_data_folder
+
+FLATTENED_DIR = "./flattened"
+MANIFEST = "./flattened/manifest.json"
+# contracts under these paths are never deployed
+EXCLUDE = ("contracts/mocks/", "contracts/interfaces/")
+
+
+def flat_path(name, out_dir=FLATTENED_DIR):
+    return os.path.join(out_dir, "flat{}.sol".format(name))
+
+
+def sha256(data):
+    return hashlib.sha256(data.encode() if isinstance(data, str) else data).hexdigest()
+
+
+def read_source(path):
+    """Source of a project contract, or of a package dependency such as OpenZeppelin"""
+    if not os.path.exists(path):
+        path = os.path.join(_get_data_folder(), "packages", path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def discover(loaded):
+    """Deployable contracts of the project, ie with bytecode and not a mock"""
+    containers = {}
+    for name, container in loaded.items():
+        build = container._build
+        path = build["sourcePath"]
+        if not path.startswith("contracts/") or path.startswith(EXCLUDE):
+            continue
+        if build["type"] != "contract" or not build["bytecode"]:
+            continue
+        containers[name] = container
+    return containers
+
+
+def source_hashes(container):
+    """sha256 of every file in the contract's import closure, keyed by path"""
+    paths = sorted(set(container._build["allSourcePaths"].values()))
+    return {path: sha256(read_source(path)) for path in paths}
+
+
+def cache_key(container, sources):
+    """Changes whenever a source in the import closure or the compiler settings change"""
+    return sha256(json.dumps({"sources": sources, "compiler": container._build["compiler"]}, sort_keys=True))
+
+
+def _flatten(name):
+    # runs in a worker forked after the project was loaded
+    container = project.get_loaded_projects()[0][name]
+    container.get_verification_info()
+    return container._flattener.flattened_source
+
+
+class Flattener:
+    """Flattens contracts for verification, skipping those whose sources haven't changed.
+
+    Each flat file is keyed on a hash of the sources in the contract's import
+    closure and the compiler settings, recorded in ``flattened/manifest.json``
+    along with the hash of each source and of the flat file itself. Contracts
+    that need flattening are handed to a process pool, as the flattener is
+    pure Python."""
+
+    def __init__(self, loaded=None, out_dir=FLATTENED_DIR, manifest_path=MANIFEST):
+        self.project = loaded or project.get_loaded_projects()[0]
+        self.out_dir = out_dir
+        self.manifest_path = manifest_path
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def is_current(self, name, key):
+        entry = self.manifest.get(name)
+        if entry is None or entry["key"] != key:
+            return False
+        path = entry["file"]
+        # also catches flat files edited or deleted by hand
+        return os.path.exists(path) and sha256(read_source(path)) == entry["output"]
+
+    def stale(self, containers, force=False):
+        """{name: (key, sources)} of the contracts whose flat file is out of date"""
+        stale = {}
+        for name, container in containers.items():
+            sources = source_hashes(container)
+            key = cache_key(container, sources)
+            if force or not self.is_current(name, key):
+                stale[name] = (key, sources)
+        return stale
+
+    def run(self, names=None, jobs=None, force=False):
+        """Flattens the contracts in names, or every deployable contract.
+        Returns the names of the contracts that were flattened."""
+        containers = discover(self.project)
+        if names:
+            unknown = set(names) - set(containers)
+            if unknown:
+                raise ValueError("not deployable contracts: {}".format(", ".join(sorted(unknown))))
+            containers = {name: containers[name] for name in names}
+        else:
+            # contracts that no longer exist
+            for name in set(self.manifest) - set(containers):
+                path = self.manifest.pop(name)["file"]
+                if os.path.exists(path):
+                    os.remove(path)
+
+        stale = self.stale(containers, force)
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        if stale:
+            names = sorted(stale)
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+                for name, flattened in zip(names, pool.map(_flatten, names)):
+                    key, sources = stale[name]
+                    path = flat_path(name, self.out_dir)
+                    with open(path, "w") as f:
+                        f.write(flattened)
+                    self.manifest[name] = {"file": path, "key": key, "sources": sources, "output": sha256(flattened)}
+                    print("flattened {}".format(name))
+        self._save_manifest()
+        return sorted(stale)
+
+
+def main(*names):
+    """Flattens the named contracts, or all of them. Pass --force to ignore the manifest"""
+    force = "--force" in names
+    names = [name for name in names if name != "--force"]
+    flattened = Flattener().run(names, force=force)
+    print("{} contracts flattened".format(len(flattened)))
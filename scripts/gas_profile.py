@@ -0,0 +1,140 @@
+import json
+import os
+from collections import defaultdict
+
+DEFAULT_FOLDED = "./reports/gas_profile.folded"
+DEFAULT_JSON = "./reports/gas_profile.json"
+
+CALL_OPS = ("CALL", "CALLCODE", "DELEGATECALL", "STATICCALL", "CREATE", "CREATE2")
+
+
+def step_costs(trace):
+    """Gas spent by each step of a trace, not counting gas spent inside calls it makes.
+
+    The reported gasCost of a call includes the gas forwarded to the callee. A
+    call is instead charged what the caller lost over the call, less what the
+    callee spent, so the costs add up to the gas used by the execution."""
+    costs = [step["gasCost"] for step in trace]
+    # spent[i] = sum(costs[i:])
+    spent = [0] * (len(trace) + 1)
+    for i in range(len(trace) - 1, -1, -1):
+        step = trace[i]
+        if step["op"] in CALL_OPS:
+            ret = next((j for j in range(i + 1, len(trace)) if trace[j]["depth"] <= step["depth"]), None)
+            if ret is not None:
+                costs[i] = step["gas"] - trace[ret]["gas"] - (spent[i + 1] - spent[ret])
+        spent[i] = spent[i + 1] + costs[i]
+    return costs
+
+
+def fold(trace):
+    """{stack: gas} of a trace, where stack is a tuple of the "Contract.function"
+    frames from the transaction's entry point down to the function spending the gas.
+    Internal functions are frames too, they are found with the jump depth brownie
+    adds to each step."""
+    folded = defaultdict(int)
+    stack = []
+    for step, cost in zip(trace, step_costs(trace)):
+        level = (step["depth"], step["jumpDepth"])
+        while stack and stack[-1][0] > level:
+            stack.pop()
+        if stack and stack[-1][0] == level:
+            stack[-1] = (level, step["fn"])
+        else:
+            stack.append((level, step["fn"]))
+        folded[tuple(fn for _, fn in stack)] += cost
+    return folded
+
+
+class GasProfile:
+    """Aggregates the gas of many transactions by call stack.
+
+    ``stacks`` maps each stack of frames to the gas spent in its innermost
+    frame, summed over every transaction added. This is the folded stack format
+    read by flamegraph.pl and speedscope. The JSON report also lists each
+    frame's own (self) gas and its gas including callees (total)."""
+
+    def __init__(self):
+        self.stacks = defaultdict(int)
+        self.transactions = defaultdict(lambda: {"count": 0, "gas": 0})
+
+    def add_trace(self, entry, gas_used, trace):
+        for stack, gas in fold(trace).items():
+            self.stacks[stack] += gas
+        self.transactions[entry]["count"] += 1
+        self.transactions[entry]["gas"] += gas_used
+
+    def add(self, tx):
+        """Adds a brownie TransactionReceipt, its trace is fetched from the node"""
+        self.add_trace("{}.{}".format(tx.contract_name, tx.fn_name), tx.gas_used, tx.trace)
+
+    def merge(self, other):
+        for stack, gas in other.stacks.items():
+            self.stacks[stack] += gas
+        for entry, totals in other.transactions.items():
+            self.transactions[entry]["count"] += totals["count"]
+            self.transactions[entry]["gas"] += totals["gas"]
+
+    def frames(self):
+        frames = defaultdict(lambda: {"self": 0, "total": 0})
+        for stack, gas in self.stacks.items():
+            frames[stack[-1]]["self"] += gas
+            # recursive frames are counted once per stack
+            for fn in set(stack):
+                frames[fn]["total"] += gas
+        return dict(frames)
+
+    def folded(self):
+        return ["{} {}".format(";".join(stack), gas) for stack, gas in sorted(self.stacks.items()) if gas > 0]
+
+    def report(self):
+        frames = sorted(self.frames().items(), key=lambda item: -item[1]["self"])
+        return {
+            "transactions": dict(self.transactions),
+            "frames": [dict(frame=fn, **gas) for fn, gas in frames],
+            "stacks": {";".join(stack): gas for stack, gas in self.stacks.items()},
+        }
+
+    def write(self, folded_path=DEFAULT_FOLDED, json_path=DEFAULT_JSON):
+        os.makedirs(os.path.dirname(folded_path) or ".", exist_ok=True)
+        with open(folded_path, "w") as f:
+            f.write("\n".join(self.folded()) + "\n")
+        with open(json_path, "w") as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, json_path):
+        profile = cls()
+        with open(json_path) as f:
+            report = json.load(f)
+        for stack, gas in report["stacks"].items():
+            profile.stacks[tuple(stack.split(";"))] += gas
+        for entry, totals in report["transactions"].items():
+            profile.transactions[entry].update(totals)
+        return profile
+
+
+def main(*transactions):
+    """Profiles transactions on the connected chain, given as tx hashes or block
+    ranges such as 1200-1250, and prints the hottest frames"""
+    from brownie import chain, web3
+
+    hashes = []
+    for arg in transactions:
+        if arg.startswith("0x"):
+            hashes.append(arg)
+            continue
+        start, _, end = arg.partition("-")
+        for number in range(int(start), int(end or start) + 1):
+            hashes.extend(tx.hex() for tx in web3.eth.get_block(number)["transactions"])
+
+    profile = GasProfile()
+    for txid in hashes:
+        tx = chain.get_transaction(txid)
+        if tx.fn_name is not None:
+            profile.add(tx)
+    profile.write()
+
+    print("{:<60} {:>12} {:>12}".format("frame", "self", "total"))
+    for frame in profile.report()["frames"][:30]:
+        print("{:<60} {:>12} {:>12}".format(frame["frame"], frame["self"], frame["total"]))
@@ -0,0 +1,124 @@
+import json
+import math
+import os
+from collections import defaultdict
+
+DEFAULT_REPORT = "./reports/gas_benchmarks.json"
+DEFAULT_BASELINE = "./tests/gas_baseline.json"
+
+
+class MissingBaseline(Exception):
+    pass
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of gas values"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "min": min(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+class GasReport:
+    """Collects gas measurements keyed by function, strategy and sweep parameters.
+
+    Each measurement is stored under a stable key such as
+    ``StrategyLiquidDriver:RewardDistributor.harvest:epochs=20,rewardTokens=1,users=5``
+    so reports from different runs (or xdist workers) can be merged and compared
+    against a stored baseline.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @staticmethod
+    def key(function, strategy, **params):
+        sweep = ",".join("{}={}".format(k, params[k]) for k in sorted(params))
+        return "{}:{}:{}".format(strategy, function, sweep)
+
+    def record(self, function, strategy, gas, **params):
+        self.samples[self.key(function, strategy, **params)].append(int(gas))
+
+    def merge(self, other):
+        for key, values in other.samples.items():
+            self.samples[key].extend(values)
+
+    def report(self):
+        return {key: summarize(values) for key, values in sorted(self.samples.items())}
+
+    def write(self, path=DEFAULT_REPORT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"samples": dict(self.samples), "report": self.report()}, f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        report = cls()
+        with open(path) as f:
+            for key, values in json.load(f)["samples"].items():
+                report.samples[key].extend(values)
+        return report
+
+
+def write_baseline(report, path=DEFAULT_BASELINE):
+    baseline = {key: summary["max"] for key, summary in report.report().items()}
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path=DEFAULT_BASELINE):
+    if not os.path.exists(path):
+        raise MissingBaseline("no gas baseline at {}, record one with --update-gas-baseline".format(path))
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report, baseline_path=DEFAULT_BASELINE, tolerance=0.02):
+    """Returns a list of (key, baseline, measured) for every measurement that
+    exceeds its baseline by more than tolerance. Raises MissingBaseline when there
+    is no baseline, so the gate can't pass without one. Keys missing from the
+    baseline are ignored so new benchmarks don't fail the gate until they are
+    recorded, see unrecorded()."""
+    baseline = load_baseline(baseline_path)
+    regressions = []
+    for key, summary in report.report().items():
+        if key in baseline and summary["max"] > baseline[key] * (1 + tolerance):
+            regressions.append((key, baseline[key], summary["max"]))
+    return regressions
+
+
+def unrecorded(report, baseline_path=DEFAULT_BASELINE):
+    """Keys of the report that have no baseline yet"""
+    baseline = load_baseline(baseline_path)
+    return [key for key in report.report() if key not in baseline]
+
+
+def diff(before, after):
+    """(key, before, after, change) of the p50 of every key in both reports, eg the
+    same benchmarks run at two revisions"""
+    before, after = before.report(), after.report()
+    return [(key, before[key]["p50"], after[key]["p50"], after[key]["p50"] - before[key]["p50"])
+            for key in sorted(set(before) & set(after))]
+
+
+def main(before=None, after=None):
+    """Prints the last benchmark report, or the change from the report before to after"""
+    if before is not None:
+        for key, old, new, change in diff(GasReport.load(before), GasReport.load(after or DEFAULT_REPORT)):
+            print("{:<100} {:>10} {:>10} {:>+10}".format(key, old, new, change))
+        return
+    report = GasReport.load(DEFAULT_REPORT)
+    for key, summary in report.report().items():
+        print("{:<100} {:>10} {:>10}".format(key, summary["p50"], summary["max"]))
@@ -0,0 +1,442 @@
+import os
+import sqlite3
+from brownie import web3
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+try:
+    from eth_abi import decode as decode_abi
+except ImportError:
+    from eth_abi import decode_abi
+
+DEFAULT_DB = "./reports/indexer.sqlite"
+DEFAULT_BATCH_SIZE = 2000
+CARRY_PRECISION = 10 ** 36
+
+VAULT_EVENTS = ["DepositsIncremented", "WithdrawalsIncremented", "RewardsClaimed"]
+DISTRIBUTOR_EVENTS = ["EpochProcessed", "UserHarvested", "UserCheckpoint", "VaultEmergencyDisabled",
+                      "EpochRewardsSettled", "CarrySettled", "UserCarryUpdated", "IneligibleBalanceUpdated"]
+
+# uint256 values don't fit sqlite integers so they are stored as decimal text
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    distributor TEXT PRIMARY KEY,
+    vault TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    eligible TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS epochs (
+    distributor TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    rewards TEXT NOT NULL,
+    balance TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (distributor, epoch)
+);
+CREATE TABLE IF NOT EXISTS users (
+    distributor TEXT NOT NULL,
+    user TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    epoch_start INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (distributor, user)
+);
+CREATE TABLE IF NOT EXISTS ineligible_balances (
+    distributor TEXT NOT NULL,
+    user TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    PRIMARY KEY (distributor, user)
+);
+CREATE TABLE IF NOT EXISTS emergency_exits (
+    distributor TEXT PRIMARY KEY,
+    epoch INTEGER NOT NULL,
+    vault_balance TEXT NOT NULL,
+    target_out TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS carry_rounds (
+    distributor TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    rate TEXT NOT NULL,
+    PRIMARY KEY (distributor, round)
+);
+CREATE TABLE IF NOT EXISTS user_carries (
+    distributor TEXT NOT NULL,
+    user TEXT NOT NULL,
+    quote TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    PRIMARY KEY (distributor, user)
+);
+CREATE TABLE IF NOT EXISTS carry_exits (
+    distributor TEXT PRIMARY KEY,
+    round INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS harvests (
+    distributor TEXT NOT NULL,
+    user TEXT NOT NULL,
+    rewards TEXT NOT NULL,
+    token TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx TEXT NOT NULL,
+    PRIMARY KEY (distributor, block, log_index)
+);
+CREATE TABLE IF NOT EXISTS flows (
+    vault TEXT NOT NULL,
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    total TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx TEXT NOT NULL,
+    PRIMARY KEY (vault, block, log_index)
+);
+CREATE TABLE IF NOT EXISTS claims (
+    vault TEXT NOT NULL,
+    distributor TEXT NOT NULL,
+    token TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx TEXT NOT NULL,
+    PRIMARY KEY (vault, block, log_index, token)
+);
+"""
+
+
+def _abi_type(param):
+    """Canonical type string of an ABI input, expanding tuples"""
+    if param["type"].startswith("tuple"):
+        inner = ",".join(_abi_type(c) for c in param["components"])
+        return "({}){}".format(inner, param["type"][len("tuple"):])
+    return param["type"]
+
+
+def _normalize(value):
+    if isinstance(value, str) and value.startswith("0x") and len(value) == 42:
+        return to_checksum_address(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class EventDecoder:
+    """Decodes raw logs for a subset of the events in a contract ABI"""
+
+    def __init__(self, abi, names):
+        self.events = {}
+        for item in abi:
+            if item.get("type") == "event" and item["name"] in names:
+                signature = "{}({})".format(item["name"], ",".join(_abi_type(i) for i in item["inputs"]))
+                self.events[HexBytes(keccak(text=signature))] = item
+
+    @property
+    def topics(self):
+        return [t.hex() if t.hex().startswith("0x") else "0x" + t.hex() for t in self.events]
+
+    def decode(self, log):
+        item = self.events.get(HexBytes(log["topics"][0]))
+        if item is None:
+            return None, None
+        indexed = [i for i in item["inputs"] if i["indexed"]]
+        data = [i for i in item["inputs"] if not i["indexed"]]
+
+        args = {}
+        for param, topic in zip(indexed, log["topics"][1:]):
+            args[param["name"]] = _normalize(decode_abi([_abi_type(param)], bytes(HexBytes(topic)))[0])
+        values = decode_abi([_abi_type(i) for i in data], bytes(HexBytes(log["data"])))
+        for param, value in zip(data, values):
+            args[param["name"]] = _normalize(value)
+        return item["name"], args
+
+
+class IndexStore:
+    """SQLite store for the indexed events and the reward accounting rebuilt from them"""
+
+    def __init__(self, path=DEFAULT_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def checkpoint(self, distributor):
+        """Returns (last indexed block, running eligibleEpochRewards) or None"""
+        row = self.db.execute(
+            "SELECT block, eligible FROM checkpoints WHERE distributor = ?", (distributor,)
+        ).fetchone()
+        return None if row is None else (row[0], int(row[1]))
+
+    def epochs(self, distributor):
+        """Returns {epoch: (epochRewards, epochBalance)}"""
+        rows = self.db.execute(
+            "SELECT epoch, rewards, balance FROM epochs WHERE distributor = ?", (distributor,)
+        )
+        return {epoch: (int(rewards), int(balance)) for epoch, rewards, balance in rows}
+
+    def epoch(self, distributor):
+        """The distributors current epoch, ie the number of processed epochs"""
+        row = self.db.execute(
+            "SELECT MAX(epoch) FROM epochs WHERE distributor = ?", (distributor,)
+        ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def users(self, distributor):
+        """Returns {user: (amount, epochStart)}"""
+        rows = self.db.execute(
+            "SELECT user, amount, epoch_start FROM users WHERE distributor = ?", (distributor,)
+        )
+        return {user: (int(amount), epoch_start) for user, amount, epoch_start in rows}
+
+    def ineligible_balances(self, distributor):
+        """Returns {user: (amount, epoch received)}"""
+        rows = self.db.execute(
+            "SELECT user, amount, epoch FROM ineligible_balances WHERE distributor = ?", (distributor,)
+        )
+        return {user: (int(amount), epoch) for user, amount, epoch in rows}
+
+    def emergency_exit(self, distributor):
+        """Returns (emergencyExitEpoch, emergencyVaultBalance, emergencyTargetOut) or None"""
+        row = self.db.execute(
+            "SELECT epoch, vault_balance, target_out FROM emergency_exits WHERE distributor = ?",
+            (distributor,)
+        ).fetchone()
+        return None if row is None else (row[0], int(row[1]), int(row[2]))
+
+    def carry_rates(self, distributor):
+        """Returns {carryRound: carryRoundRate} for the settled carry windows"""
+        rows = self.db.execute(
+            "SELECT round, rate FROM carry_rounds WHERE distributor = ?", (distributor,)
+        )
+        return {round_: int(rate) for round_, rate in rows}
+
+    def user_carries(self, distributor):
+        """Returns {user: (quote, round)}"""
+        rows = self.db.execute(
+            "SELECT user, quote, round FROM user_carries WHERE distributor = ?", (distributor,)
+        )
+        return {user: (int(quote), round_) for user, quote, round_ in rows}
+
+    def carry_exit_round(self, distributor):
+        row = self.db.execute(
+            "SELECT round FROM carry_exits WHERE distributor = ?", (distributor,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def pending_rewards(self, distributor, users=None):
+        """Pending rewards in tokenOut for each user, computed exactly as
+        RewardDistributor.getUserRewards() does from the indexed epochs"""
+        epochs = self.epochs(distributor)
+        current = self.epoch(distributor)
+        exit = self.emergency_exit(distributor)
+        infos = self.users(distributor)
+        carries = self.user_carries(distributor)
+        rates = self.carry_rates(distributor)
+        ineligibles = self.ineligible_balances(distributor)
+        if users is not None:
+            infos = {u: infos.get(u, (0, 0)) for u in users}
+
+        pending = {}
+        for user, (amount, start) in infos.items():
+            rewards = 0
+            if start != 0:
+                # shares received in the start epoch earn from the epoch after
+                ineligible, received = ineligibles.get(user, (0, 0))
+                ineligible = min(ineligible, amount) if received == start else 0
+                rewards = self._epoch_rewards(epochs, start, current, amount - ineligible, exit)
+                if ineligible > 0:
+                    rewards += self._epoch_rewards(epochs, start + 1, current, ineligible, exit)
+            pending[user] = rewards + self._carry_rewards(distributor, user, carries, rates, exit)
+        return pending
+
+    def _epoch_rewards(self, epochs, start, current, amount, exit):
+        rewards = 0
+        if amount == 0:
+            return rewards
+        for e in range(start, current):
+            epochRewards, epochBalance = epochs[e]
+            userRewards = epochRewards * amount // epochBalance
+            if exit is not None and e < exit[0]:
+                userRewards = userRewards * exit[2] // exit[1]
+            rewards += userRewards
+        return rewards
+
+    def _carry_rewards(self, distributor, user, carries, rates, exit):
+        quote, round_ = carries.get(user, (0, 0))
+        if quote == 0 or round_ not in rates:
+            return 0
+        rewards = quote * rates[round_] // CARRY_PRECISION
+        if exit is not None and round_ < self.carry_exit_round(distributor):
+            rewards = rewards * exit[2] // exit[1]
+        return rewards
+
+
+class Indexer:
+    """Streams vault and distributor logs into an IndexStore.
+
+    Logs are fetched in block-range batches and applied in (block, logIndex)
+    order. Each batch is committed together with the checkpoint, so an
+    interrupted sync resumes from the last complete batch. Indexing must start
+    at or before the distributor deployment block as the epoch balances are
+    rebuilt from the UserCheckpoint and EpochProcessed history.
+    """
+
+    def __init__(self, store, vault, distributor, start_block=0, batch_size=DEFAULT_BATCH_SIZE, confirmations=0):
+        self.store = store
+        self.vault = to_checksum_address(str(vault))
+        self.distributor = to_checksum_address(str(distributor))
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+        self.vault_decoder = EventDecoder(vault.abi, VAULT_EVENTS)
+        self.distributor_decoder = EventDecoder(distributor.abi, DISTRIBUTOR_EVENTS)
+
+        checkpoint = store.checkpoint(self.distributor)
+        if checkpoint is None:
+            self.block, self.eligible = start_block - 1, 0
+        else:
+            self.block, self.eligible = checkpoint
+
+    def sync(self, to_block=None):
+        """Indexes up to to_block (default: the confirmed chain head) and returns
+        the last block indexed"""
+        head = web3.eth.block_number - self.confirmations
+        to_block = head if to_block is None else min(to_block, head)
+        while self.block < to_block:
+            end = min(self.block + self.batch_size, to_block)
+            self._index_range(self.block + 1, end)
+            self.block = end
+        return self.block
+
+    def _get_logs(self, address, decoder, from_block, to_block):
+        logs = web3.eth.get_logs({
+            "address": address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [decoder.topics],
+        })
+        return [(log, decoder) for log in logs]
+
+    def _index_range(self, from_block, to_block):
+        logs = (self._get_logs(self.vault, self.vault_decoder, from_block, to_block) +
+                self._get_logs(self.distributor, self.distributor_decoder, from_block, to_block))
+        logs.sort(key=lambda item: (item[0]["blockNumber"], item[0]["logIndex"]))
+
+        with self.store.db:
+            for log, decoder in logs:
+                name, args = decoder.decode(log)
+                if name is not None:
+                    getattr(self, "_on_" + name)(log, args)
+            self.store.db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+                (self.distributor, self.vault, to_block, str(self.eligible)),
+            )
+
+    def _tx(self, log):
+        return HexBytes(log["transactionHash"]).hex()
+
+    def _on_UserCheckpoint(self, log, args):
+        self.eligible = args["eligibleEpochRewards"]
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)",
+            (self.distributor, args["user"], str(args["amount"]), args["epochStart"], log["blockNumber"]),
+        )
+
+    def _on_EpochProcessed(self, log, args):
+        # epochBalance is the eligible balance going into processEpoch and the
+        # event carries the eligible balance for the next epoch
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO epochs VALUES (?, ?, ?, ?, ?)",
+            (self.distributor, args["epoch"], str(args["amountOut"]), str(self.eligible), log["blockNumber"]),
+        )
+        self.eligible = args["eligibleEpochRewards"]
+
+    def _on_VaultEmergencyDisabled(self, log, args):
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO emergency_exits VALUES (?, ?, ?, ?)",
+            (self.distributor, args["epoch"], str(args["vaultBalance"]), str(args["targetOut"])),
+        )
+        # carry windows settled before the exit are scaled like the epochs before it
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO carry_exits SELECT ?, COUNT(*) FROM carry_rounds WHERE distributor = ?",
+            (self.distributor, self.distributor),
+        )
+
+    def _on_EpochRewardsSettled(self, log, args):
+        # carried epochs are processed with no rewards and set when the window settles
+        self.store.db.execute(
+            "UPDATE epochs SET rewards = ? WHERE distributor = ? AND epoch = ?",
+            (str(args["rewards"]), self.distributor, args["epoch"]),
+        )
+
+    def _on_CarrySettled(self, log, args):
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO carry_rounds VALUES (?, ?, ?)",
+            (self.distributor, args["round"], str(args["rate"])),
+        )
+
+    def _on_UserCarryUpdated(self, log, args):
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO user_carries VALUES (?, ?, ?, ?)",
+            (self.distributor, args["user"], str(args["quote"]), args["round"]),
+        )
+
+    def _on_IneligibleBalanceUpdated(self, log, args):
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO ineligible_balances VALUES (?, ?, ?, ?)",
+            (self.distributor, args["user"], str(args["amount"]), args["epoch"]),
+        )
+
+    def _on_UserHarvested(self, log, args):
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO harvests VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.distributor, args["user"], str(args["rewards"]), args["token"],
+             log["blockNumber"], log["logIndex"], self._tx(log)),
+        )
+
+    def _on_flow(self, kind, log, args):
+        self.store.db.execute(
+            "INSERT OR REPLACE INTO flows VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.vault, args["user"], kind, str(args["amount"]), str(args["total"]),
+             log["blockNumber"], log["logIndex"], self._tx(log)),
+        )
+
+    def _on_DepositsIncremented(self, log, args):
+        self._on_flow("deposit", log, args)
+
+    def _on_WithdrawalsIncremented(self, log, args):
+        self._on_flow("withdraw", log, args)
+
+    def _on_RewardsClaimed(self, log, args):
+        for token, amount in args["rewards"]:
+            self.store.db.execute(
+                "INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.vault, args["distributor"], token, str(amount),
+                 log["blockNumber"], log["logIndex"], self._tx(log)),
+            )
+
+
+def reconcile(store, distributor, users):
+    """Compares indexed pending rewards with getUserRewards() for a sample of
+    users. Returns a list of (user, indexed, onchain) mismatches."""
+    indexed = store.pending_rewards(str(distributor), [str(u) for u in users])
+    mismatches = []
+    for user in users:
+        onchain = distributor.getUserRewards(user)
+        if indexed[str(user)] != onchain:
+            mismatches.append((str(user), indexed[str(user)], onchain))
+    return mismatches
+
+
+def main(vault, distributor, db_path=DEFAULT_DB, start_block=0):
+    from brownie import RedirectVault, RewardDistributor
+
+    vault = RedirectVault.at(vault)
+    distributor = RewardDistributor.at(distributor)
+    store = IndexStore(db_path)
+    block = Indexer(store, vault, distributor, int(start_block)).sync()
+
+    epochs = store.epochs(distributor.address)
+    print("Indexed to block {}: {} epochs, {} users".format(
+        block, len(epochs), len(store.users(distributor.address))))
+    for epoch in sorted(epochs)[-10:]:
+        print("epoch {:>6} rewards {:>30} balance {:>30}".format(epoch, *epochs[epoch]))
@@ -0,0 +1,236 @@
+import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from brownie import accounts, interface, web3
+from scripts.gas_report import percentile
+
+WFTM = '0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83'
+
+DEFAULT_POLL_INTERVAL = 30
+DEFAULT_CONCURRENCY = 16
+DEFAULT_GAS_MULTIPLIER = 1.2
+
+
+class Metrics:
+    """Counters and latency samples exposed in the Prometheus text format"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = defaultdict(int)
+        self.latencies = defaultdict(list)
+
+    def inc(self, name, value=1):
+        self.counters[name] += value
+
+    def observe(self, name, seconds):
+        samples = self.latencies[name]
+        samples.append(seconds)
+        # bounded so a long running keeper doesn't grow without limit
+        if len(samples) > 10000:
+            del samples[:len(samples) - 10000]
+
+    def render(self):
+        uptime = time.monotonic() - self.started
+        lines = ["keeper_uptime_seconds {:.3f}".format(uptime)]
+        for name in sorted(self.counters):
+            lines.append("keeper_{}_total {}".format(name, self.counters[name]))
+        lines.append("keeper_harvests_per_minute {:.4f}".format(self.counters["confirmed"] * 60 / max(uptime, 1e-9)))
+        for name in sorted(self.latencies):
+            samples = self.latencies[name]
+            for q in (50, 90, 99):
+                lines.append('keeper_{}_seconds{{quantile="0.{}"}} {:.6f}'.format(name, q, percentile(samples, q)))
+            lines.append("keeper_{}_seconds_count {}".format(name, len(samples)))
+        return "\n".join(lines) + "\n"
+
+
+class NonceManager:
+    """Hands out sequential nonces for one account across concurrent submissions.
+
+    The nonce is taken and the transaction broadcast under one lock, so nonces
+    are never skipped or reused; everything before (quotes, gas estimates) and
+    after (waiting for confirmations) runs concurrently."""
+
+    def __init__(self, account):
+        self.account = account
+        self.nonce = None
+        self._lock = None
+        self._loop = None
+
+    @property
+    def lock(self):
+        # asyncio locks are bound to one event loop, make one per loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    def _sync(self):
+        self.nonce = web3.eth.get_transaction_count(self.account.address, "pending")
+
+    async def send(self, run, fn):
+        async with self.lock:
+            if self.nonce is None:
+                await run(self._sync)
+            try:
+                tx = await run(lambda: fn(self.nonce))
+            except Exception:
+                # the transaction may or may not have been broadcast, ask the node
+                await run(self._sync)
+                raise
+            self.nonce += 1
+            return tx
+
+
+class Keeper:
+    """Polls harvestTrigger() for a fleet of RedirectVaults and harvests them concurrently.
+
+    An epoch is skipped while the value of the rewards that would be claimed,
+    quoted in the distributors targetToken, is below min_reward_value (or the
+    per-vault value in min_reward_values). Rewards that can't be quoted never
+    cause a skip."""
+
+    def __init__(self, account, vaults, min_reward_value=0, min_reward_values=None,
+                 concurrency=DEFAULT_CONCURRENCY, poll_interval=DEFAULT_POLL_INTERVAL,
+                 gas_multiplier=DEFAULT_GAS_MULTIPLIER, required_confs=1):
+        self.account = account
+        self.vaults = [str(v) for v in vaults]
+        self.min_reward_value = min_reward_value
+        self.min_reward_values = {str(k): v for k, v in (min_reward_values or {}).items()}
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.gas_multiplier = gas_multiplier
+        self.required_confs = required_confs
+        self.metrics = Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.nonces = NonceManager(account)
+        self.in_flight = set()
+        self.errors = {}
+        self._contracts = {}
+
+    async def _run(self, fn):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn)
+
+    def _load(self, address):
+        if address not in self._contracts:
+            from brownie import RedirectVault, RewardDistributor
+            vault = RedirectVault.at(address)
+            distributor = RewardDistributor.at(vault.distributor())
+            strategy = interface.IStrategy(vault.strategy())
+            router = interface.IUniswapV2Router01(distributor.router())
+            self._contracts[address] = (vault, distributor, strategy, router)
+        return self._contracts[address]
+
+    def pending_reward_value(self, address):
+        """Value of the rewards a harvest would process, in targetToken. Returns
+        None if any reward token can't be quoted."""
+        vault, distributor, strategy, router = self._load(address)
+        target = distributor.targetToken()
+        rewards = strategy.claim.call(distributor, {"from": vault.address})
+        value = 0
+        for token, amount in rewards:
+            amount += interface.IERC20(token).balanceOf(distributor)
+            if amount == 0:
+                continue
+            if token == target:
+                value += amount
+                continue
+            path = [token, target] if WFTM in (token, target) else [token, WFTM, target]
+            try:
+                value += router.getAmountsOut(amount, path)[-1]
+            except Exception:
+                return None
+        return value
+
+    async def process_vault(self, address):
+        """Checks one vault and harvests it if due. Returns the receipt or None"""
+        if address in self.in_flight:
+            return None
+        self.in_flight.add(address)
+        try:
+            return await self._process_vault(address)
+        except Exception as e:
+            # one failing vault must not stop the others, the error is kept for inspection
+            self.errors[address] = e
+            self.metrics.inc("failed")
+            return None
+        finally:
+            self.in_flight.discard(address)
+
+    async def _process_vault(self, address):
+        vault = (await self._run(lambda: self._load(address)))[0]
+
+        start = time.monotonic()
+        triggered = await self._run(vault.harvestTrigger)
+        self.metrics.observe("poll", time.monotonic() - start)
+        self.metrics.inc("polls")
+        if not triggered:
+            return None
+        self.metrics.inc("triggered")
+
+        threshold = self.min_reward_values.get(address, self.min_reward_value)
+        if threshold > 0:
+            value = await self._run(lambda: self.pending_reward_value(address))
+            if value is not None and value < threshold:
+                self.metrics.inc("skipped")
+                return None
+
+        start = time.monotonic()
+        gas = await self._run(lambda: vault.harvest.estimate_gas({"from": self.account}))
+        gas_limit = int(gas * self.gas_multiplier)
+        tx = await self.nonces.send(self._run, lambda nonce: vault.harvest({
+            "from": self.account,
+            "nonce": nonce,
+            "gas_limit": gas_limit,
+            "required_confs": 0,
+        }))
+        self.metrics.observe("submit", time.monotonic() - start)
+        self.metrics.inc("submitted")
+
+        if self.required_confs > 0:
+            await self._run(lambda: tx.wait(self.required_confs))
+            if tx.status != 1:
+                raise RuntimeError("harvest reverted for {}".format(address))
+        self.metrics.observe("harvest", time.monotonic() - start)
+        self.metrics.inc("confirmed")
+        return tx
+
+    async def run_once(self):
+        """Polls every vault once, harvesting those that are due"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(address):
+            async with semaphore:
+                return await self.process_vault(address)
+
+        start = time.monotonic()
+        results = await asyncio.gather(*[bounded(v) for v in self.vaults])
+        self.metrics.observe("round", time.monotonic() - start)
+        self.metrics.inc("rounds")
+        return dict(zip(self.vaults, results))
+
+    async def serve_metrics(self, host="127.0.0.1", port=9105):
+        async def handle(reader, writer):
+            await reader.read(4096)
+            body = self.metrics.render().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n")
+            writer.write("Content-Length: {}\r\n\r\n".format(len(body)).encode() + body)
+            await writer.drain()
+            writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    async def run_forever(self, metrics_port=9105):
+        server = await self.serve_metrics(port=metrics_port) if metrics_port else None
+        try:
+            while True:
+                await self.run_once()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if server is not None:
+                server.close()
+
+
+def main(min_reward_value, *vaults):
+    keeper = Keeper(accounts.load("keeper"), vaults, min_reward_value=int(min_reward_value))
+    asyncio.run(keeper.run_forever())
@@ -0,0 +1,94 @@
+import time
+from brownie import accounts
+from brownie.convert import to_address
+
+DEFAULT_TTL = 15
+# Upper bound on vault/user pairs per eth_call, keeps calls under node gas caps
+MAX_USER_STATES = 200
+MAX_VAULT_STATES = 50
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def struct_fields(contract, function):
+    """Field names of the tuple[] returned by a lens function, read from its ABI"""
+    abi = next(item for item in contract.abi if item.get("name") == function)
+    return [component["name"] for component in abi["outputs"][0]["components"]]
+
+
+class LensClient:
+    """Batches, decodes and caches RedirectLens calls.
+
+    Vault and user state is fetched with as few eth_calls as possible, decoded
+    into dicts keyed by the lens struct field names and cached for ``ttl``
+    seconds, so a dashboard refresh costs a handful of calls instead of one
+    call per getter per vault per user.
+    """
+
+    def __init__(self, lens, ttl=DEFAULT_TTL):
+        self.lens = lens
+        self.ttl = ttl
+        self.vault_fields = struct_fields(lens, "getVaults")
+        self.user_fields = struct_fields(lens, "getUsers")
+        self._cache = {}
+
+    @classmethod
+    def deploy(cls, account=None, ttl=DEFAULT_TTL):
+        from brownie import RedirectLens
+        return cls(RedirectLens.deploy({"from": account or accounts[0]}), ttl)
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _store(self, key, value):
+        self._cache[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._cache.clear()
+
+    def vaults(self, vaults):
+        """Returns {vault: state} for each vault address"""
+        vaults = [to_address(str(v)) for v in vaults]
+        missing = [v for v in vaults if self._cached(("vault", v)) is None]
+        for batch in chunks(missing, MAX_VAULT_STATES):
+            for state in self.lens.getVaults(batch):
+                state = dict(zip(self.vault_fields, state))
+                self._store(("vault", state["vault"]), state)
+        return {v: self._cached(("vault", v)) for v in vaults}
+
+    def users(self, vaults, users):
+        """Returns {(vault, user): state} for every user in every vault"""
+        vaults = [to_address(str(v)) for v in vaults]
+        users = [to_address(str(u)) for u in users]
+        missing = [u for u in users if any(self._cached(("user", v, u)) is None for v in vaults)]
+
+        per_call = max(1, MAX_USER_STATES // max(1, len(vaults)))
+        for user_batch in chunks(missing, per_call):
+            for vault_batch in chunks(vaults, MAX_USER_STATES):
+                for state in self.lens.getUsers(vault_batch, user_batch):
+                    state = dict(zip(self.user_fields, state))
+                    self._store(("user", state["vault"], state["user"]), state)
+        return {(v, u): self._cached(("user", v, u)) for v in vaults for u in users}
+
+    def positions(self, vaults, user):
+        """Combined vault and user state for one user, as used by the dashboard"""
+        vaults = [to_address(str(v)) for v in vaults]
+        user = to_address(str(user))
+        vault_states = self.vaults(vaults)
+        user_states = self.users(vaults, [user])
+        return [dict(vault=vault_states[v], user=user_states[(v, user)]) for v in vaults]
+
+    def lp_price(self, router, pair, quote_token, weth):
+        """Price of 1e18 LP tokens in quote_token units"""
+        key = ("lp_price", str(router), str(pair), str(quote_token))
+        price = self._cached(key)
+        if price is None:
+            price = self.lens.getLpPrice(router, pair, quote_token, weth)
+            self._store(key, price)
+        return price
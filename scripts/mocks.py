@@ -0,0 +1,112 @@
+from brownie import accounts, web3
+
+# Addresses hard-coded in the strategies and the RewardDistributor. On a local dev
+# chain the mocks are deployed and then their runtime code is copied to these addresses.
+WFTM = '0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83'
+LQDR = '0x10b620b2dbAC4Faa7D7FFD71Da486f5D44cd86f9'
+BEETS = '0xF24Bcf4d1e507740041C9cFd2DddB29585aDCe1e'
+OXD = '0xc5A9848b9d145965d821AaeC8fA32aaEE026492d'
+SOLID = '0x888EF71766ca594DED1F0FA3AE64eD2941740A20'
+LQDR_MASTERCHEF = '0x6e2ad6527901c9664f016466b8DA1357a004db0f'
+BEETS_MASTERCHEF = '0x8166994d9ebBe5829EC86Bd81258149B87faCfd3'
+SOLIDLY_ROUTER = '0xa38cd27185a464914D3046f0AB9d43356B34829D'
+OX_LENS = '0xDA00137c79B30bfE06d04733349d98Cf06320e69'
+OXDAO = '0XDAO'
+
+# USD prices scaled by 1e18 and emissions per second, fixed so runs are deterministic
+PRICES = {WFTM: 10 ** 18, LQDR: 2 * 10 ** 18, BEETS: 5 * 10 ** 17, OXD: 10 ** 17, SOLID: 5 * 10 ** 17}
+REWARD_PER_SECOND = 10 ** 17
+SEED_LIQUIDITY = 10 ** 27
+
+
+def etch(container, address, deployer):
+    """Deploys container and copies its runtime code to address"""
+    instance = container.deploy({'from': deployer})
+    code = web3.eth.get_code(instance.address).hex()
+    for method in ("evm_setAccountCode", "hardhat_setCode", "anvil_setCode"):
+        response = web3.provider.make_request(method, [address, code])
+        if "error" not in response:
+            return container.at(address)
+    raise RuntimeError("The dev chain does not support setting account code")
+
+
+class LocalEnv:
+    """Deploys mock farms, routers, tokens and a target vault on a plain dev chain.
+
+    pool() takes an entry from tests/conftest.py CONFIG and returns a copy pointing
+    at a freshly deployed mock LP that is registered with the matching mock farm,
+    so the same fixtures run against the fork or the local chain."""
+
+    def __init__(self, deployer=None):
+        from brownie import (MockERC20, MockMasterChef, MockOxLens, MockRouter,
+                             MockSolidlyRouter, MockVault)
+
+        self.deployer = deployer or accounts[-1]
+        d = {'from': self.deployer}
+
+        self.tokens = {}
+        for address, name, symbol in [(WFTM, "Wrapped Fantom", "WFTM"), (LQDR, "Liquid Driver", "LQDR"),
+                                      (BEETS, "BeethovenxToken", "BEETS"), (OXD, "0xDAO", "OXD"), (SOLID, "Solid", "SOLID")]:
+            self.tokens[address] = etch(MockERC20, address, self.deployer)
+            self.tokens[address].initialize(name, symbol, 18, d)
+
+        self.usdc = MockERC20.deploy(d)
+        self.usdc.initialize("USD Coin", "USDC", 6, d)
+        self.yvusdc = MockVault.deploy(d)
+        self.yvusdc.initializeVault(self.usdc, d)
+
+        self.router = MockRouter.deploy(d)
+        self.solidly_router = etch(MockSolidlyRouter, SOLIDLY_ROUTER, self.deployer)
+        for router in (self.router, self.solidly_router):
+            router.setPrice(self.usdc, 10 ** 18, d)
+            for token, price in PRICES.items():
+                router.setPrice(token, price, d)
+
+        self.chefs = {}
+        for address, reward in [(LQDR_MASTERCHEF, LQDR), (BEETS_MASTERCHEF, BEETS)]:
+            self.chefs[address] = etch(MockMasterChef, address, self.deployer)
+            self.chefs[address].initialize(reward, d)
+
+        self.ox_lens = etch(MockOxLens, OX_LENS, self.deployer)
+
+    def pool(self, conf):
+        from brownie import MockERC20, MockMultiRewards, MockOxPool, MockPair
+
+        d = {'from': self.deployer}
+        token0 = MockERC20.deploy(d)
+        token0.initialize("Mock Token", "MOCK", 18, d)
+        lp = MockPair.deploy(d)
+        lp.initializePair(token0, WFTM, d)
+        token0.mint(lp, SEED_LIQUIDITY, d)
+        self.tokens[WFTM].mint(lp, SEED_LIQUIDITY, d)
+        lp.mint(self.deployer, d)
+
+        for router in (self.router, self.solidly_router):
+            router.setPrice(token0, 10 ** 18, d)
+            router.setPair(lp, d)
+
+        if conf['farmAddress'] == OXDAO:
+            staking = MockMultiRewards.deploy(d)
+            ox_pool = MockOxPool.deploy(d)
+            ox_pool.initializeOxPool(lp, staking, d)
+            staking.initializeStaking(ox_pool, d)
+            staking.setRewardRate(OXD, REWARD_PER_SECOND, d)
+            staking.setRewardRate(SOLID, REWARD_PER_SECOND, d)
+            self.ox_lens.setOxPool(lp, ox_pool, d)
+        else:
+            self.chefs[conf['farmAddress']].add(conf['pid'], lp, REWARD_PER_SECOND, d)
+
+        return dict(
+            conf,
+            token=lp.address,
+            targetToken=self.usdc.address,
+            targetVault=self.yvusdc.address,
+            router=self.router.address,
+            weth=WFTM,
+            whale=self.deployer.address,
+        )
+
+
+def main():
+    env = LocalEnv()
+    print("USDC: {}\nyvUSDC: {}\nrouter: {}".format(env.usdc, env.yvusdc, env.router))
@@ -0,0 +1,223 @@
+import json
+import os
+from collections import defaultdict
+from brownie import accounts, chain, web3
+from scripts.gas_report import summarize
+
+DEFAULT_REPORT = "./reports/replay.json"
+# epochs per row of the report, gas is summarized per window to show how it grows with state
+DEFAULT_WINDOW = 50
+# transactions of a fast-forward are sent without estimating gas, this is their limit
+FAST_FORWARD_GAS = 8_000_000
+# operations whose p99 passes this fraction of the block gas limit are reported as cliffs
+CLIFF_THRESHOLD = 0.5
+
+OPERATIONS = {
+    "deposit": "RedirectVault.deposit",
+    "withdraw": "RedirectVault.withdraw",
+    "emergency_withdraw": "RedirectVault.emergencyWithdrawAll",
+    "harvest": "RewardDistributor.harvest",
+    "process": "RedirectVault.harvest",
+}
+
+
+def trace_from_index(store, vault, distributor):
+    """Action trace of a production vault from the indexer's store (scripts/indexer.py),
+    in block order. Users are numbered by their first appearance. Withdrawals are
+    given in LP, which replays as shares while the price per share is 1."""
+    rows = [(block, log_index, 1, "deposit" if kind == "deposit" else "withdraw", user, int(amount))
+            for user, kind, amount, block, log_index in store.db.execute(
+                "SELECT user, kind, amount, block, log_index FROM flows WHERE vault = ?", (vault,))]
+    rows += [(block, log_index, 1, "harvest", user, 0) for user, block, log_index in store.db.execute(
+        "SELECT user, block, log_index FROM harvests WHERE distributor = ?", (distributor,))]
+    # epochs are processed after the user actions of their block
+    rows += [(block, 0, 2, "process", None, 0) for (block,) in store.db.execute(
+        "SELECT block FROM epochs WHERE distributor = ?", (distributor,))]
+
+    users = {}
+    trace = []
+    for block, _, _, action, user, amount in sorted(rows, key=lambda row: (row[0], row[2], row[1])):
+        step = {"action": action, "block": block}
+        if user is not None:
+            step["user"] = users.setdefault(user, len(users))
+        if action == "deposit":
+            step["amount"] = amount
+        elif action == "withdraw":
+            step["shares"] = amount
+        trace.append(step)
+    return trace
+
+
+class WorkloadReplay:
+    """Replays an action trace (see scripts/simulator.py) against a deployed vault.
+
+    Each trace user is a fresh local account, funded with LP by fund(account, amount)
+    before its deposits. Runs of "process" steps with no user action between them
+    are fast-forwarded: the epochs are harvested back to back without estimating
+    gas or waiting for receipts, which are collected afterwards. Gas is recorded
+    per operation and per window of epochs, so the report shows how each
+    operation's cost grows as the distributor's state does."""
+
+    def __init__(self, vault, distributor, keeper, fund, funder=None, window=DEFAULT_WINDOW):
+        from brownie import interface
+
+        self.vault = vault
+        self.token = interface.IERC20(vault.token())
+        self.distributor = distributor
+        self.keeper = keeper
+        self.fund = fund
+        self.funder = funder or keeper
+        self.window = window
+        self.time_per_epoch = distributor.timePerEpoch()
+        self.users = {}
+        self.samples = defaultdict(list)
+        self.skipped = defaultdict(int)
+        self.failed = []
+
+    def account(self, user):
+        if user not in self.users:
+            account = accounts.add()
+            self.funder.transfer(account, "1 ether")
+            self.token.approve(self.vault, 2 ** 256 - 1, {"from": account})
+            self.users[user] = account
+        return self.users[user]
+
+    def record(self, action, epoch, tx):
+        if tx.status != 1:
+            self.failed.append((action, epoch, tx.txid))
+            return
+        self.samples[(action, epoch // self.window)].append(tx.gas_used)
+
+    def run(self, trace):
+        idle_epochs = 0
+        for step in trace:
+            action = step["action"]
+            if action == "process":
+                idle_epochs += 1
+                continue
+            if idle_epochs:
+                self.fast_forward(idle_epochs)
+                idle_epochs = 0
+
+            account = self.account(step["user"])
+            epoch = self.distributor.epoch()
+            if action == "deposit":
+                balance = self.token.balanceOf(account)
+                if balance < step["amount"]:
+                    self.fund(account, step["amount"] - balance)
+                tx = self.vault.deposit(step["amount"], {"from": account})
+            elif action == "withdraw":
+                shares = min(step["shares"], self.vault.balanceOf(account))
+                if shares == 0:
+                    self.skipped[action] += 1
+                    continue
+                tx = self.vault.withdraw(shares, {"from": account})
+            elif action == "emergency_withdraw":
+                if self.vault.balanceOf(account) == 0:
+                    self.skipped[action] += 1
+                    continue
+                tx = self.vault.emergencyWithdrawAll({"from": account})
+            elif action == "harvest":
+                # a harvest with nothing to claim reverts
+                if self.distributor.getUserRewards(account) == 0:
+                    self.skipped[action] += 1
+                    continue
+                tx = self.distributor.harvest({"from": account})
+            else:
+                self.skipped[action] += 1
+                continue
+            self.record(action, epoch, tx)
+        if idle_epochs:
+            self.fast_forward(idle_epochs)
+
+    def fast_forward(self, epochs):
+        """Processes epochs back to back. Each harvest is sent as soon as the chain
+        time passes the end of the epoch, the receipts are waited on at the end."""
+        start = self.distributor.epoch()
+        pending = []
+        for i in range(epochs):
+            chain.sleep(self.time_per_epoch + 1)
+            pending.append((start + i, self.vault.harvest(
+                {"from": self.keeper, "gas_limit": FAST_FORWARD_GAS, "required_confs": 0})))
+        for epoch, tx in pending:
+            tx.wait(1)
+            self.record("process", epoch, tx)
+
+    def report(self):
+        """{operation: [{"epochs": "from-to", count, min, p50, p90, p99, max}]} by window"""
+        report = defaultdict(list)
+        for (action, window), values in sorted(self.samples.items()):
+            row = {"epochs": "{}-{}".format(window * self.window, (window + 1) * self.window - 1)}
+            row.update(summarize(values))
+            report[OPERATIONS[action]].append(row)
+        return dict(report)
+
+    def cliffs(self, block_gas_limit, threshold=CLIFF_THRESHOLD):
+        """(operation, epochs, p99) of the windows whose p99 passes threshold of the block gas limit"""
+        return [(operation, row["epochs"], row["p99"])
+                for operation, rows in self.report().items() for row in rows
+                if row["p99"] > block_gas_limit * threshold]
+
+    def write(self, path=DEFAULT_REPORT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        block_gas_limit = web3.eth.get_block("latest")["gasLimit"]
+        with open(path, "w") as f:
+            json.dump({
+                "epochs": self.distributor.epoch(),
+                "users": len(self.users),
+                "report": self.report(),
+                "cliffs": self.cliffs(block_gas_limit),
+                "skipped": dict(self.skipped),
+                "failed": self.failed,
+            }, f, indent=2, sort_keys=True)
+
+
+def load_trace(source, days, n_users, vault=None, distributor=None):
+    if source == "synthetic":
+        from scripts.simulator import generate_trace
+        return generate_trace(n_users, days * 86400)
+    if source.endswith(".sqlite"):
+        from scripts.indexer import IndexStore
+        return trace_from_index(IndexStore(source), vault, distributor)
+    with open(source) as f:
+        return json.load(f)
+
+
+def main(source="synthetic", days=30, n_users=20, indexed_vault=None, indexed_distributor=None):
+    """Replays a trace against a vault on the local mocks. source is "synthetic"
+    (scripts.simulator.generate_trace over days), a JSON trace, or an indexer
+    database along with the production vault and distributor it indexed."""
+    from brownie import interface, RedirectVault, RewardDistributor, StrategyLiquidDriver
+    from scripts.mocks import LocalEnv, LQDR, LQDR_MASTERCHEF
+
+    env = LocalEnv()
+    conf = env.pool({"farmAddress": LQDR_MASTERCHEF, "farmToken": LQDR, "pid": 0})
+    gov = accounts[0]
+    d = {"from": gov}
+    vault = RedirectVault.deploy(conf["token"], "Yield Redirect Replay", "yrREPLAY", 2 ** 256 - 1,
+                                 conf["targetToken"], conf["targetVault"], 0, d)
+    distributor = RewardDistributor.deploy(vault, conf["router"], gov, d)
+    strategy = StrategyLiquidDriver.deploy(vault, conf["token"], 0, d)
+    distributor.permitRewardToken(LQDR, d)
+    vault.initialize(strategy, distributor, d)
+
+    lp = interface.IERC20(conf["token"])
+    whale = accounts.at(conf["whale"], force=True)
+
+    def fund(account, amount):
+        lp.transfer(account, amount, {"from": whale})
+
+    trace = load_trace(source, int(days), int(n_users), indexed_vault, indexed_distributor)
+    replay = WorkloadReplay(vault, distributor, gov, fund)
+    replay.run(trace)
+    replay.write()
+
+    print("{} epochs, {} users, {} skipped, {} failed".format(
+        distributor.epoch(), len(replay.users), sum(replay.skipped.values()), len(replay.failed)))
+    print("{:<36} {:>10} {:>10} {:>10} {:>10}".format("operation", "epochs", "p50", "p99", "max"))
+    for operation, rows in replay.report().items():
+        for row in rows:
+            print("{:<36} {:>10} {:>10} {:>10} {:>10}".format(
+                operation, row["epochs"], row["p50"], row["p99"], row["max"]))
+    for operation, epochs, p99 in replay.cliffs(web3.eth.get_block("latest")["gasLimit"]):
+        print("gas cliff: {} p99 {} at epochs {}".format(operation, p99, epochs))
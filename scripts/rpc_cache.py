@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_UPSTREAM = "https://rpc.ftm.tools"
+DEFAULT_CACHE_DIR = "./.rpc_cache"
+DEFAULT_PORT = 8549
+
+# block tags that would make a response depend on when it was fetched
+BLOCK_TAGS = ("latest", "pending", "safe", "finalized")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    response BLOB NOT NULL
+);
+"""
+
+
+class NotRecorded(Exception):
+    pass
+
+
+class RpcStore:
+    """Recorded JSON-RPC responses for one pinned block, stored zlib compressed in sqlite"""
+
+    def __init__(self, cache_dir, chain, block):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "{}-{}.sqlite".format(chain, block))
+        self.block = block
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    @staticmethod
+    def latest_block(cache_dir, chain):
+        """Block of the newest store in cache_dir, None if there is none"""
+        if not os.path.isdir(cache_dir):
+            return None
+        blocks = [int(f[len(chain) + 1:-7]) for f in os.listdir(cache_dir)
+                  if f.startswith(chain + "-") and f.endswith(".sqlite")]
+        return max(blocks) if blocks else None
+
+    @staticmethod
+    def key(method, params):
+        # hex is case insensitive, checksummed and lower case addresses share an entry
+        normalized = json.dumps([method, params], sort_keys=True, separators=(",", ":")).lower()
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, method, response):
+        data = zlib.compress(json.dumps(response, separators=(",", ":")).encode())
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, method, data))
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.db.execute("SELECT method, COUNT(*) FROM responses GROUP BY method").fetchall())
+
+
+class RpcCache:
+    """Records and replays the upstream RPC of a forked chain.
+
+    The fork node is pointed at this cache instead of the upstream node. Block
+    tags such as "latest" are pinned to one block, so every response is
+    deterministic and can be stored. In "record" mode, requests missing from the
+    store are forwarded upstream and saved. In "replay" mode nothing is
+    forwarded and a missing request is an error."""
+
+    def __init__(self, store, upstream=DEFAULT_UPSTREAM, mode="record"):
+        self.store = store
+        self.upstream = upstream
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    def pin(self, params):
+        block = hex(self.store.block)
+        return [block if p in BLOCK_TAGS else p for p in params]
+
+    def forward(self, payload):
+        request = urllib.request.Request(self.upstream, data=json.dumps(payload).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.loads(response.read())
+
+    def call(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(self.store.block)
+        params = self.pin(params)
+        key = self.store.key(method, params)
+        cached = self.store.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        if self.mode == "replay":
+            raise NotRecorded("{} {} was not recorded at block {}".format(method, params, self.store.block))
+        self.misses += 1
+        response = self.forward({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        if "error" in response:
+            raise NotRecorded(response["error"].get("message", "upstream error"))
+        self.store.put(key, method, response["result"])
+        return response["result"]
+
+    def handle(self, request):
+        try:
+            result = self.call(request["method"], request.get("params", []))
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+    def serve(self, port=DEFAULT_PORT):
+        """Starts serving in a background thread and returns the server"""
+        cache = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if isinstance(payload, list):
+                    response = [cache.handle(request) for request in payload]
+                else:
+                    response = cache.handle(payload)
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def open_cache(mode, block=None, upstream=DEFAULT_UPSTREAM, cache_dir=DEFAULT_CACHE_DIR, chain="ftm"):
+    """RpcCache for block. Replay defaults to the newest recording and record to the
+    upstream's current block"""
+    if block is None:
+        block = RpcStore.latest_block(cache_dir, chain)
+    if block is None:
+        if mode == "replay":
+            raise NotRecorded("no recording in {}".format(cache_dir))
+        block = int(RpcCache(None, upstream).forward(
+            {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []})["result"], 16)
+    return RpcCache(RpcStore(cache_dir, chain, int(block)), upstream, mode)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay the upstream RPC of fork tests")
+    parser.add_argument("--mode", choices=("record", "replay"), default="record",
+                        help="record forwards and saves missing requests, replay never goes upstream")
+    parser.add_argument("--block", type=int, default=os.environ.get("FORK_BLOCK"), help="block to pin")
+    parser.add_argument("--upstream", default=os.environ.get("FTM_RPC", DEFAULT_UPSTREAM))
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command run while the cache is served")
+    args = parser.parse_args(argv)
+
+    cache = open_cache(args.mode, args.block, args.upstream, args.cache_dir)
+    server = cache.serve(args.port)
+    print("rpc cache: {} block {} on port {}".format(args.mode, cache.store.block, args.port))
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    try:
+        if not command:
+            threading.Event().wait()
+        returncode = subprocess.call(command)
+    finally:
+        server.shutdown()
+        print("rpc cache: {} hits, {} requests recorded, {}".format(cache.hits, cache.misses, cache.store.stats()))
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
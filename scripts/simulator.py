@@ -0,0 +1,239 @@
+import numpy as np
+
+BPS_ADJ = 10000
+PRICE_PRECISION = 10 ** 18
+
+# Action trace format. A trace is a list of dicts applied in order:
+#   {"action": "deposit", "user": i, "amount": lp}        RedirectVault.deposit
+#   {"action": "withdraw", "user": i, "shares": shares}   RedirectVault.withdraw
+#   {"action": "emergency_withdraw", "user": i}           RedirectVault.emergencyWithdrawAll
+#   {"action": "harvest", "user": i}                      RewardDistributor.harvest
+#   {"action": "process", "rewards": n}                   RedirectVault.harvest, with n reward
+#                                                         tokens claimed from the farm, or
+#   {"action": "process", "amount_out": n}                with the tokenOut received by processEpoch
+#   {"action": "emergency_exit", "vault_balance": n, "target_out": m}
+#                                                         RewardDistributor.emergencyDisableVault
+# Actions may carry a "time" key, used by generate_trace() and ignored by the simulator.
+
+
+class SwapModel:
+    """Converts reward tokens held by the distributor to tokenOut as
+    RewardDistributor._sellRewards does, at a fixed price.
+
+    Only minProfitThreshold = 0 is modelled. Any other value puts the contract
+    in carry mode, where rewards are held and split between epochs by their
+    quoted value, which the simulator doesn't reproduce."""
+
+    def __init__(self, price=PRICE_PRECISION, profitFee=500, profitConversionPercent=10000, minProfitThreshold=0):
+        if minProfitThreshold != 0:
+            raise ValueError("carry mode (minProfitThreshold > 0) is not simulated")
+        self.price = price
+        self.profitFee = profitFee
+        self.profitConversionPercent = profitConversionPercent
+        self.minProfitThreshold = minProfitThreshold
+
+    def convert(self, inventory):
+        """Returns (tokens sold, fee, tokenOut received) for a reward token balance"""
+        swapAmt = inventory * self.profitConversionPercent // BPS_ADJ
+        fee = swapAmt * self.profitFee // BPS_ADJ
+        return swapAmt, fee, (swapAmt - fee) * self.price // PRICE_PRECISION
+
+
+class RewardSimulator:
+    """Reproduces the RedirectVault share and RewardDistributor epoch accounting.
+
+    Balances are numpy object arrays holding python ints so every result is
+    exact to the wei. Pending rewards are evaluated as array operations over
+    the epoch range a user is owed, and pending_all() evaluates every user at
+    once in chunks of a users x epochs matrix.
+    """
+
+    def __init__(self, n_users, swap_model=None, capacity=1024):
+        self.swap_model = swap_model or SwapModel()
+
+        # RedirectVault
+        self.shares = np.zeros(n_users, dtype=object)
+        self.total_supply = 0
+        self.pool = 0
+
+        # RewardDistributor
+        self.amount = np.zeros(n_users, dtype=object)
+        self.epoch_start = np.zeros(n_users, dtype=np.int64)
+        self.claimed = np.zeros(n_users, dtype=object)
+        self.epoch_rewards = np.zeros(capacity, dtype=object)
+        self.epoch_balance = np.zeros(capacity, dtype=object)
+        self.epoch = 0
+        self.eligible = 0
+        self.target_balance = 0
+        self.inventory = 0
+        self.fees = 0
+        self.exit = None
+
+    def run(self, trace):
+        for step in trace:
+            action = dict(step)
+            getattr(self, action.pop("action"))(**{k: v for k, v in action.items() if k != "time"})
+        return self
+
+    # RedirectVault
+
+    def deposit(self, user, amount):
+        before = self.shares[user]
+        minted = amount if self.total_supply == 0 else amount * self.total_supply // self.pool
+        self.shares[user] += minted
+        self.total_supply += minted
+        self.pool += amount
+        self._on_deposit(user, before)
+
+    def withdraw(self, user, shares):
+        assert 0 < shares <= self.shares[user], "withdraw exceeds balance"
+        self.pool -= self.pool * shares // self.total_supply
+        self.shares[user] -= shares
+        self.total_supply -= shares
+        self._on_withdraw(user, shares)
+
+    def emergency_withdraw(self, user):
+        shares = self.shares[user]
+        assert shares > 0, "please provide amount"
+        self.pool -= self.pool * shares // self.total_supply
+        self.shares[user] = 0
+        self.total_supply -= shares
+        self._update_user_info(user, self.epoch)
+
+    def process(self, rewards=0, amount_out=None):
+        self.inventory += rewards
+        if self.eligible > 0:
+            if amount_out is None:
+                swapAmt, fee, amount_out = self.swap_model.convert(self.inventory)
+                self.inventory -= swapAmt
+                self.fees += fee
+        else:
+            amount_out = 0
+        self.target_balance += amount_out
+
+        self._grow()
+        self.epoch_rewards[self.epoch] = amount_out
+        self.epoch_balance[self.epoch] = self.eligible
+        self.eligible = self.total_supply
+        self.epoch += 1
+
+    # RewardDistributor
+
+    def harvest(self, user):
+        rewards = self.pending(user)
+        assert rewards > 0, "user must have balance to claim"
+        self._disburse(user, rewards)
+        self._update_user_info(user, self.epoch)
+
+    def emergency_exit(self, vault_balance, target_out):
+        assert self.exit is None
+        self.exit = (self.epoch, vault_balance, target_out)
+        self.target_balance = target_out
+
+    def pending(self, user):
+        """RewardDistributor.getUserRewards() for a single user"""
+        start = int(self.epoch_start[user])
+        if start == 0 or self.epoch <= start:
+            return 0
+        rewards = self.epoch_rewards[start:self.epoch] * self.amount[user] // self.epoch_balance[start:self.epoch]
+        if self.exit is not None:
+            scaled = max(0, min(self.exit[0], self.epoch) - start)
+            rewards[:scaled] = rewards[:scaled] * self.exit[2] // self.exit[1]
+        return int(rewards.sum())
+
+    def pending_all(self, chunk=1024):
+        """getUserRewards() for every user, as one array"""
+        epochs = np.arange(self.epoch)
+        rewards = self.epoch_rewards[:self.epoch]
+        # epochs nobody is owed may have a zero balance, they are masked out below
+        balance = np.where(self.epoch_balance[:self.epoch] == 0, 1, self.epoch_balance[:self.epoch])
+        pending = np.zeros(len(self.amount), dtype=object)
+        for lo in range(0, len(self.amount), chunk):
+            start = self.epoch_start[lo:lo + chunk, None]
+            owed = (start != 0) & (epochs[None, :] >= start)
+            values = rewards[None, :] * self.amount[lo:lo + chunk, None] // balance[None, :]
+            if self.exit is not None:
+                before_exit = epochs[None, :] < self.exit[0]
+                values = np.where(before_exit, values * self.exit[2] // self.exit[1], values)
+            pending[lo:lo + chunk] = np.where(owed, values, 0).sum(axis=1)
+        return pending
+
+    def _on_deposit(self, user, before):
+        rewards = self.pending(user)
+        if rewards > 0:
+            self._disburse(user, rewards)
+        if self.epoch_start[user] < self.epoch:
+            self.eligible -= before
+        # deposits are eligible from the following epoch
+        self._update_user_info(user, self.epoch + 1)
+
+    def _on_withdraw(self, user, shares):
+        rewards = self.pending(user)
+        if rewards > 0:
+            self._disburse(user, rewards)
+        if self.epoch_start[user] < self.epoch:
+            self.eligible -= shares
+        self._update_user_info(user, self.epoch)
+
+    def _disburse(self, user, rewards):
+        self.target_balance -= rewards
+        self.claimed[user] += rewards
+
+    def _update_user_info(self, user, epoch):
+        self.amount[user] = self.shares[user]
+        self.epoch_start[user] = epoch
+
+    def _grow(self):
+        if self.epoch < len(self.epoch_rewards):
+            return
+        self.epoch_rewards = np.concatenate([self.epoch_rewards, np.zeros(len(self.epoch_rewards), dtype=object)])
+        self.epoch_balance = np.concatenate([self.epoch_balance, np.zeros(len(self.epoch_balance), dtype=object)])
+
+
+def generate_trace(n_users, duration, timePerEpoch=60 * 60 * 3, rewardPerSecond=10 ** 17,
+                   actionsPerDay=100, depositSize=10 ** 21, seed=0):
+    """Random action trace over duration seconds. The vault is harvested as
+    soon as each epoch finishes and accrues rewardPerSecond from the farm."""
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.uniform(0, duration, int(actionsPerDay * duration / 86400)))
+    users = rng.integers(0, n_users, len(times))
+    kinds = rng.choice(["deposit", "withdraw", "harvest"], len(times), p=[0.5, 0.3, 0.2])
+
+    trace = []
+    lastEpoch = 0
+    shares = np.zeros(n_users, dtype=object)
+    for time, user, kind in zip(times, users, kinds):
+        time, user = int(time), int(user)
+        while time >= lastEpoch + timePerEpoch:
+            lastEpoch += timePerEpoch
+            trace.append({"action": "process", "rewards": rewardPerSecond * timePerEpoch, "time": lastEpoch})
+        if kind == "deposit" or shares[user] == 0:
+            amount = int(rng.integers(1, 100)) * depositSize // 100
+            shares[user] += amount
+            trace.append({"action": "deposit", "user": user, "amount": amount, "time": time})
+        elif kind == "withdraw":
+            amount = shares[user] // 2 or shares[user]
+            shares[user] -= amount
+            trace.append({"action": "withdraw", "user": user, "shares": amount, "time": time})
+        else:
+            trace.append({"action": "harvest", "user": user, "time": time})
+    return trace
+
+
+def simulate(trace, n_users, swap_model=None):
+    """Runs a trace, skipping harvests with nothing to claim as they would revert on chain"""
+    sim = RewardSimulator(n_users, swap_model)
+    for step in trace:
+        if step["action"] == "harvest" and sim.pending(step["user"]) == 0:
+            continue
+        sim.run([step])
+    return sim
+
+
+def main():
+    year = 365 * 86400
+    for timePerEpoch in [60 * 60 * 3, 60 * 60 * 12, 60 * 60 * 24]:
+        trace = generate_trace(1000, year, timePerEpoch=timePerEpoch)
+        sim = simulate(trace, 1000)
+        print("timePerEpoch {:>6}: {} epochs, distributed {} pending {} fees {}".format(
+            timePerEpoch, sim.epoch, int(sim.claimed.sum()), int(sim.pending_all().sum()), sim.fees))
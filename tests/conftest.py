@@ -1,7 +1,12 @@
+import glob
+import os
 import pytest
 from brownie import config
 from brownie import Contract
-from brownie import interface, project
+from brownie import interface, project, network, history
+from scripts.mocks import LocalEnv
+from scripts.gas_report import GasReport, MissingBaseline, DEFAULT_BASELINE, DEFAULT_REPORT, compare, unrecorded, write_baseline
+from scripts.gas_profile import GasProfile, DEFAULT_FOLDED, DEFAULT_JSON as DEFAULT_PROFILE
 
 @pytest.fixture
 def wftm(interface):
@@ -116,59 +121,88 @@ CONFIG = {
 
 
 
-@pytest.fixture
-def conf():
-    yield CONFIG['LQDRFTMyvUSDC']
 
-@pytest.fixture
-def usdc():
-    yield interface.IERC20Extended('0x04068DA6C83AFCFA0e13ba15A6696662335D5B75')
+def is_fork():
+    # ftm-main-fork-cached is the fork served from scripts/rpc_cache.py
+    return "-fork" in network.show_active()
 
-@pytest.fixture
+# On a plain dev chain (brownie test --network development) the CONFIG pools are
+# replaced by mock farms, routers and target vaults so the suite runs offline.
+@pytest.fixture(scope="module")
+def local_env(module_isolation, accounts):
+    if is_fork():
+        yield None
+    else:
+        yield LocalEnv(accounts[-1])
+
+def pool_config(name, local_env):
+    if local_env is None:
+        return CONFIG[name]
+    return local_env.pool(CONFIG[name])
+
+# The suite runs once per CONFIG pool, see pytest_generate_tests. Pool fixtures
+# are module scoped: they are set up once per module and pool, before fn_isolation
+# snapshots the chain, so each test reverts to them rather than redeploying.
+@pytest.fixture(scope="module")
+def conf(pool_name, local_env):
+    yield pool_config(pool_name, local_env)
+
+@pytest.fixture(scope="module")
+def usdc(conf):
+    yield interface.IERC20Extended(conf['targetToken'])
+
+@pytest.fixture(scope="module")
 def reward_token(conf):
     yield interface.IERC20(conf['farmToken'])
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def router(conf):
-    yield Contract(conf['router'])
+    if is_fork():
+        yield Contract(conf['router'])
+    else:
+        yield interface.IUniswapV2Router01(conf['router'])
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def pid(conf):
     yield conf['pid']
 
-@pytest.fixture
-def gov(accounts):
-    yield accounts.at("0x7601630eC802952ba1ED2B6e4db16F699A0a5A87", force=True)
+# module scoped so the fork account is unlocked after module_isolation resets the chain
+@pytest.fixture(scope="module")
+def gov(module_isolation, accounts):
+    if is_fork():
+        yield accounts.at("0x7601630eC802952ba1ED2B6e4db16F699A0a5A87", force=True)
+    else:
+        yield accounts[7]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def user1(accounts):
     yield accounts[0]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def user2(accounts):
     yield accounts[6]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rewards(accounts):
     yield accounts[1]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def guardian(accounts):
     yield accounts[2]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def management(accounts):
     yield accounts[3]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def strategist(accounts):
     yield accounts[4]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def keeper(accounts):
     yield accounts[5]
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def token(conf):
     # token_address = "0x04068DA6C83AFCFA0e13ba15A6696662335D5B75"  # USDC
     # token_address = "0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
@@ -179,7 +213,7 @@ def token(conf):
     yield interface.IUniswapV2Pair(conf['token'])
 
 ## Price utility functions
-@pytest.fixture
+@pytest.fixture(scope="session")
 def get_path(weth):
     def get_path(token_in, token_out):
         is_weth = token_in == weth or token_out == weth
@@ -193,11 +227,19 @@ def get_path(weth):
         return path
     yield get_path
 
-@pytest.fixture
-def token_price(router, usdc, get_path):
+# Prices on a fork only depend on the forked block, they are quoted once per session
+@pytest.fixture(scope="session")
+def price_cache():
+    yield {}
+
+@pytest.fixture(scope="module")
+def token_price(router, usdc, get_path, price_cache):
     def token_price(token, decimals):
         if (token.address == usdc.address):
             return 1
+        key = (router.address, token.address, decimals)
+        if is_fork() and key in price_cache:
+            return price_cache[key]
 
         path = get_path(usdc, token)
         price = router.getAmountsIn(10 ** decimals, path)[0]
@@ -208,13 +250,19 @@ def token_price(router, usdc, get_path):
         else:
             price = price * (1 - 0.004)
 
-        return price / (10 ** usdc.decimals())
+        price = price / (10 ** usdc.decimals())
+        if is_fork():
+            price_cache[key] = price
+        return price
 
     yield token_price
 
 
-@pytest.fixture
-def lp_price(token, token_price):
+@pytest.fixture(scope="module")
+def lp_price(token, token_price, price_cache):
+    if is_fork() and token.address in price_cache:
+        yield price_cache[token.address]
+        return
     token0 = interface.IERC20Extended(token.token0())
     token1 = interface.IERC20Extended(token.token1())
     price0 = token_price(token0, token0.decimals())
@@ -224,9 +272,11 @@ def lp_price(token, token_price):
     totalAssets = ((reserves[0] / (10 ** token0.decimals()) * price0) + 
                    (reserves[1] / (10 ** token1.decimals()) * price1))
     price = totalAssets / totalSupply 
+    if is_fork():
+        price_cache[token.address] = price
     yield price
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def amount(accounts, token, lp_price, user1, user2, conf):
     amount = int((1000000 / lp_price) * (10 ** token.decimals()))
     # amount = token.balanceOf(conf['whale']) * 0.4
@@ -239,7 +289,7 @@ def amount(accounts, token, lp_price, user1, user2, conf):
     token.transfer(user2, amount, {"from": reserve})
     yield amount
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def weth():
     token_address = "0x21be370D5312f44cB42ce377BC9b8a0cEF1A4C83"
     yield interface.IERC20Extended(token_address)
@@ -252,56 +302,202 @@ def weth_amout(user, weth):
     yield weth_amout
 
 
-@pytest.fixture
-def vault(RedirectVault, strategist, keeper, gov, conf, amount):
-    tvlCap = amount * 10
-    vault = RedirectVault.deploy(
-        conf['token'], 
-        "Yield Redirect Test",
-        "yrSYMBOL",
-        tvlCap,
-        conf['targetToken'],
-        conf['targetVault'],
-        0,
-        {'from': gov}
-    )
-
-    yield vault
-
+# Deploys a vault, distributor and strategy on the pool and connects them
+@pytest.fixture(scope="session")
+def deploy_vault(RedirectVault, RewardDistributor, StrategyLiquidDriver, Strategy0xDAO, StrategyBeethoven, rewards):
+    def deploy_vault(conf, token, pid, reward_token, tvl_cap, gov):
+        vault = RedirectVault.deploy(conf['token'], "Yield Redirect Test", "yrSYMBOL", tvl_cap,
+                                     conf['targetToken'], conf['targetVault'], 0, {'from': gov})
+        distributor = RewardDistributor.deploy(vault, conf['router'], rewards, {'from': gov})
+        if conf['farmAddress'] == '0XDAO' :
+            strategy = Strategy0xDAO.deploy(vault, token.address, {"from": gov})
+            distributor.permitRewardToken(oxd, {'from': gov})
+            distributor.permitRewardToken(solid, {'from': gov})
+        if conf['farmAddress'] == lqdrMasterChef:
+            strategy = StrategyLiquidDriver.deploy(vault, token.address, pid, {"from": gov})
+            distributor.permitRewardToken(reward_token, {'from': gov})
+        if conf['farmAddress'] == beetsMasterChef:
+            strategy = StrategyBeethoven.deploy(vault, token.address, pid, {"from": gov})
+            distributor.permitRewardToken(reward_token, {'from': gov})
+        vault.initialize(strategy, distributor, {"from": gov})
+        return vault, distributor, strategy
+    yield deploy_vault
+
+@pytest.fixture(scope="module")
+def deployment(deploy_vault, gov, token, pid, reward_token, amount, conf):
+    yield deploy_vault(conf, token, pid, reward_token, amount * 10, gov)
 
 @pytest.fixture
-def distributor(RewardDistributor, vault, gov, conf, rewards):
-    distributor = RewardDistributor.deploy(
-        vault, 
-        conf['router'],
-        rewards,
-        {'from': gov}
-    )
-    
-
-
-    yield distributor
+def vault(deployment):
+    yield deployment[0]
 
+@pytest.fixture
+def distributor(deployment):
+    yield deployment[1]
 
 @pytest.fixture
-def strategy(strategist, keeper, vault, distributor, StrategyLiquidDriver, Strategy0xDAO, StrategyBeethoven ,gov, token, pid, reward_token, conf):
-    if conf['farmAddress'] == '0XDAO' :
-        strategy = Strategy0xDAO.deploy(vault, token.address, {"from": gov})
-        distributor.permitRewardToken(oxd, {'from': gov})
-        distributor.permitRewardToken(solid, {'from': gov})
-    if conf['farmAddress'] == lqdrMasterChef:
-        strategy = StrategyLiquidDriver.deploy(vault, token.address, pid, {"from": gov})
-        distributor.permitRewardToken(reward_token, {'from': gov})
-    if conf['farmAddress'] == beetsMasterChef:
-        strategy = StrategyBeethoven.deploy(vault, token.address, pid, {"from": gov})
-        distributor.permitRewardToken(reward_token, {'from': gov})
+def strategy(deployment):
+    yield deployment[2]
 
+# Deploys additional vaults on the same pool, for tests that need a fleet
+@pytest.fixture
+def create_vault(deploy_vault, gov, token, pid, reward_token, amount, conf):
+    def create_vault():
+        return deploy_vault(conf, token, pid, reward_token, amount * 10, gov)
+    yield create_vault
 
-    vault.initialize(strategy, distributor, {"from": gov})
-    yield strategy
+# RedirectFactory VaultConfig for the pool, see contracts/types/VaultConfig.sol
+@pytest.fixture
+def vault_config(conf, rewards, amount):
+    def vault_config(name="Yield Redirect Test", symbol="yrSYMBOL"):
+        if conf['farmAddress'] == '0XDAO':
+            strategy_type, reward_tokens = 2, [oxd, solid]
+        elif conf['farmAddress'] == beetsMasterChef:
+            strategy_type, reward_tokens = 1, [conf['farmToken']]
+        else:
+            strategy_type, reward_tokens = 0, [conf['farmToken']]
+        return (conf['token'], conf['targetToken'], conf['targetVault'], conf['router'], strategy_type,
+                conf['pid'], reward_tokens, name, symbol, amount * 10, 0, rewards)
+    yield vault_config
 
 # Function scoped isolation fixture to enable xdist.
 # Snapshots the chain before each test and reverts after test completion.
 @pytest.fixture(scope="function", autouse=True)
 def shared_setup(fn_isolation):
-    pass
\ No newline at end of file
+    pass
+
+# Waits out the current epoch, mining blocks, and has the keeper process it
+def run_epoch(chain, vault, distributor, gov, blocks=1):
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(blocks)
+    return vault.harvest({"from": gov})
+
+## Gas benchmarks
+def pytest_addoption(parser):
+    parser.addoption("--gas-benchmark", action="store_true", help="run the gas benchmark suite")
+    parser.addoption("--gas-baseline", default=DEFAULT_BASELINE, help="baseline used by the gas regression gate")
+    parser.addoption("--gas-tolerance", type=float, default=0.02, help="allowed gas increase over the baseline")
+    parser.addoption("--update-gas-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.addoption("--gas-profile", action="store_true", help="profile the gas of every transaction by call stack")
+    parser.addoption("--pool", action="append", choices=list(CONFIG), help="only run these CONFIG pools, all by default")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: gas benchmark, only runs with --gas-benchmark")
+    config.addinivalue_line("markers", "xdist_group(name): tests of one CONFIG pool, scheduled together by --dist loadgroup")
+    config._gas_report = GasReport()
+    config._gas_profile = GasProfile()
+
+## Pool matrix
+# Every test that uses conf runs for each CONFIG pool. With --dist loadgroup each
+# pool is a group, so an xdist worker runs a pool's tests on its own chain.
+def pytest_generate_tests(metafunc):
+    if "pool_name" in metafunc.fixturenames:
+        metafunc.parametrize("pool_name", metafunc.config.getoption("--pool") or list(CONFIG), scope="module")
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        pool = getattr(item, "callspec", None) and item.callspec.params.get("pool_name")
+        if pool:
+            item.add_marker(pytest.mark.xdist_group(name=pool))
+            item.user_properties.append(("pool", pool))
+
+    if config.getoption("--gas-benchmark"):
+        return
+    skip = pytest.mark.skip(reason="gas benchmarks need --gas-benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+def pool_summary(reports):
+    """{pool: {outcome: count, "duration": seconds}} from the test reports of a run"""
+    summary = {}
+    for report in reports:
+        pool = dict(getattr(report, "user_properties", [])).get("pool")
+        if pool is None:
+            continue
+        totals = summary.setdefault(pool, {"passed": 0, "failed": 0, "skipped": 0, "duration": 0.0})
+        totals["duration"] += report.duration
+        # a test is counted once: by its call, or by the setup that failed or skipped it
+        if report.when == "call" or (report.when == "setup" and report.outcome != "passed"):
+            totals[report.outcome] += 1
+        elif report.when == "teardown" and report.outcome == "failed":
+            totals["failed"] += 1
+    return summary
+
+def pytest_terminal_summary(terminalreporter):
+    reports = [r for stat in terminalreporter.stats.values() for r in stat if hasattr(r, "when")]
+    summary = pool_summary(reports)
+    if len(summary) < 2:
+        return
+    terminalreporter.section("pools")
+    for pool, totals in sorted(summary.items()):
+        terminalreporter.write_line("{:<20} {:>4} passed {:>4} failed {:>4} skipped {:>8.1f}s".format(
+            pool, totals["passed"], totals["failed"], totals["skipped"], totals["duration"]))
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if config.getoption("--gas-profile"):
+        finish_gas_profile(config)
+    if not config.getoption("--gas-benchmark"):
+        return
+
+    # xdist workers write their own report, the controller merges and gates them
+    if hasattr(config, "workerinput"):
+        config._gas_report.write(DEFAULT_REPORT.replace(".json", ".{}.json".format(config.workerinput["workerid"])))
+        return
+
+    report = config._gas_report
+    for path in glob.glob(DEFAULT_REPORT.replace(".json", ".*.json")):
+        report.merge(GasReport.load(path))
+        os.remove(path)
+    report.write(DEFAULT_REPORT)
+
+    if config.getoption("--update-gas-baseline"):
+        write_baseline(report, config.getoption("--gas-baseline"))
+        return
+
+    baseline_path = config.getoption("--gas-baseline")
+    try:
+        regressions = compare(report, baseline_path, config.getoption("--gas-tolerance"))
+    except MissingBaseline as e:
+        # without a baseline nothing is gated, which must not pass silently
+        print("\nGas regression gate failed: {}".format(e))
+        session.exitstatus = 1
+        return
+    for key in unrecorded(report, baseline_path):
+        print("\nNo gas baseline for {}, it is not gated".format(key))
+    for key, baseline, measured in regressions:
+        print("\nGas regression {}: {} -> {}".format(key, baseline, measured))
+    if regressions:
+        session.exitstatus = 1
+
+@pytest.fixture(scope="session")
+def gas_report(pytestconfig):
+    yield pytestconfig._gas_report
+
+## Gas profile
+# With --gas-profile the trace of every transaction a test sends is folded into
+# call stacks, before the chain is reverted for the next test
+@pytest.fixture(autouse=True)
+def profile_gas(request, fn_isolation):
+    if not request.config.getoption("--gas-profile"):
+        yield
+        return
+    start = len(history)
+    yield
+    for tx in history[start:]:
+        if tx.fn_name is not None and not tx.contract_name.startswith("Mock"):
+            request.config._gas_profile.add(tx)
+
+def finish_gas_profile(config):
+    profile = config._gas_profile
+    if hasattr(config, "workerinput"):
+        worker = config.workerinput["workerid"]
+        profile.write(DEFAULT_FOLDED.replace(".folded", ".{}.folded".format(worker)),
+                      DEFAULT_PROFILE.replace(".json", ".{}.json".format(worker)))
+        return
+    for path in glob.glob(DEFAULT_PROFILE.replace(".json", ".*.json")):
+        profile.merge(GasProfile.load(path))
+        os.remove(path)
+        os.remove(path.replace(".json", ".folded"))
+    profile.write()
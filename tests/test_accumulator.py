@@ -0,0 +1,159 @@
+import pytest
+from brownie import interface
+from brownie import reverts
+from conftest import run_epoch
+
+def test_accumulator_matches_epoch_history(chain, strategy, distributor, gov, token, vault, user1, user2, amount, conf):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount, {"from": user2})
+
+    for i in range(3):
+        chain.sleep(10 + distributor.timePerEpoch())
+        chain.mine(5)
+        vault.harvest({"from": gov})
+
+    # the index is maintained every epoch so it is always in sync on a new distributor
+    assert distributor.accumulatorEpoch() == distributor.epoch()
+
+    loopRewards1 = distributor.getUserRewards(user1)
+    loopRewards2 = distributor.getUserRewards(user2)
+
+    with reverts():
+        distributor.setAccumulatorMode(True, {"from": user1})
+    distributor.setAccumulatorMode(True, {"from": gov})
+
+    # the accumulator rounds once rather than once per epoch
+    assert pytest.approx(distributor.getUserRewards(user1), rel=1e-9) == loopRewards1
+    assert pytest.approx(distributor.getUserRewards(user2), rel=1e-9) == loopRewards2
+    assert distributor.getUserRewards(user1) + distributor.getUserRewards(user2) <= distributor.targetBalance()
+
+    tokenReceived = interface.IERC20Extended(distributor.targetToken())
+    pendingRewards = distributor.getUserRewardsTarget(user1)
+    distributor.harvest({"from": user1})
+    assert distributor.getUserRewards(user1) == 0
+    assert tokenReceived.balanceOf(user1) == pendingRewards
+
+    vault.withdraw(amount, {"from": user2})
+    assert distributor.getUserRewards(user2) == 0
+
+
+def test_accumulator_emergency_exit(chain, strategy, distributor, gov, token, vault, user1, amount, conf):
+
+    distributor.setAccumulatorMode(True, {"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(5)
+    vault.harvest({"from": gov})
+
+    distributor.emergencyDisableVault({"from": gov})
+
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(5)
+    vault.harvest({"from": gov})
+
+    accumulatorRewards = distributor.getUserRewards(user1)
+    distributor.setAccumulatorMode(False, {"from": gov})
+    assert pytest.approx(accumulatorRewards, rel=1e-9) == distributor.getUserRewards(user1)
+    assert accumulatorRewards <= distributor.targetBalance()
+
+
+def test_sync_accumulator(RewardDistributor, chain, strategy, distributor, gov, rewards, token, reward_token, vault, user1, amount, conf):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    for i in range(4):
+        run_epoch(chain, vault, distributor, gov)
+    pending = distributor.getUserRewards(user1)
+
+    # a migrated distributor copies the epoch history but not the index, which
+    # starts out behind the epoch
+    newDistributor = RewardDistributor.deploy(vault, conf['router'], rewards, {'from': gov})
+    newDistributor.permitRewardToken(reward_token, {'from': gov})
+    vault.proposeDistributor(newDistributor, {"from": gov})
+    distributor.emergencySweep(distributor.tokenOut(), newDistributor, {"from": gov})
+    chain.sleep(1)
+    vault.upgradeDistributor({"from": gov})
+
+    epoch = newDistributor.epoch()
+    assert newDistributor.accumulatorEpoch() == 0
+    with reverts("accumulator not synced"):
+        newDistributor.setAccumulatorMode(True, {"from": gov})
+    with reverts():
+        newDistributor.syncAccumulator(epoch, {"from": user1})
+
+    # the index is rebuilt in batches and matches the one kept by the old distributor
+    newDistributor.syncAccumulator(2, {"from": gov})
+    assert newDistributor.accumulatorEpoch() == 2
+    newDistributor.syncAccumulator(epoch, {"from": gov})
+    assert newDistributor.accumulatorEpoch() == epoch
+    for i in range(epoch + 1):
+        assert newDistributor.cumulativeRewardPerShare(i) == distributor.cumulativeRewardPerShare(i)
+
+    newDistributor.setAccumulatorMode(True, {"from": gov})
+    assert pytest.approx(newDistributor.getUserRewards(user1), rel=1e-9) == pending
+
+    # once synced the index is extended by every epoch processed
+    run_epoch(chain, vault, newDistributor, gov)
+    assert newDistributor.accumulatorEpoch() == epoch + 1
+    assert newDistributor.getUserRewards(user1) > pending
+
+
+def test_accumulator_in_carry_window(chain, strategy, distributor, gov, token, vault, user1, user2, amount, conf):
+
+    distributor.setAccumulatorMode(True, {"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    for i in range(8):
+        run_epoch(chain, vault, distributor, gov)
+
+    # carried epochs are folded into the index when the window settles
+    distributor.setParamaters(10000, 500, 2 ** 200, {"from": gov})
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    for i in range(2):
+        run_epoch(chain, vault, distributor, gov)
+    assert distributor.carryEpochs() == 2
+    assert distributor.accumulatorEpoch() == distributor.epoch() - 2
+
+    # the synced prefix is read from the index, only the window is iterated
+    accumulatorRewards = distributor.getUserRewards(user1)
+    accumulatorGas = distributor.getUserRewards.estimate_gas(user1)
+    assert accumulatorRewards > 0
+    assert distributor.getUserRewards(user2) == 0
+
+    distributor.setAccumulatorMode(False, {"from": gov})
+    assert pytest.approx(accumulatorRewards, rel=1e-9) == distributor.getUserRewards(user1)
+    assert accumulatorGas < distributor.getUserRewards.estimate_gas(user1)
+
+    # settling the window brings the index back in sync
+    distributor.setParamaters(10000, 500, 1, {"from": gov})
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.accumulatorEpoch() == distributor.epoch()
+    loopRewards = [distributor.getUserRewards(u) for u in (user1, user2)]
+    distributor.setAccumulatorMode(True, {"from": gov})
+    assert loopRewards[1] > 0
+    for user, rewards in zip((user1, user2), loopRewards):
+        assert pytest.approx(distributor.getUserRewards(user), rel=1e-9) == rewards
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import pytest
+from brownie import web3, RedirectVault
+from scripts.deploy import Deployer, DeployError, STRATEGIES, resolve_manifest
+
+def pool_manifest(vault_config, conf, rewards, keeper):
+    # VaultConfig tuple, see contracts/types/VaultConfig.sol
+    config = vault_config()
+    defaults = {
+        "token": conf['token'],
+        "strategy": STRATEGIES[config[4]],
+        "pid": conf['pid'],
+        "router": conf['router'],
+        "targetToken": conf['targetToken'],
+        "targetVault": conf['targetVault'],
+        "permit": [str(t) for t in config[6]],
+        "name": config[7],
+        "symbol": config[8],
+        "tvlCap": config[9],
+        "feeAddress": "$rewards",
+        "keeper": "$keeper",
+    }
+    return {"addresses": {"rewards": str(rewards), "keeper": str(keeper)}, "defaults": defaults, "vaults": {}}
+
+
+def test_deploy_resumes(vault_config, conf, gov, rewards, keeper, tmp_path):
+
+    manifest = pool_manifest(vault_config, conf, rewards, keeper)
+    permit = manifest["defaults"]["permit"]
+    state_path = str(tmp_path / "state.json")
+
+    # B permits an address that isn't a token, only that step fails
+    manifest["vaults"] = {"A": {}, "B": {"permit": permit + ["$keeper"]}}
+    deployer = Deployer(gov, resolve_manifest(manifest), state_path)
+    with pytest.raises(DeployError, match="B.permit"):
+        asyncio.run(deployer.run())
+
+    with open(state_path) as f:
+        state = json.load(f)
+    for name in ("A", "B"):
+        for step in ("vault", "distributor", "strategy", "keeper", "initialize"):
+            assert state["{}.{}".format(name, step)]["status"] == "done"
+    assert "B.permit.{}".format(keeper) not in state
+    vault_a = state["A.vault"]["address"]
+
+    # a step broadcast by a run that stopped before confirming is recovered from its receipt
+    state["A.vault"] = {"status": "pending", "tx": state["A.vault"]["tx"]}
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+
+    # the next run only sends what's left
+    manifest["vaults"]["B"]["permit"] = permit
+    manifest["vaults"]["C"] = {}
+    nonce = web3.eth.get_transaction_count(gov.address)
+    deployer = Deployer(gov, resolve_manifest(manifest), state_path)
+    deployed = asyncio.run(deployer.run())
+    assert web3.eth.get_transaction_count(gov.address) - nonce == 5 + len(permit)
+    assert deployed["A"][0] == vault_a
+    assert len({deployed[name][0] for name in "ABC"}) == 3
+
+    assert deployer.verify() == []
+    vault = RedirectVault.at(deployed["C"][0])
+    assert vault.keeper() == keeper
+    assert vault.strategy() == deployed["C"][2]
+
+
+def test_deploy_pending(vault_config, conf, gov, rewards, keeper, tmp_path, monkeypatch):
+
+    manifest = pool_manifest(vault_config, conf, rewards, keeper)
+    manifest["vaults"] = {"A": {}}
+    state_path = str(tmp_path / "state.json")
+    deployer = Deployer(gov, resolve_manifest(manifest), state_path)
+    asyncio.run(deployer.run())
+    txid = deployer.state["A.vault"]["tx"]
+    vault_a = deployer.state["A.vault"]["address"]
+    recorded = web3.eth.get_transaction(txid)["nonce"]
+    step = next(s for s in deployer.plan() if s.key == "A.vault")
+
+    # still pending: its nonce is unused and the node has it, it is waited on rather than sent again
+    lookup = web3.eth.get_transaction_receipt
+    calls = []
+
+    def not_found(tx):
+        raise Exception("not found")
+
+    def not_mined_yet(tx):
+        calls.append(tx)
+        return not_found(tx) if len(calls) == 1 else lookup(tx)
+
+    monkeypatch.setattr(web3.eth, "get_transaction_receipt", not_mined_yet)
+    monkeypatch.setattr(web3.eth, "get_transaction_count", lambda address, block: recorded)
+    deployer.state["A.vault"] = {"status": "pending", "tx": txid, "nonce": recorded}
+    deployer._recover(step)
+    assert deployer.state["A.vault"]["status"] == "done"
+    assert deployer.state["A.vault"]["address"] == vault_a
+
+    # never mined in time, the run stops instead of deploying twice
+    monkeypatch.setattr(web3.eth, "get_transaction_receipt", not_found)
+    deployer.pending_timeout = 1
+    deployer.state["A.vault"] = {"status": "pending", "tx": txid, "nonce": recorded}
+    with pytest.raises(DeployError, match="A.vault is still pending"):
+        deployer._recover(step)
+    assert deployer.state["A.vault"]["status"] == "pending"
+    monkeypatch.undo()
+
+    # its nonce was taken by another transaction, it was replaced and is sent again
+    deployer.state["A.vault"] = {"status": "pending", "tx": "0x" + "11" * 32, "nonce": recorded}
+    deployer._recover(step)
+    assert "A.vault" not in deployer.state
+
+
+def test_deploy_verify(vault_config, conf, gov, rewards, keeper, tmp_path):
+
+    manifest = pool_manifest(vault_config, conf, rewards, keeper)
+    manifest["vaults"] = {"A": {}}
+    deployer = Deployer(gov, resolve_manifest(manifest), str(tmp_path / "state.json"))
+    asyncio.run(deployer.run())
+    assert deployer.verify() == []
+
+    # wiring that doesn't match the manifest is reported
+    vault = RedirectVault.at(deployer.contracts("A")[0])
+    vault.setKeeper(rewards, {"from": gov})
+    assert deployer.verify() == ["A: vault.keeper() is {}, expected {}".format(rewards, keeper)]
+
+    with pytest.raises(DeployError):
+        resolve_manifest({"vaults": {"A": {"strategy": "StrategyLiquidDriver", "token": "$missing"}}})
@@ -0,0 +1,140 @@
+import pytest
+from brownie import interface
+from brownie import reverts
+from conftest import run_epoch
+
+def test_migrate_distributor(RewardDistributor, vault, strategy, distributor, chain, gov, rewards, token, reward_token, user1, user2, amount, conf):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    for i in range(3):
+        run_epoch(chain, vault, distributor, gov)
+    distributor.harvest({"from": user2})
+    run_epoch(chain, vault, distributor, gov)
+
+    pending = [distributor.getUserRewards(u) for u in (user1, user2)]
+    claimed = distributor.totalClaimed(user2)
+
+    newDistributor = RewardDistributor.deploy(vault, conf['router'], rewards, {'from': gov})
+    newDistributor.permitRewardToken(reward_token, {'from': gov})
+
+    # history is copied in batches ahead of the switch
+    with reverts():
+        newDistributor.migrateEpochs(distributor, 2, {"from": user1})
+    newDistributor.migrateEpochs(distributor, 2, {"from": gov})
+    assert newDistributor.migratedEpochs() == 2
+
+    with reverts():
+        vault.proposeDistributor(newDistributor, {"from": user1})
+    vault.proposeDistributor(newDistributor, {"from": gov})
+    tokenOut = interface.IERC20(distributor.tokenOut())
+    distributor.emergencySweep(tokenOut, newDistributor, {"from": gov})
+    chain.sleep(1)
+    vault.upgradeDistributor({"from": gov})
+
+    assert vault.distributor() == newDistributor
+    assert newDistributor.migrated()
+    assert newDistributor.epoch() == distributor.epoch()
+    assert newDistributor.lastEpoch() == distributor.lastEpoch()
+    assert newDistributor.eligibleEpochRewards() == distributor.eligibleEpochRewards()
+    for epoch in range(distributor.epoch()):
+        assert newDistributor.epochRewards(epoch) == distributor.epochRewards(epoch)
+        assert newDistributor.epochBalance(epoch) == distributor.epochBalance(epoch)
+
+    # users are read from the legacy distributor until they interact
+    assert [newDistributor.getUserRewards(u) for u in (user1, user2)] == pending
+    assert newDistributor.userInfo(user1) == distributor.userInfo(user1)
+
+    # the accumulator is rebuilt from the copied history
+    newDistributor.syncAccumulator(newDistributor.epoch(), {"from": gov})
+    newDistributor.setAccumulatorMode(True, {"from": gov})
+    assert pytest.approx(newDistributor.getUserRewards(user1), rel=1e-9) == pending[0]
+    newDistributor.setAccumulatorMode(False, {"from": gov})
+
+    run_epoch(chain, vault, newDistributor, gov)
+    assert newDistributor.epoch() == distributor.epoch() + 1
+    assert newDistributor.getUserRewards(user1) > pending[0]
+
+    newDistributor.harvest({"from": user2})
+    assert newDistributor.getUserRewards(user2) == 0
+    assert newDistributor.totalClaimed(user2) > claimed
+    assert newDistributor.userInfo(user2)[2] > 0
+
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert newDistributor.getUserRewards(user1) == 0
+
+    with reverts():
+        newDistributor.onMigrate(distributor, {"from": gov})
+
+
+def test_migrate_distributor_carry(RewardDistributor, vault, strategy, distributor, chain, gov, rewards, token, reward_token, user1, user2, amount, conf):
+
+    # carry rewards for as long as possible
+    distributor.setParamaters(10000, 500, 2 ** 200, {"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    for i in range(2):
+        run_epoch(chain, vault, distributor, gov)
+    # user2's share of the window is recorded as carry
+    vault.withdraw(vault.balanceOf(user2), {"from": user2})
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.carryEpochs() == 3
+
+    # epochs of the carry window aren't copied, and the switch waits for it to settle
+    newDistributor = RewardDistributor.deploy(vault, conf['router'], rewards, {'from': gov})
+    newDistributor.permitRewardToken(reward_token, {'from': gov})
+    newDistributor.migrateEpochs(distributor, 10, {"from": gov})
+    assert newDistributor.migratedEpochs() == distributor.epoch() - distributor.carryEpochs()
+    vault.proposeDistributor(newDistributor, {"from": gov})
+    chain.sleep(1)
+    with reverts("carry not settled"):
+        vault.upgradeDistributor({"from": gov})
+
+    distributor.settleRewards({"from": gov})
+    assert distributor.carryEpochs() == 0
+    pending = [distributor.getUserRewards(u) for u in (user1, user2)]
+    carry = distributor.userCarry(user2)
+    assert carry[0] > 0 and carry[1] < distributor.carryRound()
+    assert pending[1] > 0
+
+    distributor.emergencySweep(distributor.tokenOut(), newDistributor, {"from": gov})
+    vault.upgradeDistributor({"from": gov})
+
+    assert newDistributor.carryRound() == newDistributor.legacyCarryRounds() == distributor.carryRound()
+    for epoch in range(distributor.epoch()):
+        assert newDistributor.epochRewards(epoch) == distributor.epochRewards(epoch)
+
+    # settled carry is read from the legacy distributor until the user interacts
+    assert newDistributor.userCarry(user2) == carry
+    assert [newDistributor.getUserRewards(u) for u in (user1, user2)] == pending
+
+    newDistributor.harvest({"from": user2})
+    assert newDistributor.totalClaimed(user2) == distributor.totalClaimed(user2) + pending[1]
+    assert newDistributor.getUserRewards(user2) == 0
+    assert newDistributor.userCarry(user2)[0] == 0
+
+    # carry windows settled by the new distributor continue the legacy's rounds
+    newDistributor.setParamaters(10000, 500, 2 ** 200, {"from": gov})
+    run_epoch(chain, vault, newDistributor, gov)
+    newDistributor.settleRewards({"from": gov})
+    assert newDistributor.carryRound() == distributor.carryRound() + 1
+    assert newDistributor.getUserRewards(user1) > pending[0]
+
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert newDistributor.getUserRewards(user1) == 0
+
+
+def test_upgrade_distributor_requires_candidate(vault, strategy, distributor, gov):
+    with reverts("There is no candidate"):
+        vault.upgradeDistributor({"from": gov})
@@ -0,0 +1,83 @@
+import pytest
+from brownie import reverts, Contract, RedirectFactory, RedirectVault, RewardDistributor
+
+def test_factory(vault, distributor, strategy, vault_config, conf, chain, gov, rewards, token, user1, amount):
+
+    # the fixture set serves as the implementations
+    factory = RedirectFactory.deploy({"from": gov})
+    config = vault_config()
+    with reverts("!implementation"):
+        factory.deploy(config, {"from": gov})
+    with reverts():
+        factory.setImplementations(vault, distributor, {"from": user1})
+    factory.setImplementations(vault, distributor, {"from": gov})
+    factory.setStrategyImplementation(config[4], strategy, {"from": gov})
+
+    with reverts():
+        factory.deploy(config, {"from": user1})
+    tx = factory.deploy(config, {"from": gov})
+    event = tx.events["VaultDeployed"]
+    clone = RedirectVault.at(event["vault"])
+    cloneDistributor = RewardDistributor.at(event["distributor"])
+    cloneStrategy = Contract.from_abi(strategy._name, event["strategy"], strategy.abi)
+
+    # a full set costs a fraction of deploying the contracts
+    deployed = vault.tx.gas_used + distributor.tx.gas_used + strategy.tx.gas_used
+    assert tx.gas_used * 5 < deployed
+
+    assert (clone.name(), clone.symbol()) == (vault.name(), vault.symbol())
+    assert clone.token() == token
+    assert (clone.governance(), clone.management(), clone.keeper()) == (gov, gov, gov)
+    assert (clone.strategy(), clone.distributor()) == (cloneStrategy, cloneDistributor)
+    assert clone.tvlCap() == vault.tvlCap()
+    assert clone.lazyRolloverDelay() == vault.lazyRolloverDelay()
+    # values the constructors keep in immutables are the clones immutable args
+    assert (clone.targetToken(), clone.targetVault()) == (conf['targetToken'], conf['targetVault'])
+    assert clone.approvalDelay() == config[10]
+    assert cloneDistributor.redirectVault() == clone
+    assert cloneDistributor.router() == conf['router']
+    assert (cloneDistributor.targetToken(), cloneDistributor.targetVault()) == (conf['targetToken'], conf['targetVault'])
+    assert cloneDistributor.tokenOut() == distributor.tokenOut()
+    assert cloneDistributor.feeAddress() == rewards
+    for getter in ("timePerEpoch", "profitFee", "profitConversionPercent", "maxCarryEpochs", "useTargetVault"):
+        assert getattr(cloneDistributor, getter)() == getattr(distributor, getter)()
+    assert cloneStrategy.vault() == clone
+    assert cloneStrategy.strategist() == gov
+    assert cloneStrategy.rewardTokens() == strategy.rewardTokens()
+
+    # neither the clones nor the implementations can be initialized again
+    for v in (vault, clone):
+        with reverts("Contract is already initialized."):
+            v.initializeVault(config, user1, cloneStrategy, cloneDistributor, {"from": user1})
+    for d in (distributor, cloneDistributor):
+        with reverts("Contract is already initialized."):
+            d.initializeDistributor(user1, [], {"from": user1})
+
+    # the clone runs like any other vault
+    token.approve(clone.address, amount, {"from": user1})
+    clone.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    clone.harvest({"from": gov})
+    chain.sleep(10 + cloneDistributor.timePerEpoch())
+    chain.mine(1)
+    clone.harvest({"from": gov})
+    assert cloneDistributor.getUserRewards(user1) > 0
+    clone.withdraw(clone.balanceOf(user1), {"from": user1})
+    assert cloneDistributor.totalClaimed(user1) > 0
+
+
+def test_factory_batch(vault, distributor, strategy, vault_config, gov):
+
+    factory = RedirectFactory.deploy({"from": gov})
+    factory.setImplementations(vault, distributor, {"from": gov})
+    factory.setStrategyImplementation(vault_config()[4], strategy, {"from": gov})
+
+    configs = [vault_config("Yield Redirect {}".format(i), "yr{}".format(i)) for i in range(3)]
+    tx = factory.deployBatch(configs, {"from": gov})
+    assert factory.vaultsLength() == 3
+    assert len(tx.events["VaultDeployed"]) == 3
+    for i, (v, d, s) in enumerate(tx.return_value):
+        assert factory.vaults(i) == v
+        assert RedirectVault.at(v).symbol() == "yr{}".format(i)
+        assert RewardDistributor.at(d).redirectVault() == v
@@ -0,0 +1,17 @@
+import pytest
+
+# vault addresses seen by the tests of this module, by pool
+DEPLOYED = {}
+
+@pytest.mark.parametrize("run", range(3))
+def test_deployment_reverted_between_tests(vault, distributor, strategy, token, user1, amount, pool_name, run):
+    # deployed once for the module, each test starts from the same state
+    assert DEPLOYED.setdefault(pool_name, vault.address) == vault.address
+    assert vault.strategy() == strategy
+    assert vault.distributor() == distributor
+    assert vault.totalSupply() == 0
+    assert token.balanceOf(user1) == amount
+
+    token.approve(vault, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    assert vault.balanceOf(user1) == amount
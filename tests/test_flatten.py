@@ -0,0 +1,38 @@
+import json
+import os
+from scripts.flatten import Flattener, discover, flat_path
+
+def test_flatten_incremental(tmp_path):
+    out_dir = str(tmp_path)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+
+    flattener = Flattener(out_dir=out_dir, manifest_path=manifest_path)
+    names = sorted(discover(flattener.project))
+    assert "StrategyBeethoven" in names
+    assert not any(name.startswith("Mock") for name in names)
+
+    assert flattener.run() == names
+    for name in names:
+        with open(flat_path(name, out_dir)) as f:
+            assert "contract {}".format(name) in f.read()
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    assert "contracts/RedirectVault.sol" in manifest["RedirectVault"]["sources"]
+    assert "contracts/RedirectVault.sol" not in manifest["StrategyBeethoven"]["sources"]
+
+    # nothing changed
+    assert Flattener(out_dir=out_dir, manifest_path=manifest_path).run() == []
+
+    # a flat file edited by hand is rewritten
+    with open(flat_path("RedirectVault", out_dir), "a") as f:
+        f.write("\n")
+    assert Flattener(out_dir=out_dir, manifest_path=manifest_path).run() == ["RedirectVault"]
+
+    # a stale entry, as left by a change to one of the contract's sources
+    manifest["StrategyBeethoven"]["key"] = "0"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    assert Flattener(out_dir=out_dir, manifest_path=manifest_path).run(["StrategyBeethoven"]) == ["StrategyBeethoven"]
+
+    assert Flattener(out_dir=out_dir, manifest_path=manifest_path).run(force=True) == names
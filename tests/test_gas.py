@@ -0,0 +1,143 @@
+import pytest
+from conftest import is_fork, pool_config, run_epoch
+
+# One pool per strategy implementation
+STRATEGY_POOLS = {
+    'StrategyLiquidDriver': 'LQDRFTMyvUSDC',
+    'Strategy0xDAO': '0XMIMUSDCyvUSD',
+    'StrategyBeethoven': 'BeetsFTMUSDCyvUSDC',
+}
+
+@pytest.fixture(scope="module", params=list(STRATEGY_POOLS.values()), ids=list(STRATEGY_POOLS))
+def conf(request, local_env):
+    yield pool_config(request.param, local_env)
+
+
+# Reward tokens added on top of those the strategy emits, minted every epoch
+def add_extra_rewards(MockERC20, local_env, strategy, distributor, conf, gov, count):
+    extras = []
+    for i in range(count):
+        extra = MockERC20.deploy({'from': gov})
+        extra.initialize("Extra Reward {}".format(i), "EXTRA{}".format(i), 18, {'from': gov})
+        local_env.router.setPrice(extra, 10 ** 18, {'from': gov})
+        strategy.addRewardToken(extra, conf['router'], {"from": gov})
+        distributor.permitRewardToken(extra, {"from": gov})
+        extras.append(extra)
+
+    def emit():
+        for extra in extras:
+            extra.mint(strategy, 10 ** 18, {"from": gov})
+    return emit
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("accumulator", [False, True], ids=["loop", "accumulator"])
+@pytest.mark.parametrize("epochs", [1, 10, 30])
+@pytest.mark.parametrize("users", [1, 5])
+@pytest.mark.parametrize("extra_rewards", [0, 2])
+def test_gas_hot_paths(MockERC20, local_env, accounts, chain, strategy, distributor, vault, gov, token, user1, amount, conf, users, epochs, accumulator, extra_rewards, gas_report):
+    if extra_rewards and local_env is None:
+        pytest.skip("extra reward tokens are minted with the local mocks")
+    name = strategy._name
+    distributor.setAccumulatorMode(accumulator, {"from": gov})
+    emit = add_extra_rewards(MockERC20, local_env, strategy, distributor, conf, gov, extra_rewards)
+
+    depositors = [user1] + [accounts.add() for i in range(users - 1)]
+    share = amount // users
+    for user in depositors[1:]:
+        user1.transfer(user, "1 ether")
+        token.transfer(user, share, {"from": user1})
+    for user in depositors:
+        token.approve(vault, share, {"from": user})
+
+    # first deposits, no pending rewards
+    depositGas = [vault.deposit(share // 2, {"from": user}).gas_used for user in depositors]
+
+    chain.sleep(10)
+    chain.mine(1)
+    emit()
+    tx = vault.harvest({"from": gov})
+    # mock and forked contracts cost different gas, they are kept apart in the baseline
+    params = {
+        "users": users,
+        "epochs": epochs,
+        "mode": "accumulator" if accumulator else "loop",
+        "rewardTokens": len(tx.events["RewardsClaimed"]["rewards"]),
+        "network": "fork" if is_fork() else "local",
+    }
+    for gas in depositGas:
+        gas_report.record("RedirectVault.deposit", name, gas, **params)
+
+    # let the rewards go unclaimed for a number of epochs
+    for i in range(epochs):
+        chain.sleep(10 + distributor.timePerEpoch())
+        chain.mine(1)
+        emit()
+        tx = vault.harvest({"from": gov})
+        gas_report.record("RedirectVault.harvest", name, tx.gas_used, **params)
+
+    # processEpoch and the vault hooks in isolation, called as the vault would
+    vaultAccount = accounts.at(vault.address, force=True)
+    for user in depositors:
+        gas = distributor.onDeposit.estimate_gas(user, vault.balanceOf(user), {"from": vaultAccount})
+        gas_report.record("RewardDistributor.onDeposit", name, gas, **params)
+        gas = distributor.onWithdraw.estimate_gas(user, vault.balanceOf(user) // 2, {"from": vaultAccount})
+        gas_report.record("RewardDistributor.onWithdraw", name, gas, **params)
+
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(1)
+    emit()
+    rewards = strategy.claim.call(distributor, {"from": vaultAccount})
+    strategy.claim(distributor, {"from": vaultAccount})
+    tx = distributor.processEpoch(rewards, {"from": vaultAccount})
+    gas_report.record("RewardDistributor.processEpoch", name, tx.gas_used, **params)
+
+    # user paths with pending rewards
+    for i, user in enumerate(depositors):
+        if i % 3 == 0:
+            tx = distributor.harvest({"from": user})
+            gas_report.record("RewardDistributor.harvest", name, tx.gas_used, **params)
+        elif i % 3 == 1:
+            tx = vault.withdraw(vault.balanceOf(user) // 2, {"from": user})
+            gas_report.record("RedirectVault.withdraw", name, tx.gas_used, **params)
+        else:
+            tx = vault.deposit(share // 2, {"from": user})
+            gas_report.record("RedirectVault.deposit", name, tx.gas_used, **params)
+
+    for user in depositors:
+        tx = vault.withdraw(vault.balanceOf(user), {"from": user})
+        gas_report.record("RedirectVault.withdraw", name, tx.gas_used, **params)
+
+
+# Copying the epoch history to a new distributor, and the first interaction of a
+# user whose record is still read from the old one
+@pytest.mark.benchmark
+@pytest.mark.parametrize("epochs", [10, 30])
+def test_gas_migration(RewardDistributor, chain, strategy, distributor, vault, gov, rewards, token, user1, user2, amount, epochs, gas_report):
+    name = strategy._name
+    params = {"epochs": epochs, "network": "fork" if is_fork() else "local"}
+
+    for user in (user1, user2):
+        token.approve(vault, amount, {"from": user})
+        vault.deposit(amount // 2, {"from": user})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    for i in range(epochs):
+        run_epoch(chain, vault, distributor, gov)
+
+    newDistributor = RewardDistributor.deploy(vault, distributor.router(), rewards, {'from': gov})
+    tx = newDistributor.migrateEpochs(distributor, epochs // 2, {"from": gov})
+    gas_report.record("RewardDistributor.migrateEpochs", name, tx.gas_used, **params)
+
+    vault.proposeDistributor(newDistributor, {"from": gov})
+    distributor.emergencySweep(distributor.tokenOut(), newDistributor, {"from": gov})
+    chain.sleep(1)
+    # onMigrate copies the rest of the history
+    tx = vault.upgradeDistributor({"from": gov})
+    gas_report.record("RedirectVault.upgradeDistributor", name, tx.gas_used, **params)
+
+    tx = newDistributor.harvest({"from": user1})
+    gas_report.record("RewardDistributor.harvest", name, tx.gas_used, user="legacy", **params)
+    tx = vault.withdraw(vault.balanceOf(user2) // 2, {"from": user2})
+    gas_report.record("RedirectVault.withdraw", name, tx.gas_used, user="legacy", **params)
@@ -0,0 +1,66 @@
+import pytest
+from scripts.gas_profile import GasProfile, fold
+
+def step(op, gas, cost, depth, jump_depth, fn):
+    return {"op": op, "gas": gas, "gasCost": cost, "depth": depth, "jumpDepth": jump_depth, "fn": fn}
+
+# Vault.harvest -> Vault._claim -> Strategy.claim, then back in Vault.harvest
+TRACE = [
+    step("PUSH1", 1000, 3, 0, 0, "Vault.harvest"),
+    step("JUMP", 997, 8, 0, 0, "Vault.harvest"),
+    step("SLOAD", 989, 100, 0, 1, "Vault._claim"),
+    # reports the 700 gas forwarded, the caller only loses 30
+    step("CALL", 889, 700, 0, 1, "Vault._claim"),
+    step("SSTORE", 690, 20, 1, 0, "Strategy.claim"),
+    step("STOP", 670, 0, 1, 0, "Strategy.claim"),
+    step("JUMP", 859, 8, 0, 1, "Vault._claim"),
+    step("STOP", 851, 0, 0, 0, "Vault.harvest"),
+]
+
+def test_fold_trace():
+    folded = fold(TRACE)
+    assert folded == {
+        ("Vault.harvest",): 11,
+        ("Vault.harvest", "Vault._claim"): 100 + 10 + 8,
+        ("Vault.harvest", "Vault._claim", "Strategy.claim"): 20,
+    }
+    # every unit of gas spent by the execution is attributed once
+    assert sum(folded.values()) == TRACE[0]["gas"] - TRACE[-1]["gas"]
+
+
+def test_profile_aggregates(tmp_path):
+    profile = GasProfile()
+    profile.add_trace("Vault.harvest", 50000, TRACE)
+    other = GasProfile()
+    other.add_trace("Vault.harvest", 50000, TRACE)
+    profile.merge(other)
+
+    frames = profile.frames()
+    assert frames["Vault._claim"] == {"self": 236, "total": 276}
+    assert frames["Vault.harvest"] == {"self": 22, "total": 298}
+    assert profile.transactions["Vault.harvest"] == {"count": 2, "gas": 100000}
+    assert "Vault.harvest;Vault._claim;Strategy.claim 40" in profile.folded()
+
+    folded, report = str(tmp_path / "profile.folded"), str(tmp_path / "profile.json")
+    profile.write(folded, report)
+    loaded = GasProfile.load(report)
+    assert loaded.stacks == profile.stacks
+    assert loaded.report()["frames"][0]["frame"] == "Vault._claim"
+
+
+def test_profile_transactions(vault, strategy, distributor, token, gov, user1, amount, chain):
+    token.approve(vault, amount, {"from": user1})
+    deposit = vault.deposit(amount, {"from": user1})
+    chain.sleep(distributor.timePerEpoch() + 1)
+    harvest = vault.harvest({"from": gov})
+
+    profile = GasProfile()
+    profile.add(deposit)
+    profile.add(harvest)
+    frames = profile.frames()
+
+    assert set(profile.transactions) == {"RedirectVault.deposit", "RedirectVault.harvest"}
+    assert frames["RedirectVault.deposit"]["total"] <= deposit.gas_used
+    assert frames["RewardDistributor.onDeposit"]["total"] > 0
+    assert "{}.claim".format(strategy._name) in frames
+    assert sum(profile.stacks.values()) <= deposit.gas_used + harvest.gas_used
@@ -0,0 +1,49 @@
+import pytest
+from brownie import reverts
+
+def test_batch_harvest(HarvestBatcher, create_vault, vault, strategy, distributor, chain, gov, keeper, token, user1, amount):
+
+    fleet = [(vault, distributor, strategy)] + [create_vault() for i in range(2)]
+    vaults = [v for v, d, s in fleet]
+    batcher = HarvestBatcher.deploy({"from": gov})
+    batcher.setKeeper(keeper, {"from": gov})
+    for v, d, s in fleet:
+        v.setKeeper(batcher, {"from": gov})
+        token.approve(v.address, amount // 3, {"from": user1})
+        v.deposit(amount // 3, {"from": user1})
+
+    with reverts():
+        batcher.harvest(vaults, 0, {"from": user1})
+
+    assert batcher.harvestTriggers(vaults) == [True, True, True]
+    tx = batcher.harvest(vaults, 0, {"from": keeper})
+    assert [d.epoch() for v, d, s in fleet] == [1, 1, 1]
+    assert tx.events["BatchHarvested"]["harvested"] == 3
+    assert len(tx.events["RewardsClaimed"]) == 3
+
+    # nothing is due until the epoch has elapsed
+    assert batcher.harvestTriggers(vaults) == [False, False, False]
+    results = batcher.harvest.call(vaults, 0, {"from": keeper})
+    assert [(r[1], r[2]) for r in results] == [(False, False)] * 3
+
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(1)
+
+    # a reverting strategy doesn't block the rest of the batch
+    fleet[1][2].pause({"from": gov})
+    results = batcher.harvest.call(vaults, 0, {"from": keeper})
+    assert [(r[0], r[1], r[2]) for r in results] == [
+        (vaults[0], True, True), (vaults[1], True, False), (vaults[2], True, True)]
+    assert all(r[3] > 0 for r in results)
+    assert results[1][4] != "0x"
+
+    tx = batcher.harvest(vaults, 0, {"from": keeper})
+    assert [d.epoch() for v, d, s in fleet] == [2, 1, 2]
+    assert tx.events["HarvestFailed"]["vault"] == vaults[1]
+    assert tx.events["BatchHarvested"]["failed"] == 1
+
+    # a per vault gas limit bounds what a single harvest can consume
+    fleet[1][2].unpause({"from": gov})
+    tx = batcher.harvest(vaults, 1000, {"from": keeper})
+    assert tx.events["HarvestFailed"]["vault"] == vaults[1]
+    assert fleet[1][1].epoch() == 1
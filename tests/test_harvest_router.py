@@ -0,0 +1,79 @@
+import pytest
+from brownie import interface
+from brownie import reverts
+
+def test_router_claims_across_vaults(HarvestRouter, create_vault, vault, strategy, distributor, chain, gov, token, user1, user2, amount):
+
+    vault2, distributor2, strategy2 = create_vault()
+    claimRouter = HarvestRouter.deploy({'from': gov})
+    for d in (distributor, distributor2):
+        d.setClaimRouter(claimRouter, {'from': gov})
+
+    for v in (vault, vault2):
+        token.approve(v.address, amount // 2, {"from": user1})
+        v.deposit(amount // 2, {"from": user1})
+
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    vault2.harvest({"from": gov})
+
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(5)
+    vault.harvest({"from": gov})
+    vault2.harvest({"from": gov})
+
+    tokenReceived = interface.IERC20Extended(distributor.targetToken())
+    targetBefore = tokenReceived.balanceOf(user1)
+    pending = distributor.getUserRewardsTarget(user1) + distributor2.getUserRewardsTarget(user1)
+    assert pending > 0
+
+    tx = claimRouter.claim([distributor, distributor2], {"from": user1})
+
+    # both distributors share the target vault, so one withdraw and one transfer
+    assert len(tx.events["RouterHarvested"]) == 1
+    assert pytest.approx(tokenReceived.balanceOf(user1) - targetBefore, rel=1e-6) == pending
+    assert distributor.getUserRewards(user1) == 0
+    assert distributor2.getUserRewards(user1) == 0
+    assert interface.IERC20(distributor.tokenOut()).balanceOf(claimRouter) == 0
+    assert tokenReceived.balanceOf(claimRouter) == 0
+
+    # nothing pending is skipped rather than reverting
+    tx = claimRouter.claim([distributor, distributor2], {"from": user1})
+    assert "RouterHarvested" not in tx.events
+
+    # claims through the router roll an overdue epoch over, as harvest() does
+    vault.setLazyRollover(True, 100, {"from": gov})
+    chain.sleep(distributor.timePerEpoch() + 200)
+    chain.mine(1)
+    epoch = distributor.epoch()
+    tx = claimRouter.claim([distributor, distributor2], {"from": user1})
+    assert tx.events["EpochCheckpointed"]["success"]
+    assert distributor.epoch() == epoch + 1
+
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    vault2.withdraw(vault2.balanceOf(user1), {"from": user1})
+
+
+def test_harvest_for_only_router(HarvestRouter, vault, strategy, distributor, chain, gov, token, user1, amount):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(5)
+    vault.harvest({"from": gov})
+
+    with reverts("!claimRouter"):
+        distributor.harvestFor(user1, {"from": user1})
+
+    claimRouter = HarvestRouter.deploy({'from': gov})
+    with reverts():
+        distributor.setClaimRouter(claimRouter, {'from': user1})
+
+    # a distributor that hasn't enabled the router can't be claimed through it
+    with reverts():
+        claimRouter.claim([distributor], {"from": user1})
@@ -0,0 +1,68 @@
+import pytest
+from brownie import web3
+from scripts.indexer import IndexStore, Indexer, reconcile
+from conftest import run_epoch
+
+
+def test_indexer_rebuilds_accounting(vault, strategy, distributor, chain, gov, token, user1, user2, amount, tmp_path):
+
+    start = web3.eth.block_number
+    store = IndexStore(str(tmp_path / "index.sqlite"))
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    run_epoch(chain, vault, distributor, gov, blocks=5)
+    vault.withdraw(amount // 4, {"from": user1})
+    run_epoch(chain, vault, distributor, gov, blocks=5)
+
+    # small batches to exercise the block-range paging
+    Indexer(store, vault, distributor, start_block=start, batch_size=3).sync()
+
+    epochs = store.epochs(distributor.address)
+    assert store.epoch(distributor.address) == distributor.epoch()
+    for epoch, (rewards, balance) in epochs.items():
+        assert rewards == distributor.epochRewards(epoch)
+        assert balance == distributor.epochBalance(epoch)
+    assert reconcile(store, distributor, [user1, user2]) == []
+
+    # resumes from the stored checkpoint
+    distributor.harvest({"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    run_epoch(chain, vault, distributor, gov, blocks=5)
+
+    indexer = Indexer(store, vault, distributor, start_block=start, batch_size=3)
+    assert indexer.block > start
+    indexer.sync()
+    assert store.epoch(distributor.address) == distributor.epoch()
+    assert reconcile(store, distributor, [user1, user2]) == []
+
+    flows = store.db.execute("SELECT kind, COUNT(*) FROM flows GROUP BY kind").fetchall()
+    assert dict(flows) == {"deposit": 3, "withdraw": 1}
+    harvests = store.db.execute("SELECT user FROM harvests").fetchall()
+    assert harvests == [(user2.address,)]
+
+
+def test_indexer_emergency_exit(vault, strategy, distributor, chain, gov, token, user1, amount, tmp_path):
+
+    start = web3.eth.block_number
+    store = IndexStore(str(tmp_path / "index.sqlite"))
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    run_epoch(chain, vault, distributor, gov, blocks=5)
+    distributor.emergencyDisableVault({"from": gov})
+    run_epoch(chain, vault, distributor, gov, blocks=5)
+
+    Indexer(store, vault, distributor, start_block=start).sync()
+    assert store.emergency_exit(distributor.address) == (
+        distributor.emergencyExitEpoch(), distributor.emergencyVaultBalance(), distributor.emergencyTargetOut())
+    assert reconcile(store, distributor, [user1]) == []
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from scripts.keeper import Keeper
+
+def test_keeper_harvests_fleet(create_vault, vault, strategy, distributor, chain, gov, token, user1, amount):
+
+    fleet = [(vault, distributor)] + [create_vault()[:2] for i in range(2)]
+    for v, d in fleet:
+        token.approve(v.address, amount // 3, {"from": user1})
+        v.deposit(amount // 3, {"from": user1})
+
+    keeper = Keeper(gov, [v for v, d in fleet], poll_interval=0)
+
+    # every new vault is due for its first epoch
+    results = asyncio.run(keeper.run_once())
+    assert all(tx is not None and tx.status == 1 for tx in results.values())
+    assert [d.epoch() for v, d in fleet] == [1, 1, 1]
+
+    # nothing is due until the epoch has elapsed
+    results = asyncio.run(keeper.run_once())
+    assert list(results.values()) == [None, None, None]
+    assert keeper.metrics.counters["polls"] == 6
+    assert keeper.metrics.counters["confirmed"] == 3
+
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(1)
+
+    # skipped while the pending rewards are worth less than the threshold
+    keeper.min_reward_value = 2 ** 255
+    asyncio.run(keeper.run_once())
+    assert keeper.metrics.counters["skipped"] == 3
+    assert [d.epoch() for v, d in fleet] == [1, 1, 1]
+
+    keeper.min_reward_value = 1
+    assert keeper.pending_reward_value(vault.address) > 0
+    asyncio.run(keeper.run_once())
+    assert [d.epoch() for v, d in fleet] == [2, 2, 2]
+    assert keeper.errors == {}
+
+    metrics = keeper.metrics.render()
+    assert "keeper_confirmed_total 6" in metrics
+    assert 'keeper_harvest_seconds{quantile="0.50"}' in metrics
+
+
+def test_keeper_isolates_failures(vault, strategy, distributor, gov, user1, token, amount):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    # user1 is not a keeper so the harvest can't be estimated
+    keeper = Keeper(user1, [vault])
+    results = asyncio.run(keeper.run_once())
+    assert results[vault.address] is None
+    assert keeper.metrics.counters["failed"] == 1
+    assert vault.address in keeper.errors
+
+    async def scrape():
+        server = await keeper.serve_metrics(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\n\r\n")
+        response = await reader.read()
+        server.close()
+        return response.decode()
+
+    assert "keeper_failed_total 1" in asyncio.run(scrape())
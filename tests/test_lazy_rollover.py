@@ -0,0 +1,91 @@
+import pytest
+from brownie import reverts
+
+def test_lazy_rollover(vault, strategy, distributor, chain, gov, token, user1, user2, amount):
+
+    with reverts():
+        vault.setLazyRollover(True, 100, {"from": user1})
+    with reverts("!vault"):
+        vault.rollOverdueEpoch({"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount // 2, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    # disabled by default, user interactions never process the epoch
+    chain.sleep(distributor.timePerEpoch() + 200)
+    chain.mine(1)
+    assert not vault.checkpointTrigger()
+    vault.withdraw(vault.balanceOf(user1) // 4, {"from": user1})
+    assert distributor.epoch() == 1
+
+    vault.setLazyRollover(True, 100, {"from": gov})
+    assert vault.checkpointTrigger()
+
+    # the first interaction once the epoch is overdue rolls it over, the rewards
+    # are carried unsold
+    token.approve(vault.address, amount, {"from": user2})
+    tx = vault.deposit(amount // 4, {"from": user2})
+    assert tx.events["EpochCheckpointed"]["success"]
+    assert "RewardsClaimed" in tx.events
+    assert "RewardsCarried" in tx.events
+    assert "CarrySettled" not in tx.events
+    assert distributor.epoch() == 2
+    assert distributor.carryEpochs() == 1
+    assert distributor.getUserRewards(user1) == 0
+
+    # the deposit lands in the new epoch
+    assert distributor.userInfo(user2)[1] == 3
+
+    # the keeper still has its grace period
+    chain.sleep(distributor.timePerEpoch() + 10)
+    chain.mine(1)
+    tx = vault.withdraw(vault.balanceOf(user2) // 2, {"from": user2})
+    assert "EpochCheckpointed" not in tx.events
+    assert distributor.epoch() == 2
+
+    # the keepers harvest sells the carried rewards
+    tx = vault.harvest({"from": gov})
+    assert "CarrySettled" in tx.events
+    assert distributor.carryEpochs() == 0
+    assert distributor.epoch() == 3
+    assert distributor.getUserRewards(user1) > 0
+
+    # a distributor harvest rolls the epoch before paying out the settled rewards
+    chain.sleep(distributor.timePerEpoch() + 200)
+    chain.mine(1)
+    pending = distributor.getUserRewards(user1)
+    tx = distributor.harvest({"from": user1})
+    assert distributor.epoch() == 4
+    assert distributor.carryEpochs() == 1
+    assert tx.events["UserHarvested"]["rewards"] == pending
+
+    # a failing harvest doesn't block withdrawals
+    chain.sleep(distributor.timePerEpoch() + 200)
+    chain.mine(1)
+    strategy.pause({"from": gov})
+    tx = vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert not tx.events["EpochCheckpointed"]["success"]
+    assert distributor.epoch() == 4
+    assert vault.balanceOf(user1) == 0
+
+    # anyone can roll over an overdue epoch
+    strategy.unpause({"from": gov})
+    vault.checkpointEpoch({"from": user2})
+    assert distributor.epoch() == 5
+    assert distributor.carryEpochs() == 2
+
+    # user interactions stop rolling once the carry window is full
+    distributor.setMaxCarryEpochs(2, {"from": gov})
+    chain.sleep(distributor.timePerEpoch() + 200)
+    chain.mine(1)
+    assert not vault.checkpointTrigger()
+    tx = vault.withdraw(vault.balanceOf(user2) // 2, {"from": user2})
+    assert "EpochCheckpointed" not in tx.events
+    assert distributor.epoch() == 5
+
+    vault.harvest({"from": gov})
+    assert distributor.carryEpochs() == 0
+    assert distributor.epoch() == 6
@@ -0,0 +1,59 @@
+import pytest
+from brownie import interface
+from scripts.lens import LensClient
+
+def test_lens_matches_getters(RedirectLens, vault, strategy, distributor, chain, gov, token, user1, user2, amount, conf):
+
+    lens = RedirectLens.deploy({'from': gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    chain.sleep(10 + distributor.timePerEpoch())
+    chain.mine(5)
+    vault.harvest({"from": gov})
+
+    state = lens.getVault(vault)
+    assert state["strategy"] == strategy
+    assert state["distributor"] == distributor
+    assert state["tokenOut"] == distributor.tokenOut()
+    assert state["totalBalance"] == vault.totalBalance()
+    assert state["pricePerFullShare"] == vault.getPricePerFullShare()
+    assert state["strategyBalance"] == strategy.balanceOf()
+    assert state["epoch"] == distributor.epoch()
+    assert state["targetBalance"] == distributor.targetBalance()
+
+    users = lens.getUsers([vault], [user1, user2])
+    assert len(users) == 2
+    assert users[0]["shares"] == vault.balanceOf(user1)
+    assert users[0]["pendingRewardsTarget"] == distributor.getUserRewardsTarget(user1)
+    assert users[0]["cumulativeDeposits"] == vault.cumulativeDeposits(user1)
+    assert (users[0]["amount"], users[0]["epochStart"], users[0]["depositTime"]) == distributor.userInfo(user1)
+    assert users[1]["shares"] == 0
+    assert users[1]["tokenBalance"] == token.balanceOf(user2)
+
+    assert lens.getLpPrice(conf['router'], token, conf['targetToken'], conf['weth']) > 0
+
+
+def test_lens_client_cache(RedirectLens, vault, strategy, distributor, gov, token, user1, user2, amount):
+
+    client = LensClient(RedirectLens.deploy({'from': gov}), ttl=3600)
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+
+    positions = client.positions([vault], user1)
+    assert positions[0]["vault"]["totalSupply"] == vault.totalSupply()
+    assert positions[0]["user"]["shares"] == vault.balanceOf(user1)
+
+    # cached results are served until they expire or are cleared
+    vault.withdraw(amount // 2, {"from": user1})
+    assert client.users([vault], [user1])[(vault.address, user1.address)]["shares"] == amount
+    client.clear()
+    assert client.users([vault], [user1])[(vault.address, user1.address)]["shares"] == vault.balanceOf(user1)
+
+    states = client.users([vault], [user1, user2])
+    assert len(states) == 2
@@ -0,0 +1,80 @@
+import pytest
+from brownie import reverts
+from conftest import run_epoch
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+@pytest.fixture
+def extra_token(MockERC20, local_env, gov):
+    if local_env is None:
+        pytest.skip("the extra reward token is minted with the local mocks")
+    extra = MockERC20.deploy({'from': gov})
+    extra.initialize("Extra Reward", "EXTRA", 18, {'from': gov})
+    local_env.router.setPrice(extra, 10 ** 18, {'from': gov})
+    yield extra
+
+
+def transfers_from(tx, token, sender):
+    return [t for t in tx.events["Transfer"] if t.address == token and t["from"] == sender]
+
+
+def test_sells_every_emitting_token(vault, strategy, distributor, chain, gov, rewards, token, reward_token, extra_token, weth, user1, amount, conf):
+
+    strategy.addRewardToken(extra_token, conf['router'], {"from": gov})
+    assert strategy.rewardTokens() == 2
+    assert strategy.rewardTokenAt(1) == extra_token
+    assert strategy.tokenRouter(extra_token) == conf['router']
+    distributor.permitRewardToken(extra_token, {"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    extra_token.mint(strategy, 10 ** 18, {"from": gov})
+    tx = run_epoch(chain, vault, distributor, gov)
+
+    assert extra_token.balanceOf(distributor) == 0
+    assert extra_token.balanceOf(rewards) == 10 ** 18 * distributor.profitFee() // 10000
+    assert reward_token.balanceOf(distributor) == 0
+    assert distributor.epochRewards(1) > 0
+
+    # both rewards are sold into weth and the weth is sold to the target in one swap
+    assert len(transfers_from(tx, extra_token, distributor)) == 2
+    assert len(transfers_from(tx, weth, distributor)) == 1
+
+    # tokens that stop emitting are left on the strategy
+    strategy.emittance(1, False, {"from": gov})
+    extra_token.mint(strategy, 10 ** 18, {"from": gov})
+    run_epoch(chain, vault, distributor, gov)
+    assert extra_token.balanceOf(strategy) == 10 ** 18
+    assert distributor.epochRewards(2) > 0
+
+
+def test_token_routes(vault, strategy, distributor, chain, gov, rewards, token, extra_token, weth, user1, amount, conf):
+
+    with reverts():
+        distributor.setTokenRoute(extra_token, conf['router'], ZERO_ADDRESS, False, {"from": user1})
+    with reverts("!token"):
+        distributor.setTokenRoute(conf['targetToken'], conf['router'], ZERO_ADDRESS, False, {"from": gov})
+
+    assert distributor.getSwapRoute(extra_token) == (conf['router'], weth, False)
+    distributor.setTokenRoute(extra_token, conf['router'], ZERO_ADDRESS, False, {"from": gov})
+    assert distributor.getSwapRoute(extra_token) == (conf['router'], ZERO_ADDRESS, False)
+
+    strategy.addRewardToken(extra_token, conf['router'], {"from": gov})
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    extra_token.mint(strategy, 10 ** 18, {"from": gov})
+    tx = run_epoch(chain, vault, distributor, gov)
+
+    # the extra token is sold directly, the farm token is the only one through weth
+    # so it's sold with a single multi-hop swap
+    assert extra_token.balanceOf(distributor) == 0
+    assert len(transfers_from(tx, weth, distributor)) == 0
+    assert distributor.epochRewards(1) > 0
@@ -0,0 +1,62 @@
+import pytest
+from scripts.indexer import IndexStore
+from scripts.replay import WorkloadReplay, trace_from_index
+
+def test_replay_trace(vault, strategy, distributor, token, gov, user1, amount):
+
+    def fund(account, lp):
+        token.transfer(account, lp, {"from": user1})
+
+    trace = [
+        {"action": "deposit", "user": 0, "amount": amount // 10},
+        {"action": "deposit", "user": 1, "amount": amount // 10},
+        {"action": "process"},
+        {"action": "process"},
+        {"action": "process"},
+        {"action": "harvest", "user": 0},
+        {"action": "withdraw", "user": 1, "shares": amount // 20},
+        # nothing to claim or withdraw
+        {"action": "harvest", "user": 2},
+        {"action": "withdraw", "user": 2, "shares": amount},
+        {"action": "process"},
+        {"action": "emergency_withdraw", "user": 0},
+        {"action": "deposit", "user": 1, "amount": amount // 10},
+        {"action": "process"},
+    ]
+    replay = WorkloadReplay(vault, distributor, gov, fund, funder=user1, window=2)
+    replay.run(trace)
+
+    assert distributor.epoch() == 5
+    assert replay.failed == []
+    assert replay.skipped == {"harvest": 1, "withdraw": 1}
+    assert vault.balanceOf(replay.users[0]) == 0
+    assert vault.balanceOf(replay.users[1]) == pytest.approx(amount // 10 + amount // 20, rel=1e-9)
+
+    report = replay.report()
+    assert [row["epochs"] for row in report["RedirectVault.harvest"]] == ["0-1", "2-3", "4-5"]
+    assert sum(row["count"] for row in report["RedirectVault.harvest"]) == 5
+    assert sum(row["count"] for row in report["RedirectVault.deposit"]) == 3
+    assert report["RewardDistributor.harvest"][0]["epochs"] == "2-3"
+
+    assert len(replay.cliffs(30_000_000, threshold=0)) == sum(len(rows) for rows in report.values())
+    assert replay.cliffs(30_000_000) == []
+
+
+def test_trace_from_index():
+    store = IndexStore(":memory:")
+    vault, distributor, alice, bob = "0xvault", "0xdistributor", "0xalice", "0xbob"
+    store.db.executemany("INSERT INTO flows VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+        (vault, bob, "deposit", "200", "200", 10, 3, "0x1"),
+        (vault, alice, "deposit", "100", "100", 10, 1, "0x2"),
+        (vault, bob, "withdraw", "50", "50", 30, 0, "0x3"),
+    ])
+    store.db.execute("INSERT INTO harvests VALUES (?, ?, ?, ?, ?, ?, ?)", (distributor, alice, "7", "0xusdc", 30, 5, "0x4"))
+    store.db.execute("INSERT INTO epochs VALUES (?, ?, ?, ?, ?)", (distributor, 0, "7", "300", 10))
+
+    assert trace_from_index(store, vault, distributor) == [
+        {"action": "deposit", "block": 10, "user": 0, "amount": 100},
+        {"action": "deposit", "block": 10, "user": 1, "amount": 200},
+        {"action": "process", "block": 10},
+        {"action": "withdraw", "block": 30, "user": 1, "shares": 50},
+        {"action": "harvest", "block": 30, "user": 0},
+    ]
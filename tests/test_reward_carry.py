@@ -0,0 +1,103 @@
+import pytest
+from brownie import interface, web3
+from brownie import reverts
+from scripts.indexer import IndexStore, Indexer, reconcile
+from conftest import run_epoch
+
+def test_carry_until_threshold(vault, strategy, distributor, chain, gov, token, reward_token, user1, user2, amount, tmp_path):
+
+    start = web3.eth.block_number
+    store = IndexStore(str(tmp_path / "index.sqlite"))
+
+    # carry rewards for as long as possible
+    distributor.setParamaters(10000, 500, 2 ** 200, {"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    for i in range(3):
+        run_epoch(chain, vault, distributor, gov)
+
+    assert distributor.carryEpochs() == 3
+    assert distributor.carryQuote() > 0
+    assert reward_token.balanceOf(distributor) > 0
+    assert distributor.targetBalance() == 0
+    assert [distributor.epochRewards(e) for e in range(1, 4)] == [0, 0, 0]
+    assert distributor.getUserRewards(user1) == 0
+
+    # user2 leaves half way through the window, their share is carried
+    vault.withdraw(vault.balanceOf(user2), {"from": user2})
+    run_epoch(chain, vault, distributor, gov)
+
+    # lowering the threshold settles the whole window in the next epoch
+    distributor.setParamaters(10000, 500, 1, {"from": gov})
+    tx = run_epoch(chain, vault, distributor, gov)
+
+    assert distributor.carryEpochs() == 0
+    assert distributor.carryRound() == 1
+    assert reward_token.balanceOf(distributor) == 0
+    assert len(tx.events["EpochRewardsSettled"]) == 5
+    amountOut = tx.events["CarrySettled"]["amountOut"]
+    settled = [distributor.epochRewards(e) for e in range(1, 6)]
+    assert all(r > 0 for r in settled)
+    assert sum(settled) <= amountOut
+    assert pytest.approx(sum(settled), rel=1e-9) == amountOut
+
+    pending = [distributor.getUserRewards(u) for u in (user1, user2)]
+    assert pending[1] > 0
+    assert sum(pending) <= distributor.targetBalance()
+    assert pytest.approx(sum(pending), rel=1e-6) == amountOut
+
+    Indexer(store, vault, distributor, start_block=start).sync()
+    assert reconcile(store, distributor, [user1, user2]) == []
+
+    tokenOut = interface.IERC20(distributor.tokenOut())
+    distributor.harvest({"from": user2})
+    assert distributor.getUserRewards(user2) == 0
+    assert distributor.totalClaimed(user2) == pending[1]
+
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert distributor.totalClaimed(user1) == pending[0]
+    assert tokenOut.balanceOf(distributor) < 100
+
+
+def test_carry_limits(vault, strategy, distributor, chain, gov, token, reward_token, user1, amount):
+
+    with reverts():
+        distributor.setMaxCarryEpochs(2, {"from": user1})
+    with reverts():
+        distributor.setMaxCarryEpochs(0, {"from": gov})
+    distributor.setMaxCarryEpochs(2, {"from": gov})
+    distributor.setParamaters(10000, 500, 2 ** 200, {"from": gov})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    # rewards are sold after maxCarryEpochs whatever their value
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.carryEpochs() == 1
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.carryEpochs() == 0
+    assert distributor.epochRewards(1) > 0 and distributor.epochRewards(2) > 0
+
+    # an emergency exit settles the window before leaving the vault
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.carryEpochs() == 1
+    with reverts():
+        distributor.settleRewards({"from": user1})
+    distributor.emergencyDisableVault({"from": gov})
+    assert distributor.carryEpochs() == 0
+    assert distributor.emergencyExitRound() == distributor.carryRound() == 2
+    assert reward_token.balanceOf(distributor) == 0
+
+    pending = distributor.getUserRewards(user1)
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert distributor.totalClaimed(user1) == pending
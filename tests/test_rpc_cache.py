@@ -0,0 +1,101 @@
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from brownie import network
+from conftest import is_fork
+from scripts.rpc_cache import RpcCache, RpcStore, NotRecorded, open_cache
+
+BLOCK = 1000
+
+class Upstream:
+    """Fake upstream node that counts the requests it serves"""
+
+    def __init__(self):
+        self.requests = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                upstream.requests.append(request)
+                if request["method"] == "eth_blockNumber":
+                    result = hex(BLOCK + 5)
+                else:
+                    result = "0x{:064x}".format(len(json.dumps(request["params"])))
+                body = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+def rpc(port, payload):
+    request = urllib.request.Request("http://127.0.0.1:{}".format(port), data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def request(method, *params):
+    return {"jsonrpc": "2.0", "id": 7, "method": method, "params": list(params)}
+
+
+def test_rpc_cache_record_replay(tmp_path):
+    upstream = Upstream()
+    cache_dir = str(tmp_path / "ftm")
+    calls = [
+        request("eth_getStorageAt", "0x4Fe6f19031239F105F753D1DF8A0d24857D0cAA2", "0x0", "latest"),
+        request("eth_getCode", "0x4fe6f19031239f105f753d1df8a0d24857d0caa2", hex(BLOCK)),
+        request("eth_call", {"to": "0x04068DA6C83AFCFA0e13ba15A6696662335D5B75", "data": "0x313ce567"}, "latest"),
+    ]
+
+    # the upstream's current block is pinned, "latest" resolves to it
+    cache = open_cache("record", upstream=upstream.url, cache_dir=str(tmp_path / "latest"))
+    assert cache.store.block == BLOCK + 5
+    cache = open_cache("record", block=BLOCK, upstream=upstream.url, cache_dir=cache_dir)
+    server = cache.serve(0)
+    port = server.server_address[1]
+    assert rpc(port, request("eth_blockNumber"))["result"] == hex(BLOCK)
+    recorded = [rpc(port, call)["result"] for call in calls]
+    assert upstream.requests[-1]["params"][-1] == hex(BLOCK)
+    sent = len(upstream.requests)
+
+    # the same requests, with an equivalent block tag and address case, are served from the store
+    calls[1]["params"] = ["0x4Fe6f19031239F105F753D1DF8A0d24857D0cAA2", "latest"]
+    assert [r["result"] for r in rpc(port, calls)] == recorded
+    assert len(upstream.requests) == sent
+    server.shutdown()
+
+    # replay never goes upstream
+    upstream.server.shutdown()
+    cache = open_cache("replay", cache_dir=cache_dir)
+    assert cache.store.block == BLOCK
+    server = cache.serve(0)
+    port = server.server_address[1]
+    assert [rpc(port, call)["result"] for call in calls] == recorded
+    assert "not recorded" in rpc(port, request("eth_getBalance", calls[1]["params"][0], "latest"))["error"]["message"]
+    server.shutdown()
+
+    assert cache.store.stats() == {"eth_call": 1, "eth_getCode": 1, "eth_getStorageAt": 1}
+    with pytest.raises(NotRecorded):
+        open_cache("replay", cache_dir=str(tmp_path / "empty"))
+
+
+@pytest.mark.parametrize("name,fork", [
+    ("ftm-main-fork", True),
+    ("ftm-main-fork-cached", True),
+    ("development", False),
+])
+def test_cached_network_is_fork(monkeypatch, name, fork):
+    # the cached network runs the fork fixtures, not the local mocks
+    monkeypatch.setattr(network, "show_active", lambda: name)
+    assert is_fork() == fork
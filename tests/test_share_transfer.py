@@ -0,0 +1,102 @@
+import pytest
+from brownie import reverts, web3
+from scripts.indexer import IndexStore, Indexer, reconcile
+from conftest import run_epoch
+
+def test_share_transfer(vault, strategy, distributor, chain, gov, token, user1, user2, amount):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+
+    # transfers are disabled by default
+    shares = vault.balanceOf(user1)
+    with reverts("Transfer Not Supported"):
+        vault.transfer(user2, shares // 2, {"from": user1})
+    with reverts():
+        vault.setTransfersEnabled(True, {"from": user1})
+    vault.setTransfersEnabled(True, {"from": gov})
+
+    run_epoch(chain, vault, distributor, gov)
+    pending = distributor.getUserRewards(user1)
+    assert pending > 0
+
+    # the sender is paid out and both users are settled, the strategy isn't touched
+    balance = strategy.balanceOf()
+    epoch = distributor.epoch()
+    vault.transfer(user2, shares // 2, {"from": user1})
+    assert strategy.balanceOf() == balance
+    assert distributor.totalClaimed(user1) == pending
+    assert distributor.userInfo(user1)[:2] == (shares - shares // 2, epoch)
+    assert distributor.userInfo(user2)[:2] == (shares // 2, epoch + 1)
+    assert distributor.eligibleEpochRewards() == shares - shares // 2
+
+    # the receiver earns from the following epoch
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.getUserRewards(user2) == 0
+    carried = distributor.getUserRewards(user1)
+    assert carried > 0
+    run_epoch(chain, vault, distributor, gov)
+    rewards = [distributor.getUserRewards(u) for u in (user1, user2)]
+    assert rewards[1] > 0
+    assert pytest.approx(rewards[0] - carried, rel=1e-3) == rewards[1]
+
+    # transferFrom settles the same way
+    vault.approve(user1, shares // 2, {"from": user2})
+    vault.transferFrom(user2, user1, shares // 2, {"from": user1})
+    assert distributor.totalClaimed(user2) == rewards[1]
+    # user1 is eligible, so it keeps its epoch and only the received shares wait
+    assert distributor.userInfo(user1)[:2] == (shares, epoch + 2)
+    assert distributor.ineligibleBalance(user1) == (shares // 2, epoch + 2)
+    assert vault.balanceOf(user2) == 0
+
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert vault.totalSupply() == 0
+
+
+def test_dust_transfer(vault, strategy, distributor, chain, gov, token, user1, user2, amount, tmp_path):
+
+    start = web3.eth.block_number
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount // 2, {"from": user1})
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    vault.setTransfersEnabled(True, {"from": gov})
+    run_epoch(chain, vault, distributor, gov)
+
+    # a third party sends dust to an eligible holder
+    shares = vault.balanceOf(user1)
+    eligible = distributor.eligibleEpochRewards()
+    epoch = distributor.epoch()
+    vault.transfer(user1, 1, {"from": user2})
+    assert distributor.userInfo(user1)[:2] == (shares + 1, epoch)
+    assert distributor.ineligibleBalance(user1) == (1, epoch)
+    assert distributor.eligibleEpochRewards() == eligible - 1
+
+    # the holder keeps earning on its balance this epoch
+    run_epoch(chain, vault, distributor, gov)
+    rewards = distributor.epochRewards(epoch) * shares // distributor.epochBalance(epoch)
+    assert rewards > 0
+    assert distributor.getUserRewards(user1) == rewards
+
+    # and the dust earns from the next
+    run_epoch(chain, vault, distributor, gov)
+    rewards += distributor.epochRewards(epoch + 1) * shares // distributor.epochBalance(epoch + 1)
+    rewards += distributor.epochRewards(epoch + 1) * 1 // distributor.epochBalance(epoch + 1)
+    assert distributor.getUserRewards(user1) == rewards
+
+    store = IndexStore(str(tmp_path / "index.sqlite"))
+    Indexer(store, vault, distributor, start_block=start).sync()
+    assert reconcile(store, distributor, [user1, user2]) == []
+
+    # settling the holder pays the dust and clears it
+    distributor.harvest({"from": user1})
+    assert distributor.totalClaimed(user1) == rewards
+    run_epoch(chain, vault, distributor, gov)
+    assert distributor.getUserRewards(user1) == (
+        distributor.epochRewards(epoch + 2) * (shares + 1) // distributor.epochBalance(epoch + 2))
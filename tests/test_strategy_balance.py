@@ -0,0 +1,123 @@
+import pytest
+from brownie import reverts
+from conftest import lqdrMasterChef
+
+def test_cached_strategy_balance(vault, strategy, distributor, chain, gov, token, user1, user2, amount):
+
+    with reverts():
+        vault.setStrategyBalanceCached(True, {"from": user1})
+    with reverts("!cached"):
+        vault.reconcileStrategyBalance({"from": user1})
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount // 2, {"from": user1})
+    vault.setStrategyBalanceCached(True, {"from": gov})
+    assert vault.strategyBalance() == strategy.balanceOf() == amount // 2
+
+    # transfers to and from the strategy are booked by the vault
+    vault.deposit(amount // 2, {"from": user1})
+    assert vault.strategyBalance() == strategy.balanceOf() == amount
+    vault.withdraw(amount // 4, {"from": user1})
+    assert vault.strategyBalance() == strategy.balanceOf()
+    assert vault.totalBalance() == strategy.balanceOf()
+
+    # bookings match the strategy, nothing to reconcile
+    token.approve(vault.address, amount, {"from": user2})
+    tx = vault.deposit(amount // 10, {"from": user2})
+    assert "StrategyBalanceDrift" not in tx.events
+
+    # LP sent to the strategy directly isn't counted until it's reconciled
+    cached = vault.strategyBalance()
+    token.transfer(strategy, amount // 10, {"from": user2})
+    assert vault.totalBalance() == cached
+    tx = vault.reconcileStrategyBalance({"from": user2})
+    assert tx.return_value
+    assert tx.events["StrategyBalanceDrift"]["cached"] == cached
+    assert tx.events["StrategyBalanceDrift"]["actual"] == strategy.balanceOf()
+    assert vault.totalBalance() == strategy.balanceOf()
+    assert not vault.reconcileStrategyBalance({"from": user2}).return_value
+
+    # and harvests reconcile each epoch
+    token.transfer(strategy, amount // 10, {"from": user2})
+    chain.sleep(distributor.timePerEpoch() + 1)
+    chain.mine(1)
+    tx = vault.harvest({"from": gov})
+    assert "StrategyBalanceDrift" in tx.events
+    assert vault.strategyBalance() == strategy.balanceOf()
+
+    # the strategy reports what it changes itself
+    token.transfer(strategy, amount // 10, {"from": user2})
+    tx = strategy.panic({"from": gov})
+    assert tx.events["StrategyBalanceDrift"]["actual"] == strategy.balanceOf()
+    assert vault.strategyBalance() == strategy.balanceOf()
+
+    # reports from anyone else are ignored
+    vault.reportBalance(0, {"from": user1})
+    assert vault.strategyBalance() == strategy.balanceOf()
+
+    vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert vault.strategyBalance() == strategy.balanceOf()
+
+
+def test_live_strategy_balance(vault, strategy, gov, token, user1, user2, amount):
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount, {"from": user1})
+    assert vault.strategyBalance() == 0
+    assert vault.balanceOfStrategy() == strategy.balanceOf()
+
+    vault.setStrategyBalanceCached(True, {"from": gov})
+    vault.setStrategyBalanceCached(False, {"from": gov})
+    token.transfer(strategy, amount // 10, {"from": user2})
+    assert vault.totalBalance() == strategy.balanceOf()
+
+
+def test_strategy_balance_shortfall(local_env, conf, vault, strategy, gov, token, user1, user2, amount):
+    chef = local_env and local_env.chefs.get(conf['farmAddress'])
+    if chef is None:
+        pytest.skip("the withdrawal fee is set on the local MockMasterChef")
+
+    token.approve(vault.address, amount, {"from": user1})
+    vault.deposit(amount // 2, {"from": user1})
+    token.approve(vault.address, amount, {"from": user2})
+    vault.deposit(amount // 2, {"from": user2})
+    vault.setStrategyBalanceCached(True, {"from": gov})
+
+    # the strategy returns less than the vault asked for, the cache is reset from it
+    chef.setWithdrawFee(conf['pid'], 100, {"from": gov})
+    cached = vault.strategyBalance()
+    tx = vault.withdraw(amount // 4, {"from": user1})
+    assert tx.events["StrategyBalanceDrift"]["cached"] == cached
+    assert vault.strategyBalance() == strategy.balanceOf()
+    assert vault.totalBalance() == strategy.balanceOf()
+
+    tx = vault.emergencyWithdrawAll({"from": user2})
+    assert "StrategyBalanceDrift" in tx.events
+    assert vault.strategyBalance() == strategy.balanceOf()
+
+    # without a shortfall withdrawals are booked as before
+    chef.setWithdrawFee(conf['pid'], 0, {"from": gov})
+    tx = vault.withdraw(vault.balanceOf(user1), {"from": user1})
+    assert "StrategyBalanceDrift" not in tx.events
+    assert vault.strategyBalance() == strategy.balanceOf() == 0
+
+
+def test_exit_when_report_fails(MockLegacyVault, StrategyLiquidDriver, conf, gov, token, user1, amount):
+    if conf['farmAddress'] != lqdrMasterChef:
+        pytest.skip("deploys a LiquidDriver strategy")
+
+    # the strategy's vault has no reportBalance(), panic and emergencyWithdraw still exit
+    legacy = MockLegacyVault.deploy({"from": gov})
+    strategy = StrategyLiquidDriver.deploy(legacy, token, conf['pid'], {"from": gov})
+    token.transfer(strategy, amount, {"from": user1})
+    strategy.deposit({"from": gov})
+    assert strategy.balanceOfPool() == amount
+
+    strategy.panic({"from": gov})
+    assert strategy.balanceOfPool() == 0
+    assert strategy.balanceOf() == amount
+
+    strategy.unpause({"from": gov})
+    strategy.emergencyWithdraw({"from": gov})
+    assert strategy.balanceOfPool() == 0
+    assert strategy.balanceOf() == amount
@@ -0,0 +1,45 @@
+import pytest
+from brownie import reverts
+
+def test_deposit_buffer(vault, strategy, distributor, chain, gov, token, user1, user2, amount):
+
+    with reverts():
+        vault.setBufferHighWaterMark(amount, {"from": user1})
+
+    # unbuffered deposits go straight to the strategy
+    token.approve(vault.address, amount, {"from": user2})
+    unbuffered = vault.deposit(amount // 10, {"from": user2}).gas_used
+    assert token.balanceOf(vault) == 0
+
+    vault.setBufferHighWaterMark(amount // 2, {"from": gov})
+    token.approve(vault.address, amount, {"from": user1})
+    buffered = vault.deposit(amount // 10, {"from": user1}).gas_used
+    assert token.balanceOf(vault) == amount // 10
+    assert strategy.balanceOf() == amount // 10
+    assert buffered < unbuffered
+
+    # small withdrawals are paid from the buffer
+    vault.withdraw(vault.balanceOf(user1) // 2, {"from": user1})
+    assert strategy.balanceOf() == amount // 10
+    assert token.balanceOf(vault) == pytest.approx(amount // 20, rel=1e-9)
+
+    # crossing the high water mark sends the whole buffer to the strategy
+    vault.deposit(amount // 2, {"from": user1})
+    assert token.balanceOf(vault) == 0
+    assert vault.totalBalance() == strategy.balanceOf()
+
+    # the buffer is sent to the strategy each harvest
+    vault.deposit(amount // 10, {"from": user1})
+    assert token.balanceOf(vault) == amount // 10
+    chain.sleep(10)
+    chain.mine(1)
+    vault.harvest({"from": gov})
+    assert token.balanceOf(vault) == 0
+
+    # withdrawals larger than the buffer still reach the strategy
+    vault.deposit(amount // 10, {"from": user1})
+    before = token.balanceOf(user1)
+    shares = vault.balanceOf(user1)
+    expected = vault.totalBalance() * shares // vault.totalSupply()
+    vault.withdraw(shares, {"from": user1})
+    assert token.balanceOf(user1) - before == expected
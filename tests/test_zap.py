@@ -0,0 +1,141 @@
+import pytest
+from brownie import accounts, chain, reverts, MockERC20, RedirectZap
+from eth_keys import keys
+from eth_utils import keccak
+
+try:
+    from eth_abi import encode as encode_abi
+except ImportError:
+    from eth_abi import encode_abi
+
+PERMIT_TYPEHASH = keccak(text="Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)")
+
+
+def sign_permit(token, owner, spender, value, deadline):
+    struct = keccak(encode_abi(
+        ["bytes32", "address", "address", "uint256", "uint256", "uint256"],
+        [PERMIT_TYPEHASH, owner.address, spender.address, value, token.nonces(owner), deadline]))
+    digest = keccak(b"\x19\x01" + bytes(token.DOMAIN_SEPARATOR()) + struct)
+    signature = keys.PrivateKey(bytes.fromhex(owner.private_key[2:])).sign_msg_hash(digest)
+    return signature.v + 27, signature.r.to_bytes(32, "big"), signature.s.to_bytes(32, "big")
+
+
+@pytest.fixture
+def lp(local_env, token):
+    # the mock LP supports permit and is minted freely
+    if local_env is None:
+        pytest.skip("needs the local mocks")
+    yield MockERC20.at(token.address)
+
+
+def test_deposit_with_permit(vault, distributor, lp, gov, amount):
+
+    signer = accounts.add()
+    gov.transfer(signer, "1 ether")
+    lp.mint(signer, amount, {"from": gov})
+    deadline = chain.time() + 3600
+
+    v, r, s = sign_permit(lp, signer, vault, amount, deadline)
+    with reverts("permit failed"):
+        vault.depositWithPermit(amount // 2, deadline, v, r, s, {"from": signer})
+
+    vault.depositWithPermit(amount, deadline, v, r, s, {"from": signer})
+    assert lp.balanceOf(signer) == 0
+    assert vault.balanceOf(signer) == amount
+    assert distributor.userInfo(signer)[:2] == (amount, distributor.epoch() + 1)
+
+    # the permit can't be replayed
+    lp.mint(signer, amount, {"from": gov})
+    with reverts("permit failed"):
+        vault.depositWithPermit(amount, deadline, v, r, s, {"from": signer})
+
+
+def test_deposit_with_permit_front_run(vault, lp, gov, user1, amount):
+
+    signer = accounts.add()
+    gov.transfer(signer, "1 ether")
+    lp.mint(signer, amount, {"from": gov})
+    deadline = chain.time() + 3600
+    v, r, s = sign_permit(lp, signer, vault, amount, deadline)
+
+    # someone submits the permit from the mempool first
+    lp.permit(signer, vault, amount, deadline, v, r, s, {"from": user1})
+    vault.depositWithPermit(amount, deadline, v, r, s, {"from": signer})
+    assert vault.balanceOf(signer) == amount
+
+
+def test_zap(vault, distributor, lp, local_env, gov, user1, user2):
+
+    zap = RedirectZap.deploy({"from": gov})
+    token0, token1 = MockERC20.at(lp.token0()), MockERC20.at(lp.token1())
+    for t in (token0, token1):
+        t.mint(user1, 10 ** 19, {"from": gov})
+        t.approve(zap, 2 ** 256 - 1, {"from": user1})
+
+    # only approved zaps can deposit for another user
+    with reverts("!zap"):
+        vault.depositFor(user2, 1, {"from": user1})
+    with reverts():
+        vault.setZap(zap, True, {"from": user1})
+    with reverts("!route"):
+        zap.zap(vault, 10 ** 18, 10 ** 18, 0, {"from": user1})
+
+    vault.setZap(zap, True, {"from": gov})
+    with reverts():
+        zap.setZapRoute(vault, local_env.router, False, False, {"from": user1})
+    zap.setZapRoute(vault, local_env.router, False, False, {"from": gov})
+
+    # both tokens, the unused part is returned
+    before = token1.balanceOf(user1)
+    tx = zap.zap(vault, 10 ** 18, 2 * 10 ** 18, 0, {"from": user1})
+    liquidity = tx.events["Zapped"]["liquidity"]
+    assert liquidity > 0
+    assert vault.balanceOf(user1) == liquidity
+    assert vault.cumulativeDeposits(user1) == liquidity
+    assert distributor.userInfo(user1)[:2] == (liquidity, distributor.epoch() + 1)
+    assert before - token1.balanceOf(user1) == 10 ** 18
+    for t in (token0, token1, lp):
+        assert t.balanceOf(zap) == 0
+
+    # a single asset is half swapped before adding liquidity
+    shares = vault.balanceOf(user1)
+    with reverts("!tokenIn"):
+        zap.zapSingle(vault, lp, 10 ** 18, 0, {"from": user1})
+    with reverts("!minLiquidity"):
+        zap.zapSingle(vault, token1, 10 ** 18, 10 ** 18, {"from": user1})
+    zap.zapSingle(vault, token1, 10 ** 18, 1, {"from": user1})
+    assert vault.balanceOf(user1) > shares
+    for t in (token0, token1, lp):
+        assert t.balanceOf(zap) == 0
+
+    # clearing the route disables zaps into the vault
+    zap.setZapRoute(vault, "0x0000000000000000000000000000000000000000", False, False, {"from": gov})
+    with reverts("!route"):
+        zap.zapSingle(vault, token1, 10 ** 18, 0, {"from": user1})
+
+
+def test_zap_shared_router(create_vault, vault, distributor, lp, local_env, gov, user1):
+
+    # both vaults share the LP, so its tokens and the router
+    vault2, distributor2, strategy2 = create_vault()
+    zap = RedirectZap.deploy({"from": gov})
+    token0, token1 = MockERC20.at(lp.token0()), MockERC20.at(lp.token1())
+    for t in (token0, token1):
+        t.mint(user1, 10 ** 19, {"from": gov})
+        t.approve(zap, 2 ** 256 - 1, {"from": user1})
+    for v in (vault, vault2):
+        v.setZap(zap, True, {"from": gov})
+        zap.setZapRoute(v, local_env.router, False, False, {"from": gov})
+
+    for v in (vault, vault2):
+        zap.zap(v, 10 ** 18, 10 ** 18, 1, {"from": user1})
+        assert v.balanceOf(user1) > 0
+
+    # clearing one vaults route leaves the shared router approval in place
+    zap.setZapRoute(vault, "0x0000000000000000000000000000000000000000", False, False, {"from": gov})
+    assert token0.allowance(zap, local_env.router) > 0
+    shares = vault2.balanceOf(user1)
+    zap.zapSingle(vault2, token1, 10 ** 18, 1, {"from": user1})
+    assert vault2.balanceOf(user1) > shares
+    with reverts("!route"):
+        zap.zap(vault, 10 ** 18, 10 ** 18, 0, {"from": user1})